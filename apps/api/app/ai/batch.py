@@ -0,0 +1,236 @@
+"""
+Batch LLM execution for non-interactive runs (offline scoring), never inside an HTTP request.
+
+Prompts for a whole run are assembled up front and submitted as one batch job instead of
+one synchronous chat completion per event. Two backends share the OpenAI Batch API file
+format (JSONL requests in, JSONL responses out):
+
+- OpenAIBatchBackend: the real Batch API (cheaper, completes within a 24h window)
+- LocalFileBatchBackend: writes the same files to a local directory; results come from a
+  `responder` callable or from any process that drops `<job_id>.output.jsonl` next to the
+  input. Used by tests and local runs.
+
+Items with no usable output (failed, expired, timed out) get the agent's safe-default ESCALATE.
+"""
+import os
+import uuid
+from pathlib import Path
+from time import monotonic, sleep
+from typing import Callable, Protocol
+
+from sqlalchemy.orm import Session
+
+from app.ai.clients import get_openai_client
+from app.ai.llm_agent import FullLogError, FullLogInfo, LlmDecisionAgent
+from app.core.metrics import openai_call, record_llm_batch_item, stage_timer
+from app.core.serialization import dumps, loads
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+BATCH_ITEM_FAILED_REASON = "LLM batch item failed or did not complete; safe default escalation."
+
+LLM_BATCH_BACKEND = os.getenv("LLM_BATCH_BACKEND", "openai").lower()  # openai | local
+LLM_BATCH_DIR = os.getenv("LLM_BATCH_DIR", "/tmp/llm-batches")
+LLM_BATCH_TIMEOUT_SECONDS = float(os.getenv("LLM_BATCH_TIMEOUT_SECONDS", "86400"))
+LLM_BATCH_POLL_SECONDS = float(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+
+
+class BatchBackend(Protocol):
+    def submit(self, requests: list[dict]) -> str:
+        """Submits [{"custom_id", "body"}, ...] and returns a job id."""
+        ...
+
+    def collect(self, job_id: str, timeout_seconds: float) -> dict[str, str]:
+        """Waits for the job; returns custom_id -> completion text for the items that succeeded."""
+        ...
+
+
+def _request_lines(requests: list[dict]) -> bytes:
+    return b"".join(
+        dumps(
+            {
+                "custom_id": r["custom_id"],
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_ENDPOINT,
+                "body": r["body"],
+            }
+        )
+        + b"\n"
+        for r in requests
+    )
+
+
+def _parse_output_lines(content: str | bytes) -> dict[str, str]:
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+
+    outputs = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            outputs[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            continue
+    return outputs
+
+
+class OpenAIBatchBackend:
+    TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(self, poll_seconds: float = LLM_BATCH_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+
+    def submit(self, requests: list[dict]) -> str:
+        client = get_openai_client()
+        with openai_call("files.create"):
+            input_file = client.files.create(file=("batch.jsonl", _request_lines(requests)), purpose="batch")
+        with openai_call("batches.create"):
+            job = client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=CHAT_COMPLETIONS_ENDPOINT,
+                completion_window="24h",
+            )
+        return job.id
+
+    def collect(self, job_id: str, timeout_seconds: float) -> dict[str, str]:
+        client = get_openai_client()
+        deadline = monotonic() + timeout_seconds
+        while True:
+            with openai_call("batches.retrieve"):
+                job = client.batches.retrieve(job_id)
+            if job.status in self.TERMINAL_STATUSES or monotonic() >= deadline:
+                break
+            sleep(self.poll_seconds)
+
+        if job.status not in self.TERMINAL_STATUSES:
+            # Don't leave it running (and billing) after we've given up on it
+            with openai_call("batches.cancel"):
+                client.batches.cancel(job_id)
+
+        # Expired/cancelled jobs can still carry a partial output file
+        if not job.output_file_id:
+            return {}
+        with openai_call("files.content"):
+            content = client.files.content(job.output_file_id).read()
+        return _parse_output_lines(content)
+
+
+class LocalFileBatchBackend:
+    """
+    File-based stand-in for the Batch API: <dir>/<job_id>.input.jsonl in,
+    <dir>/<job_id>.output.jsonl out (same line formats as OpenAI).
+
+    With a responder (body -> completion text) the output is written on submit.
+    Without one, collect() waits for something else to write the output file.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = LLM_BATCH_DIR,
+        responder: Callable[[dict], str] | None = None,
+        poll_seconds: float = 0.5,
+    ):
+        self.directory = Path(directory)
+        self.responder = responder
+        self.poll_seconds = poll_seconds
+
+    def _path(self, job_id: str, kind: str) -> Path:
+        return self.directory / f"{job_id}.{kind}.jsonl"
+
+    def submit(self, requests: list[dict]) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        job_id = f"batch_{uuid.uuid4().hex}"
+        self._path(job_id, "input").write_bytes(_request_lines(requests))
+
+        if self.responder is not None:
+            lines = []
+            for r in requests:
+                try:
+                    content = self.responder(r["body"])
+                    item = {
+                        "custom_id": r["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                        },
+                        "error": None,
+                    }
+                except Exception as e:
+                    item = {
+                        "custom_id": r["custom_id"],
+                        "response": None,
+                        "error": {"code": type(e).__name__, "message": str(e)},
+                    }
+                lines.append(dumps(item) + b"\n")
+            self._path(job_id, "output").write_bytes(b"".join(lines))
+
+        return job_id
+
+    def collect(self, job_id: str, timeout_seconds: float) -> dict[str, str]:
+        output = self._path(job_id, "output")
+        deadline = monotonic() + timeout_seconds
+        while not output.exists():
+            if monotonic() >= deadline:
+                return {}
+            sleep(self.poll_seconds)
+        return _parse_output_lines(output.read_bytes())
+
+
+def get_batch_backend() -> BatchBackend:
+    if LLM_BATCH_BACKEND == "local":
+        return LocalFileBatchBackend(LLM_BATCH_DIR)
+    return OpenAIBatchBackend()
+
+
+def evaluate_batch(
+    agent: LlmDecisionAgent,
+    events: dict[str, dict],
+    db: Session,
+    backend: BatchBackend | None = None,
+    timeout_seconds: float = LLM_BATCH_TIMEOUT_SECONDS,
+) -> dict[str, dict]:
+    """
+    Batch counterpart of agent.evaluate(): {custom_id: event} -> {custom_id: result dict}.
+    Every id gets a result; anything that failed along the way is the safe-default ESCALATE.
+    """
+    backend = backend or get_batch_backend()
+    results: dict[str, dict] = {}
+    requests = []
+
+    # Embedding + retrieval still run per event (they're fast); only the completions are batched
+    for custom_id, event in events.items():
+        try:
+            messages = agent.build_messages(event, db)
+        except Exception as e:
+            FullLogError(f"[{agent.name}] Failed to build batch prompt for {custom_id}: {repr(e)}")
+            results[custom_id] = agent.failed_result()
+            continue
+        requests.append({"custom_id": custom_id, "body": agent.request_body(messages)})
+
+    if not requests:
+        return results
+
+    outputs: dict[str, str] = {}
+    with stage_timer("llm_batch"):
+        try:
+            job_id = backend.submit(requests)
+            FullLogInfo(f"[{agent.name}] Submitted batch {job_id} with {len(requests)} requests")
+            outputs = backend.collect(job_id, timeout_seconds)
+        except Exception as e:
+            FullLogError(f"[{agent.name}] Batch job failed: {repr(e)}")
+
+    for r in requests:
+        custom_id = r["custom_id"]
+        text = outputs.get(custom_id)
+        if text is None:
+            record_llm_batch_item("failed")
+            results[custom_id] = agent.failed_result(BATCH_ITEM_FAILED_REASON)
+        else:
+            record_llm_batch_item("completed")
+            results[custom_id] = agent.parse_output(text)
+
+    return results
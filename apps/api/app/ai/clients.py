@@ -0,0 +1,53 @@
+import os
+from threading import RLock
+
+# One OpenAI client per process, created on first use.
+# Importing `openai` alone costs ~0.5s (it pulls in every generated type), so neither the
+# import nor the client construction should happen while a worker is booting.
+_client = None
+_realtime_client = None
+_bulk_client = None
+# Bulk calls (document ingestion) aren't on a request's latency budget: wait longer, retry
+OPENAI_BULK_TIMEOUT_SECONDS = float(os.getenv("OPENAI_BULK_TIMEOUT_SECONDS", "120"))
+OPENAI_BULK_MAX_RETRIES = int(os.getenv("OPENAI_BULK_MAX_RETRIES", "4"))
+# Re-entrant: get_realtime_openai_client() builds the base client while holding it
+_client_lock = RLock()
+
+
+def get_openai_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def get_realtime_openai_client():
+    """
+    Same client with SDK retries off, for calls made under app.ai.resilience: the guard
+    owns timeouts, and a retry would silently spend the caller's latency budget.
+    """
+    global _realtime_client
+    if _realtime_client is None:
+        with _client_lock:
+            if _realtime_client is None:
+                _realtime_client = get_openai_client().with_options(max_retries=0)
+    return _realtime_client
+
+
+def get_bulk_openai_client():
+    """
+    Same client with a long timeout and SDK retries (backoff on 429/5xx/timeouts), for bulk
+    work made outside app.ai.resilience: one slow call shouldn't fail a whole document.
+    """
+    global _bulk_client
+    if _bulk_client is None:
+        with _client_lock:
+            if _bulk_client is None:
+                _bulk_client = get_openai_client().with_options(
+                    timeout=OPENAI_BULK_TIMEOUT_SECONDS, max_retries=OPENAI_BULK_MAX_RETRIES
+                )
+    return _bulk_client
@@ -1,14 +1,127 @@
 import os
-from openai import OpenAI
+from array import array
+from collections import OrderedDict
+from threading import Lock
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.ai.clients import get_bulk_openai_client, get_realtime_openai_client
+from app.ai.resilience import llm_guard
+from app.core.metrics import record_cache_lookup
+from app.core.shared_cache import shared_cache
 
 EMBED_MODEL = "text-embedding-3-small"  # 1536 dims
+EMBED_DIMS = 1536
+
+# Small per-process LRU: the same supplier rules / event shapes get embedded repeatedly
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+
+# With SHARED_CACHE_DIR set, one host-wide cache (app.core.shared_cache) replaces the per-process
+# LRU: workers share each other's embeddings and memory no longer grows with the worker count.
+# Vectors are kept as float32, which is what pgvector stores anyway.
+EMBED_SHARED_CACHE_ENTRIES = int(os.getenv("EMBED_SHARED_CACHE_ENTRIES", "8192"))
+
+_cache: "OrderedDict[str, list[float]]" = OrderedDict()
+_cache_lock = Lock()
+
+
+def _shared():
+    return shared_cache("embedding", EMBED_SHARED_CACHE_ENTRIES, slot_bytes=4 * EMBED_DIMS + 64)
+
+
+def _shared_key(text: str) -> bytes:
+    return f"{EMBED_MODEL}\n{text}".encode()
+
+
+def _cache_get(text: str) -> list[float] | None:
+    shared = _shared()
+    if shared is not None:
+        value = shared.get(_shared_key(text))
+        if value is None:
+            return None
+        emb = array("f")
+        emb.frombytes(value)
+        return emb.tolist()
+
+    with _cache_lock:
+        emb = _cache.get(text)
+        if emb is not None:
+            _cache.move_to_end(text)
+        return emb
+
+
+def _cache_put(text: str, emb: list[float]) -> None:
+    shared = _shared()
+    if shared is not None:
+        shared.put(_shared_key(text), array("f", emb).tobytes())
+        return
+
+    if EMBED_CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _cache[text] = emb
+        _cache.move_to_end(text)
+        while len(_cache) > EMBED_CACHE_SIZE:
+            _cache.popitem(last=False)
 
 
 def get_embedding(text: str) -> list[float]:
-    response = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=text
+    cached = _cache_get(text)
+    record_cache_lookup("embedding", cached is not None)
+    if cached is not None:
+        return cached
+
+    response = llm_guard.call(
+        "embeddings.create",
+        lambda timeout: get_realtime_openai_client().embeddings.create(
+            model=EMBED_MODEL,
+            input=text,
+            timeout=timeout,
+        ),
+    )
+    emb = response.data[0].embedding
+    _cache_put(text, emb)
+    return emb
+
+
+def _embed_many(texts: list[str], create) -> list[list[float]]:
+    out: list[list[float] | None] = [_cache_get(t) for t in texts]
+    for emb in out:
+        record_cache_lookup("embedding", emb is not None)
+
+    missing = list(dict.fromkeys(t for t, emb in zip(texts, out) if emb is None))
+    if missing:
+        response = create(missing)
+        fetched = {t: d.embedding for t, d in zip(missing, sorted(response.data, key=lambda d: d.index))}
+        for t, emb in fetched.items():
+            _cache_put(t, emb)
+        out = [emb if emb is not None else fetched[t] for t, emb in zip(texts, out)]
+    return out
+
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Embeds several query texts in one API call (cache hits are served locally). Order is
+    preserved. Request-time: runs under llm_guard like get_embedding.
+    """
+    return _embed_many(
+        texts,
+        lambda missing: llm_guard.call(
+            "embeddings.create",
+            lambda timeout: get_realtime_openai_client().embeddings.create(
+                model=EMBED_MODEL,
+                input=missing,
+                timeout=timeout,
+            ),
+        ),
+    )
+
+
+def embed_documents(texts: list[str]) -> list[list[float]]:
+    """
+    get_embeddings for bulk ingestion: outside llm_guard, so a large batch neither waits in
+    the request concurrency queue, trips the breaker /run depends on, gets hedged against
+    single-query latency, nor fails on the first transient error (the bulk client retries).
+    """
+    return _embed_many(
+        texts,
+        lambda missing: get_bulk_openai_client().embeddings.create(model=EMBED_MODEL, input=missing),
     )
-    return response.data[0].embedding
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Document ingestion: whole SLA/SOP files -> knowledge_chunks.
+
+    lines -> chunk_document() -> hash -> [skip unchanged] -> batches -> embed || insert
+
+- The document streams through the chunker; only one batch of chunks (plus the one being
+  embedded) is held at a time.
+- Each batch is embedded in one API call on a background thread while the previous batch is
+  inserted, so the DB round trip overlaps the embeddings round trip.
+- Chunks are keyed by (source, sha256(chunk_text)). Re-ingesting a revised document only
+  embeds chunks whose hash isn't stored for that source yet. Chunks that disappeared from the
+  document are deleted at the end, and kept ones take the new doc_type/supplier/region.
+
+Everything runs in the caller's transaction: a failed upload leaves the previous version intact.
+"""
+import hashlib
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.ai.embeddings import embed_documents
+from app.core.chunking import ChunkerConfig, chunk_document
+from app.core.metrics import record_knowledge_chunks
+from app.db.models import KnowledgeChunk
+
+KNOWLEDGE_EMBED_BATCH_SIZE = int(os.getenv("KNOWLEDGE_EMBED_BATCH_SIZE", "64"))
+
+
+@dataclass
+class DocumentMeta:
+    source: str
+    doc_type: str | None = None
+    supplier_id: str | None = None
+    region: str | None = None
+
+
+def content_hash(chunk_text: str) -> str:
+    return hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+
+
+def _insert_batch(db: Session, meta: DocumentMeta, batch: list[tuple[str, str]], future: Future) -> int:
+    embeddings = future.result()
+    rows = [
+        {
+            "source": meta.source,
+            "doc_type": meta.doc_type,
+            "supplier_id": meta.supplier_id,
+            "region": meta.region,
+            "chunk_text": chunk_text,
+            "content_hash": digest,
+            "embedding": embedding,
+        }
+        for (digest, chunk_text), embedding in zip(batch, embeddings)
+    ]
+    # A concurrent ingest of the same document may have stored the chunk first
+    db.execute(
+        pg_insert(KnowledgeChunk)
+        .values(rows)
+        .on_conflict_do_nothing(
+            index_elements=[KnowledgeChunk.source, KnowledgeChunk.content_hash],
+            index_where=KnowledgeChunk.content_hash.is_not(None),
+        )
+    )
+    return len(rows)
+
+
+def ingest_document(
+    db: Session,
+    lines: Iterable[str],
+    fmt: str,
+    meta: DocumentMeta,
+    config: ChunkerConfig | None = None,
+    batch_size: int = KNOWLEDGE_EMBED_BATCH_SIZE,
+) -> dict:
+    """
+    Returns counts {chunks, embedded, unchanged, deleted}. Does not commit.
+    Raises ValueError if the document yields no chunks (rather than deleting the stored version).
+    """
+    stored = set(
+        db.scalars(
+            select(KnowledgeChunk.content_hash).where(
+                KnowledgeChunk.source == meta.source,
+                KnowledgeChunk.content_hash.is_not(None),
+            )
+        )
+    )
+    seen: set[str] = set()
+    counts = {"chunks": 0, "embedded": 0, "unchanged": 0, "deleted": 0}
+
+    def new_batches() -> Iterator[list[tuple[str, str]]]:
+        batch: list[tuple[str, str]] = []
+        for chunk_text in chunk_document(lines, fmt, config):
+            digest = content_hash(chunk_text)
+            if digest in seen:  # repeated boilerplate within the document
+                continue
+            seen.add(digest)
+            counts["chunks"] += 1
+            if digest in stored:
+                counts["unchanged"] += 1
+                continue
+            batch.append((digest, chunk_text))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-embed") as pool:
+        pending: tuple[list[tuple[str, str]], Future] | None = None
+        for batch in new_batches():
+            future = pool.submit(embed_documents, [chunk_text for _, chunk_text in batch])
+            if pending is not None:
+                counts["embedded"] += _insert_batch(db, meta, *pending)
+            pending = (batch, future)
+        if pending is not None:
+            counts["embedded"] += _insert_batch(db, meta, *pending)
+
+    if not seen:
+        raise ValueError("Document produced no chunks")
+
+    same_source = [KnowledgeChunk.source == meta.source, KnowledgeChunk.content_hash.is_not(None)]
+    counts["deleted"] = db.execute(
+        delete(KnowledgeChunk).where(*same_source, KnowledgeChunk.content_hash.not_in(seen))
+    ).rowcount
+    db.execute(
+        update(KnowledgeChunk)
+        .where(
+            *same_source,
+            or_(
+                KnowledgeChunk.doc_type.is_distinct_from(meta.doc_type),
+                KnowledgeChunk.supplier_id.is_distinct_from(meta.supplier_id),
+                KnowledgeChunk.region.is_distinct_from(meta.region),
+            ),
+        )
+        .values(doc_type=meta.doc_type, supplier_id=meta.supplier_id, region=meta.region)
+    )
+
+    for outcome in ("embedded", "unchanged", "deleted"):
+        record_knowledge_chunks(outcome, counts[outcome])
+    return counts
@@ -1,14 +1,26 @@
-import os
 import json
 from time import perf_counter
 from typing import Optional
 
-from openai import OpenAI
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_, and_
 
+from app.ai.clients import get_realtime_openai_client
 from app.ai.embeddings import get_embedding
-from app.db.models import KnowledgeChunk
+from app.ai.prompts import PROMPT_VERSION, build_prompt, compact_event
+from app.ai.resilience import CircuitOpenError, llm_deadline, llm_guard
+from app.ai.retrieval import (
+    cache_contexts,
+    cached_contexts,
+    context_cache_key,
+    event_query_text,
+    search_knowledge,
+)
+from app.core.agents import ReasonCode
+from app.core.metrics import record_prompt_tokens, stage_timer
+from app.db.session import read_session
+
+CHAT_MODEL = "gpt-4o-mini"
+CIRCUIT_OPEN_REASON = "Skipped: LLM circuit open; deterministic-only vote."
 
 # Optional: your org-style loggers (fallback to print if not available)
 try:
@@ -21,9 +33,6 @@ except Exception:  # pragma: no cover
         print(msg)
 
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 class LlmDecisionAgent:
     name = "LlmDecisionAgent"
 
@@ -48,39 +57,26 @@ class LlmDecisionAgent:
         region: Optional[str],
         doc_type: Optional[str] = None,
         top_k: int = 5,
-    ) -> str:
+        query_text: Optional[str] = None,
+    ) -> list[str]:
         """
-        Retrieves top_k knowledge chunks with metadata scoping:
+        Retrieves top_k knowledge chunks, most relevant first, with metadata scoping:
         - Prefer exact supplier_id/region/doc_type
         - Allow NULL (global rules)
-        Uses SQLAlchemy expression API so pgvector typing works correctly.
+        Hybrid (lexical + vector) when query_text is given, see app.ai.retrieval.
         """
         t0 = perf_counter()
 
-        filters = []
-
-        # supplier scope: supplier_id match OR global (NULL)
-        if supplier_id is not None:
-            filters.append(or_(KnowledgeChunk.supplier_id == supplier_id, KnowledgeChunk.supplier_id.is_(None)))
-
-        # region scope: region match OR global (NULL)
-        if region is not None:
-            filters.append(or_(KnowledgeChunk.region == region, KnowledgeChunk.region.is_(None)))
-
-        # doc_type scope (optional): doc_type match OR global (NULL)
-        if doc_type is not None:
-            filters.append(or_(KnowledgeChunk.doc_type == doc_type, KnowledgeChunk.doc_type.is_(None)))
-
-        stmt = select(KnowledgeChunk.chunk_text)
-
-        if filters:
-            stmt = stmt.where(and_(*filters))
-
-        # Distance ordering (pick ONE distance metric; cosine is common for OpenAI embeddings)
-        stmt = stmt.order_by(KnowledgeChunk.embedding.cosine_distance(query_embedding)).limit(top_k)
-
-        rows = db.execute(stmt).scalars().all()
-        rows = self._dedup_keep_order(rows)
+        hits = search_knowledge(
+            db,
+            query_embedding,
+            query_text,
+            supplier_id=supplier_id,
+            region=region,
+            doc_type=doc_type,
+            top_k=top_k,
+        )
+        rows = self._dedup_keep_order([h.chunk_text for h in hits])
 
         elapsed_ms = round((perf_counter() - t0) * 1000, 2)
         FullLogInfo(
@@ -88,7 +84,7 @@ class LlmDecisionAgent:
             f"for supplier_id={supplier_id}, region={region}, doc_type={doc_type} in {elapsed_ms} ms"
         )
 
-        return "\n".join(rows) if rows else ""
+        return rows
 
     def _safe_json_loads(self, text: str) -> dict | None:
         if not text:
@@ -107,101 +103,144 @@ class LlmDecisionAgent:
         except Exception:
             return None
 
-    def evaluate(self, event: dict, db: Session) -> dict:
+    def build_messages(self, event: dict, db: Session) -> list[dict]:
         """
-        Uses RAG (retrieval + LLM reasoning) to recommend:
-        - ESCALATE
-        - AUTO_RESOLVE
+        Embedding + retrieval + prompt for one event. Shared by the online call (evaluate)
+        and batch mode (app.ai.batch), so both send exactly the same request.
         """
-        t0 = perf_counter()
-
-        try:
+        # Serialized once: same string feeds the embedding (and its cache key) and the prompt
+        event_json = compact_event(event)
+
+        supplier_id = event.get("supplier_id")
+        region = event.get("region")
+        # If you store doc_type on chunks and want to force it:
+        # doc_type = "SLA" or "SOP" depending on your use, or None to allow all
+        doc_type = None
+        top_k = 5
+
+        # A context cached by any worker on this host skips both the embedding and the query
+        cache_key = context_cache_key(event_json, supplier_id, region, doc_type, top_k)
+        chunks = cached_contexts(cache_key)
+        if chunks is None:
             # Step 1: Embed the event for retrieval
-            query_text = json.dumps(event, sort_keys=True)
-            query_embedding = get_embedding(query_text)
-
-            supplier_id = event.get("supplier_id")
-            region = event.get("region")
-            # If you store doc_type on chunks and want to force it:
-            # doc_type = "SLA" or "SOP" depending on your use, or None to allow all
-            doc_type = None
-
-            knowledge_context = self._retrieve_knowledge(
-                db=db,
-                query_embedding=query_embedding,
-                supplier_id=supplier_id,
-                region=region,
-                doc_type=doc_type,
-                top_k=5,
-            )
+            query_embedding = get_embedding(event_json)
+
+            # Retrieval is read-only: served by the replica when one is healthy
+            with stage_timer("knowledge_retrieval"), read_session(db) as read_db:
+                chunks = self._retrieve_knowledge(
+                    db=read_db,
+                    query_embedding=query_embedding,
+                    supplier_id=supplier_id,
+                    region=region,
+                    doc_type=doc_type,
+                    top_k=top_k,
+                    query_text=event_query_text(event),
+                )
+            cache_contexts(cache_key, chunks)
+
+        # Step 2: Prompt (token-budgeted, static instructions first)
+        prompt = build_prompt(event_json, chunks)
+        record_prompt_tokens(prompt.input_tokens)
+        FullLogInfo(
+            f"[{self.name}] Prompt {prompt.version}: ~{prompt.input_tokens} tokens, "
+            f"{prompt.chunks_used} chunks ({prompt.chunks_trimmed} trimmed, {prompt.chunks_dropped} dropped)"
+        )
+        return prompt.messages
 
-            # Step 2: Prompt
-            prompt = f"""
-You are an AI supply chain risk analyst.
-
-Shipment data:
-{json.dumps(event, indent=2)}
-
-Relevant SLA/SOP rules:
-{knowledge_context}
-
-Based on the shipment data and rules:
-1. Decide: ESCALATE or AUTO_RESOLVE
-2. Explain reasoning
-3. Provide confidence between 0 and 1
-
-Return JSON only (no markdown, no extra text):
-{{
-  "decision": "ESCALATE|AUTO_RESOLVE",
-  "reason": "string",
-  "confidence": 0.0
-}}
-""".strip()
-
-            # Step 3: LLM call
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                temperature=0.2,
-                messages=[
-                    {"role": "system", "content": "You are a structured decision engine. Output JSON only."},
-                    {"role": "user", "content": prompt},
-                ],
-            )
+    def request_body(self, messages: list[dict]) -> dict:
+        # Chat completion parameters; also the "body" of each batch-job line
+        return {"model": CHAT_MODEL, "temperature": 0.2, "messages": messages}
 
-            output_text = resp.choices[0].message.content or ""
-            parsed = self._safe_json_loads(output_text) or {
+    def parse_output(self, output_text: str) -> dict:
+        """
+        Turns the model's reply into the agent result dict. Non-JSON replies fall back
+        to ESCALATE with LLM_PARSE_FAILED.
+        """
+        parsed = self._safe_json_loads(output_text)
+        reason_code = ReasonCode.LLM_DECISION
+        if parsed is None:
+            reason_code = ReasonCode.LLM_PARSE_FAILED
+            parsed = {
                 "decision": "ESCALATE",
                 "reason": "LLM parsing failed (non-JSON response).",
                 "confidence": 0.5,
             }
 
-            decision = str(parsed.get("decision", "ESCALATE")).strip().upper()
-            if decision not in {"ESCALATE", "AUTO_RESOLVE"}:
-                decision = "ESCALATE"
+        decision = str(parsed.get("decision", "ESCALATE")).strip().upper()
+        if decision not in {"ESCALATE", "AUTO_RESOLVE"}:
+            decision = "ESCALATE"
 
-            try:
-                confidence = float(parsed.get("confidence", 0.5))
-            except Exception:
-                confidence = 0.5
-            confidence = max(0.0, min(1.0, confidence))
+        try:
+            confidence = float(parsed.get("confidence", 0.5))
+        except Exception:
+            confidence = 0.5
+        confidence = max(0.0, min(1.0, confidence))
+
+        reason = str(parsed.get("reason", "No reason provided")).strip()
+
+        return {
+            "name": self.name,
+            "recommendation": decision,
+            "reason": reason,
+            "score": confidence,
+            "reason_code": reason_code,
+            "prompt_version": PROMPT_VERSION,
+        }
+
+    def failed_result(self, reason: str = "LLM agent failed; safe default escalation.") -> dict:
+        return {
+            "name": self.name,
+            "recommendation": "ESCALATE",
+            "reason": reason,
+            "score": 0.5,
+            "reason_code": ReasonCode.LLM_FAILED,
+        }
+
+    def circuit_open_result(self) -> dict:
+        # Non-voting, like a planner skip
+        return {
+            "name": self.name,
+            "recommendation": "SKIPPED",
+            "reason": CIRCUIT_OPEN_REASON,
+            "score": 0.0,
+            "reason_code": ReasonCode.LLM_CIRCUIT_OPEN,
+        }
 
-            reason = str(parsed.get("reason", "No reason provided")).strip()
+    def evaluate(self, event: dict, db: Session) -> dict:
+        """
+        Uses RAG (retrieval + LLM reasoning) to recommend:
+        - ESCALATE
+        - AUTO_RESOLVE
+        """
+        t0 = perf_counter()
+
+        try:
+            # Embedding + chat completion share one latency budget
+            with llm_deadline():
+                messages = self.build_messages(event, db)
+
+                # Step 3: LLM call
+                body = self.request_body(messages)
+                client = get_realtime_openai_client()
+                resp = llm_guard.call(
+                    "chat.completions.create",
+                    lambda timeout: client.chat.completions.create(**body, timeout=timeout),
+                )
+
+            output_text = resp.choices[0].message.content or ""
+            result = self.parse_output(output_text)
 
             elapsed_ms = round((perf_counter() - t0) * 1000, 2)
-            FullLogInfo(f"[{self.name}] Decision={decision}, confidence={confidence} in {elapsed_ms} ms")
+            FullLogInfo(
+                f"[{self.name}] Decision={result['recommendation']}, "
+                f"confidence={result['score']} in {elapsed_ms} ms"
+            )
+            return result
 
-            return {
-                "name": self.name,
-                "recommendation": decision,
-                "reason": reason,
-                "score": confidence,
-            }
+        except CircuitOpenError:
+            # Provider is known to be down: vote without the LLM instead of escalating everything
+            return self.circuit_open_result()
 
         except Exception as e:
             FullLogError(f"[{self.name}] Failed evaluate(): {repr(e)}")
-            return {
-                "name": self.name,
-                "recommendation": "ESCALATE",
-                "reason": "LLM agent failed; safe default escalation.",
-                "score": 0.5,
-            }
\ No newline at end of file
+            return self.failed_result()
@@ -0,0 +1,153 @@
+"""
+Prompt assembly for LlmDecisionAgent.
+
+Layout is fixed, static parts first:
+- system message: role, decision rules and output format (identical on every call)
+- user message: retrieved rules, then the shipment (the only parts that vary)
+
+Provider-side prompt caching does not apply. It only starts at a 1024-token prefix and
+SYSTEM_PROMPT is about 115 tokens. Padding the instructions up to that size would cost more
+input tokens than the cache discount gives back on a prompt this short. Revisit this if the
+static instructions ever grow past 1024 tokens on their own.
+
+Input size is capped by PROMPT_TOKEN_BUDGET. Retrieved chunks arrive most relevant first;
+each is trimmed to PROMPT_CHUNK_MAX_TOKENS and they are added in order until the budget
+runs out, so the least relevant ones are the first to go.
+
+Bump PROMPT_VERSION whenever the wording or layout changes; it is recorded with every
+LLM decision so results can be compared across prompt versions.
+"""
+import math
+import os
+from dataclasses import dataclass
+from threading import Lock
+
+from app.core.serialization import dumps_str
+
+PROMPT_VERSION = "decision-v2"
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+PROMPT_CHUNK_MAX_TOKENS = int(os.getenv("PROMPT_CHUNK_MAX_TOKENS", "250"))
+# Don't bother adding a chunk cut down to fewer tokens than this
+PROMPT_CHUNK_MIN_TOKENS = 32
+
+SYSTEM_PROMPT = """
+You are an AI supply chain risk analyst and a structured decision engine.
+
+You receive a delayed shipment (JSON) and the SLA/SOP rules that apply to its supplier and region.
+Based on the shipment data and rules:
+1. Decide: ESCALATE or AUTO_RESOLVE
+2. Explain reasoning in one or two sentences
+3. Provide confidence between 0 and 1
+
+Return JSON only (no markdown, no extra text):
+{"decision": "ESCALATE|AUTO_RESOLVE", "reason": "string", "confidence": 0.0}
+""".strip()
+
+_ELLIPSIS = " …"
+
+# =============================
+# TOKEN ESTIMATE
+# =============================
+# tiktoken (optional) gives exact counts for the gpt-4o family; without it ~4 chars/token
+# is close enough for budgeting English text and JSON.
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken  # type: ignore
+
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc is not None:
+        return len(enc.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts text to about max_tokens, preferring to end on a sentence or line boundary.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    enc = _get_encoding()
+    if enc is not None:
+        cut = enc.decode(enc.encode(text)[: max(0, max_tokens - 1)])
+    else:
+        cut = text[: max(0, max_tokens - 1) * 4]
+
+    # Back off to the last sentence/line end if that keeps at least half of the cut
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary >= len(cut) // 2:
+        cut = cut[: boundary + 1]
+    return cut.rstrip() + _ELLIPSIS
+
+
+def compact_event(event: dict) -> str:
+    # No indentation, stable key order, empty fields dropped
+    return dumps_str({k: v for k, v in event.items() if v is not None and v != ""}, sort_keys=True)
+
+
+@dataclass
+class Prompt:
+    messages: list[dict]
+    version: str = PROMPT_VERSION
+    input_tokens: int = 0
+    chunks_used: int = 0
+    chunks_trimmed: int = 0
+    chunks_dropped: int = 0
+
+
+def build_prompt(event_json: str, chunks: list[str], token_budget: int = PROMPT_TOKEN_BUDGET) -> Prompt:
+    """
+    event_json: the shipment as compact_event() serialized it.
+    chunks: retrieved knowledge, most relevant first.
+    """
+    shipment = f"Shipment:\n{event_json}"
+    rules_header = "Relevant SLA/SOP rules:\n"
+
+    fixed = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(shipment) + estimate_tokens(rules_header)
+    remaining = token_budget - fixed
+
+    selected: list[str] = []
+    trimmed = 0
+    for chunk in chunks:
+        limit = min(PROMPT_CHUNK_MAX_TOKENS, remaining)
+        if limit < PROMPT_CHUNK_MIN_TOKENS:
+            break
+        text = trim_to_tokens(chunk, limit)
+        if text is not chunk:
+            trimmed += 1
+        selected.append(f"- {text}")
+        remaining -= estimate_tokens(selected[-1]) + 1
+
+    rules = "\n".join(selected) if selected else "- (no matching rules)"
+    user = f"{rules_header}{rules}\n\n{shipment}"
+
+    return Prompt(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        input_tokens=estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user),
+        chunks_used=len(selected),
+        chunks_trimmed=trimmed,
+        chunks_dropped=len(chunks) - len(selected),
+    )
@@ -0,0 +1,305 @@
+"""
+Latency guard for the interactive OpenAI calls (embeddings + chat completion in /run).
+
+- Deadline: LlmDecisionAgent.evaluate() opens a per-run budget (LLM_RUN_BUDGET_SECONDS);
+  every call inside it gets timeout = min(LLM_CALL_TIMEOUT_SECONDS, time left).
+- Limiter: at most LLM_MAX_CONCURRENCY calls in flight per process (hedges included).
+  Callers wait at most LLM_QUEUE_TIMEOUT_SECONDS for a slot.
+- Hedging (LLM_HEDGING=1): if a call hasn't answered after the observed p95 latency,
+  a duplicate is sent and whichever answers first wins.
+- Circuit breaker: LLM_BREAKER_FAILURES consecutive failures open it for
+  LLM_BREAKER_RESET_SECONDS; while open the planner skips the LLM and the vote is
+  deterministic-only. After that one trial call is let through (half-open).
+
+Calls run on a small thread pool so the caller can stop waiting at the deadline even
+if the HTTP request is still in flight (it is bounded by its own timeout).
+"""
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import BoundedSemaphore, Lock
+from time import monotonic, perf_counter
+from typing import Callable, TypeVar
+
+from app.core.metrics import (
+    openai_call,
+    record_llm_circuit_state,
+    record_llm_fallback,
+    record_llm_hedge,
+)
+
+T = TypeVar("T")
+
+LLM_RUN_BUDGET_SECONDS = float(os.getenv("LLM_RUN_BUDGET_SECONDS", "8"))
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "6"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "1"))
+LLM_HEDGING = os.getenv("LLM_HEDGING", "0").lower() in {"1", "true", "yes"}
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.2"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# p95 needs some history before it means anything
+_MIN_LATENCY_SAMPLES = 20
+_LATENCY_WINDOW = 200
+
+
+class LlmUnavailable(Exception):
+    """The call was not made, or was abandoned, by the guard itself."""
+
+
+class CircuitOpenError(LlmUnavailable):
+    pass
+
+
+class DeadlineExceeded(LlmUnavailable):
+    pass
+
+
+class ConcurrencyLimitExceeded(LlmUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = Lock()
+        record_llm_circuit_state(name, self._state, transition=False)
+
+    def _transition(self, state: str) -> None:
+        # caller holds the lock
+        if state != self._state:
+            self._state = state
+            record_llm_circuit_state(self.name, state)
+
+    def is_open(self) -> bool:
+        # True while calls would be rejected (half-open with its trial already running counts)
+        with self._lock:
+            if self._state == self.OPEN:
+                return monotonic() - self._opened_at < self.reset_seconds
+            return self._state == self.HALF_OPEN and self._trial_in_flight
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = monotonic()
+                self._transition(self.OPEN)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_seconds - (monotonic() - self._opened_at)), 3)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": retry_in,
+            }
+
+
+class LatencyWindow:
+    def __init__(self, size: int = _LATENCY_WINDOW):
+        self._samples: dict[str, deque] = {}
+        self._size = size
+        self._lock = Lock()
+
+    def observe(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self._size)).append(seconds)
+
+    def p95(self, operation: str) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+_deadline: ContextVar[float | None] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: float = LLM_RUN_BUDGET_SECONDS):
+    """
+    Latency budget for every guarded call made inside the block (by this thread/task).
+    Nested blocks keep the earlier deadline.
+    """
+    deadline = monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class LlmGuard:
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        call_timeout: float = LLM_CALL_TIMEOUT_SECONDS,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        hedging: bool = LLM_HEDGING,
+        hedge_min_delay: float = LLM_HEDGE_MIN_DELAY_SECONDS,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
+        self.queue_timeout = queue_timeout
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker("openai", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+        self.latency = LatencyWindow()
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._in_flight = 0
+        self._in_flight_lock = Lock()
+        # every attempt holds a slot, so this many threads is always enough
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-call")
+
+    def _acquire(self, timeout: float | None) -> bool:
+        acquired = self._slots.acquire(timeout=timeout) if timeout is not None else self._slots.acquire(False)
+        if acquired:
+            with self._in_flight_lock:
+                self._in_flight += 1
+        return acquired
+
+    def _release(self) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _timeout(self) -> float:
+        deadline = _deadline.get()
+        if deadline is None:
+            return self.call_timeout
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("LLM run budget exhausted")
+        return min(self.call_timeout, remaining)
+
+    def _hedge_delay(self, operation: str) -> float | None:
+        if not self.hedging:
+            return None
+        p95 = self.latency.p95(operation)
+        return None if p95 is None else max(self.hedge_min_delay, p95)
+
+    def call(self, operation: str, fn: Callable[[float], T]) -> T:
+        """
+        Runs fn(timeout_seconds) under the deadline, limiter and breaker.
+        Raises LlmUnavailable subclasses for guard decisions, or fn's own exception.
+        """
+        try:
+            timeout = self._timeout()
+        except DeadlineExceeded:
+            record_llm_fallback("deadline")
+            raise
+
+        if not self._acquire(min(self.queue_timeout, timeout)):
+            record_llm_fallback("concurrency_limit")
+            raise ConcurrencyLimitExceeded(f"{self.max_concurrency} LLM calls already in flight")
+
+        if not self.breaker.allow():
+            self._release()
+            record_llm_fallback("circuit_open")
+            raise CircuitOpenError(f"circuit {self.breaker.name} is open")
+
+        try:
+            result = self._run(operation, fn, monotonic() + timeout)
+        except Exception as e:
+            self.breaker.record_failure()
+            record_llm_fallback("deadline" if isinstance(e, DeadlineExceeded) else "error")
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _run(self, operation: str, fn: Callable[[float], T], deadline: float) -> T:
+        # Caller already holds one slot for the first attempt
+        def attempt() -> T:
+            t0 = perf_counter()
+            try:
+                with openai_call(operation):
+                    result = fn(max(0.001, deadline - monotonic()))
+                self.latency.observe(operation, perf_counter() - t0)
+                return result
+            finally:
+                self._release()
+
+        try:
+            futures = [self._executor.submit(attempt)]
+        except Exception:
+            self._release()
+            raise
+
+        hedge_delay = self._hedge_delay(operation)
+        if hedge_delay is not None and monotonic() + hedge_delay < deadline:
+            done, _ = wait(futures, timeout=hedge_delay)
+            # Only hedge with a free slot: hedges must not queue behind real traffic
+            if not done and self._acquire(None):
+                record_llm_hedge("launched")
+                futures.append(self._executor.submit(attempt))
+
+        pending = set(futures)
+        first_error = None
+        while pending:
+            done, pending = wait(
+                pending, timeout=max(0.0, deadline - monotonic()), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                raise DeadlineExceeded(f"{operation} did not answer before the deadline")
+            for f in done:
+                if f.exception() is None:
+                    if len(futures) > 1 and f is futures[1]:
+                        record_llm_hedge("won")
+                    return f.result()
+                first_error = first_error or f.exception()
+        raise first_error
+
+    def snapshot(self) -> dict:
+        return {
+            "circuit": self.breaker.snapshot(),
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "call_timeout_seconds": self.call_timeout,
+            "run_budget_seconds": LLM_RUN_BUDGET_SECONDS,
+            "hedging": self.hedging,
+            "p95_seconds": {
+                op: self.latency.p95(op) for op in ("embeddings.create", "chat.completions.create")
+            },
+        }
+
+
+llm_guard = LlmGuard()
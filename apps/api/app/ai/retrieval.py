@@ -0,0 +1,361 @@
+"""
+Knowledge retrieval shared by LlmDecisionAgent and the /knowledge query endpoints.
+
+Modes:
+- vector:  cosine distance over embeddings (semantic match)
+- lexical: full-text match on knowledge_chunks.search_tsv (GIN index), ts_rank_cd order.
+           Catches exact terms embeddings blur: clause ids, supplier codes, SKUs.
+- hybrid:  both, fused with reciprocal rank fusion:
+             score = vector_weight / (RRF_K + vector_rank) + lexical_weight / (RRF_K + lexical_rank)
+           Each arm contributes its best HYBRID_CANDIDATES; a chunk found by only one arm
+           gets that arm's term only.
+
+Lexical matching is OR over the query's terms (ranking decides precision, not the match), so
+a long query still finds chunks that mention any of its codes.
+
+prefilter (hybrid only): the vector arm only ranks chunks that match lexically, so distance
+is computed for the GIN index hits instead of every chunk in scope. Use it on large corpora
+when queries carry distinctive terms; with no lexical hit it falls back to plain vector search.
+
+Scope filters: supplier_id / region / doc_type match exactly or are NULL (global rules).
+
+Context cache: with SHARED_CACHE_DIR set, the chunk texts the LLM agent retrieved for a query
+are kept in a host-wide cache (app.core.shared_cache), so a repeat costs neither the embedding
+call nor the query in any worker. invalidate_knowledge_caches() drops it after ingestion; the
+TTL bounds staleness from ingests served by other hosts.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Text, cast, func, literal_column, or_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY
+from sqlalchemy.orm import Session
+
+from app.core.metrics import record_cache_lookup
+from app.core.serialization import dumps, loads
+from app.core.shared_cache import shared_cache
+from app.db.models import KnowledgeChunk
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+KNOWLEDGE_RETRIEVAL_MODE = os.getenv("KNOWLEDGE_RETRIEVAL_MODE", "hybrid")
+KNOWLEDGE_LEXICAL_PREFILTER = os.getenv("KNOWLEDGE_LEXICAL_PREFILTER", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+
+# Standard RRF damping constant: rank 1 vs rank 10 matters, rank 50 vs 60 barely does
+RRF_K = 60
+HYBRID_CANDIDATES = int(os.getenv("KNOWLEDGE_HYBRID_CANDIDATES", "50"))
+
+KNOWLEDGE_CONTEXT_CACHE_ENTRIES = int(os.getenv("KNOWLEDGE_CONTEXT_CACHE_ENTRIES", "4096"))
+KNOWLEDGE_CONTEXT_CACHE_SLOT_BYTES = int(os.getenv("KNOWLEDGE_CONTEXT_CACHE_SLOT_BYTES", "16384"))
+KNOWLEDGE_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("KNOWLEDGE_CONTEXT_CACHE_TTL_SECONDS", "300"))
+
+# Must match the search_tsv generated column (app.db.models.KnowledgeChunk)
+TS_CONFIG = literal_column("'english'::regconfig")
+
+
+@dataclass
+class KnowledgeHit:
+    id: str
+    source: str
+    chunk_text: str
+    score: float
+    similarity: Optional[float]  # cosine similarity; None in lexical mode (no embedding)
+
+
+@dataclass
+class RetrievalOptions:
+    mode: str = KNOWLEDGE_RETRIEVAL_MODE
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    prefilter: bool = KNOWLEDGE_LEXICAL_PREFILTER
+
+    def __post_init__(self):
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"mode must be one of {list(RETRIEVAL_MODES)}")
+        if self.vector_weight < 0 or self.lexical_weight < 0:
+            raise ValueError("weights must be >= 0")
+
+    @property
+    def needs_embedding(self) -> bool:
+        return self.mode != "lexical"
+
+
+def scope_filters(supplier_id: Optional[str], region: Optional[str], doc_type: Optional[str]) -> list:
+    filters = []
+    # supplier scope: supplier_id match OR global (NULL)
+    if supplier_id is not None:
+        filters.append(or_(KnowledgeChunk.supplier_id == supplier_id, KnowledgeChunk.supplier_id.is_(None)))
+    # region scope: region match OR global (NULL)
+    if region is not None:
+        filters.append(or_(KnowledgeChunk.region == region, KnowledgeChunk.region.is_(None)))
+    # doc_type scope (optional): doc_type match OR global (NULL)
+    if doc_type is not None:
+        filters.append(or_(KnowledgeChunk.doc_type == doc_type, KnowledgeChunk.doc_type.is_(None)))
+    return filters
+
+
+def lexical_query(query_text):
+    """
+    tsquery matching ANY of the terms of query_text (plainto_tsquery ANDs them).
+    """
+    anded = func.plainto_tsquery(TS_CONFIG, query_text).cast(Text)
+    return func.replace(anded, "&", "|").cast(TSQUERY)
+
+
+def _vector_stmt(query_embedding, filters: list, top_k: int):
+    distance = KnowledgeChunk.embedding.cosine_distance(query_embedding)
+    return (
+        select(
+            KnowledgeChunk.id,
+            KnowledgeChunk.source,
+            KnowledgeChunk.chunk_text,
+            (1 - distance).label("score"),
+            (1 - distance).label("similarity"),
+        )
+        .where(*filters)
+        .order_by(distance)
+        .limit(top_k)
+    )
+
+
+def _lexical_stmt(tsquery, filters: list, top_k: int):
+    rank = func.ts_rank_cd(KnowledgeChunk.search_tsv, tsquery)
+    return (
+        select(
+            KnowledgeChunk.id,
+            KnowledgeChunk.source,
+            KnowledgeChunk.chunk_text,
+            rank.label("score"),
+            literal_column("NULL::float").label("similarity"),
+        )
+        .where(*filters, KnowledgeChunk.search_tsv.op("@@")(tsquery))
+        .order_by(rank.desc())
+        .limit(top_k)
+    )
+
+
+def _hybrid_stmt(query_embedding, tsquery, filters: list, top_k: int, options: RetrievalOptions):
+    distance = KnowledgeChunk.embedding.cosine_distance(query_embedding)
+    matches = KnowledgeChunk.search_tsv.op("@@")(tsquery)
+    rank = func.ts_rank_cd(KnowledgeChunk.search_tsv, tsquery)
+
+    lexical = (
+        select(KnowledgeChunk.id, func.row_number().over(order_by=rank.desc()).label("rank"))
+        .where(*filters, matches)
+        .order_by(rank.desc())
+        .limit(HYBRID_CANDIDATES)
+        .subquery("lexical")
+    )
+    vector_filters = [*filters, matches] if options.prefilter else filters
+    vector = (
+        select(KnowledgeChunk.id, func.row_number().over(order_by=distance).label("rank"))
+        .where(*vector_filters)
+        .order_by(distance)
+        .limit(HYBRID_CANDIDATES)
+        .subquery("vector")
+    )
+
+    fused_score = func.coalesce(options.vector_weight / (RRF_K + vector.c.rank), 0.0) + func.coalesce(
+        options.lexical_weight / (RRF_K + lexical.c.rank), 0.0
+    )
+    fused = (
+        select(func.coalesce(vector.c.id, lexical.c.id).label("id"), fused_score.label("score"))
+        .select_from(vector.join(lexical, vector.c.id == lexical.c.id, full=True))
+        .subquery("fused")
+    )
+    return (
+        select(
+            KnowledgeChunk.id,
+            KnowledgeChunk.source,
+            KnowledgeChunk.chunk_text,
+            fused.c.score,
+            (1 - distance).label("similarity"),
+        )
+        .join(fused, fused.c.id == KnowledgeChunk.id)
+        .order_by(fused.c.score.desc(), distance)
+        .limit(top_k)
+    )
+
+
+def search_knowledge(
+    db: Session,
+    query_embedding: Optional[list[float]],
+    query_text: Optional[str],
+    *,
+    supplier_id: Optional[str] = None,
+    region: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    top_k: int = 5,
+    options: Optional[RetrievalOptions] = None,
+) -> list[KnowledgeHit]:
+    """
+    Top_k chunks in scope, best first. query_embedding may be None in lexical mode; without
+    query_text (or with an empty lexical query) hybrid degrades to vector search.
+    """
+    options = options or RetrievalOptions()
+    filters = scope_filters(supplier_id, region, doc_type)
+    has_text = bool(query_text and query_text.strip())
+
+    if options.mode == "lexical":
+        if not has_text:
+            return []
+        stmt = _lexical_stmt(lexical_query(query_text), filters, top_k)
+    elif options.mode == "vector" or not has_text:
+        stmt = _vector_stmt(query_embedding, filters, top_k)
+    else:
+        stmt = _hybrid_stmt(query_embedding, lexical_query(query_text), filters, top_k, options)
+
+    rows = db.execute(stmt).all()
+    if not rows and options.mode == "hybrid" and options.prefilter and has_text:
+        rows = db.execute(_vector_stmt(query_embedding, filters, top_k)).all()
+
+    return [_hit(r) for r in rows]
+
+
+def _hit(row) -> KnowledgeHit:
+    return KnowledgeHit(
+        id=str(row.id),
+        source=row.source,
+        chunk_text=row.chunk_text,
+        score=float(row.score),
+        similarity=None if row.similarity is None else float(row.similarity),
+    )
+
+
+def search_knowledge_batch(
+    db: Session,
+    query_embeddings: Optional[list[list[float]]],
+    query_texts: list[str],
+    *,
+    supplier_id: Optional[str] = None,
+    region: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    top_k: int = 5,
+    options: Optional[RetrievalOptions] = None,
+) -> list[list[KnowledgeHit]]:
+    """
+    search_knowledge for many queries in one statement: the queries are unnested into rows
+    (q) and the per-query search runs as a LATERAL subquery against each row. Returns one
+    hit list per query, in input order. query_embeddings may be None in lexical mode.
+
+    Prefiltered hybrid queries without any lexical hit are re-run as vector searches (one
+    more round trip, only when that happens).
+    """
+    options = options or RetrievalOptions()
+    filters = scope_filters(supplier_id, region, doc_type)
+
+    # Per-query values come from the unnested row; literal columns keep SQLAlchemy from
+    # adding q to the FROM list of every nested subquery
+    q_embedding = literal_column("q.embedding")
+    q_tsquery = lexical_query(literal_column("q.query_text"))
+    if options.mode == "lexical":
+        hits_stmt = _lexical_stmt(q_tsquery, filters, top_k)
+    elif options.mode == "vector":
+        hits_stmt = _vector_stmt(q_embedding, filters, top_k)
+    else:
+        hits_stmt = _hybrid_stmt(q_embedding, q_tsquery, filters, top_k, options)
+    hits = hits_stmt.lateral("hits")
+
+    embeddings = query_embeddings if options.needs_embedding else []
+    texts = [t or "" for t in query_texts]
+    # unnest() with several arrays zips them; missing embeddings become NULL
+    q = (
+        func.unnest(
+            cast(embeddings, ARRAY(Vector(), dimensions=1)),
+            cast(texts, ARRAY(Text)),
+        )
+        .table_valued("embedding", "query_text", with_ordinality="idx")
+        .render_derived(name="q")
+    )
+    rows = db.execute(
+        select(q.c.idx, hits)
+        .select_from(q)
+        .join(hits, true())
+        .order_by(q.c.idx, hits.c.score.desc())
+    ).all()
+
+    grouped: list[list[KnowledgeHit]] = [[] for _ in query_texts]
+    for r in rows:
+        grouped[r.idx - 1].append(_hit(r))
+
+    if options.mode == "hybrid" and options.prefilter:
+        for i, group in enumerate(grouped):
+            if not group:
+                rows = db.execute(_vector_stmt(query_embeddings[i], filters, top_k)).all()
+                grouped[i] = [_hit(r) for r in rows]
+    return grouped
+
+
+def event_query_text(event: dict) -> str:
+    """
+    Lexical query for a shipment event: its identifier-like string values (supplier, region,
+    shipment id), not the JSON keys, which would match any SOP mentioning "delay" or "order".
+    """
+    return " ".join(str(v) for v in event.values() if isinstance(v, str) and v)
+
+
+
+# =============================
+# CONTEXT CACHE
+# =============================
+def _context_cache():
+    return shared_cache(
+        "knowledge_context",
+        KNOWLEDGE_CONTEXT_CACHE_ENTRIES,
+        KNOWLEDGE_CONTEXT_CACHE_SLOT_BYTES,
+        ttl_seconds=KNOWLEDGE_CONTEXT_CACHE_TTL_SECONDS,
+    )
+
+
+def context_cache_key(
+    query: str,
+    supplier_id: Optional[str],
+    region: Optional[str],
+    doc_type: Optional[str],
+    top_k: int,
+    options: Optional[RetrievalOptions] = None,
+) -> bytes:
+    options = options or RetrievalOptions()
+    return dumps(
+        [
+            query,
+            supplier_id,
+            region,
+            doc_type,
+            top_k,
+            options.mode,
+            options.vector_weight,
+            options.lexical_weight,
+            options.prefilter,
+        ]
+    )
+
+
+def cached_contexts(key: bytes) -> Optional[list[str]]:
+    cache = _context_cache()
+    if cache is None:
+        return None
+    value = cache.get(key)
+    record_cache_lookup("knowledge_context", value is not None)
+    return None if value is None else loads(value)
+
+
+def cache_contexts(key: bytes, contexts: list[str]) -> None:
+    cache = _context_cache()
+    if cache is not None:
+        cache.put(key, dumps(contexts))
+
+
+def invalidate_knowledge_caches() -> None:
+    """
+    Call after committing knowledge_chunks changes: retrieved contexts cached on this host
+    stop matching in every worker. (Embeddings depend on the text only and stay valid.)
+    """
+    cache = _context_cache()
+    if cache is not None:
+        cache.invalidate()
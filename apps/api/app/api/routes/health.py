@@ -1,7 +1,20 @@
 from fastapi import APIRouter
 
+from app.ai.resilience import llm_guard
+from app.db.session import pool_stats
+
 router = APIRouter(tags=["health"])
 
 @router.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/health/db")
+def health_db():
+    # Connection pool usage per engine (+ replica lag/fallback state when configured)
+    return pool_stats()
+
+@router.get("/health/llm")
+def health_llm():
+    # Circuit breaker state, in-flight LLM calls and observed p95 (this worker only)
+    return llm_guard.snapshot()
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
+import os
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db.models import KnowledgeChunk
-from app.ai.embeddings import get_embedding
+from app.ai.embeddings import get_embedding, get_embeddings
+from app.ai.ingestion import DocumentMeta, ingest_document
+from app.ai.retrieval import (
+    KNOWLEDGE_LEXICAL_PREFILTER,
+    KNOWLEDGE_RETRIEVAL_MODE,
+    RetrievalOptions,
+    invalidate_knowledge_caches,
+    search_knowledge,
+    search_knowledge_batch,
+)
+from app.core.chunking import (
+    FORMATS,
+    KNOWLEDGE_CHUNK_OVERLAP,
+    KNOWLEDGE_CHUNK_SIZE,
+    ChunkerConfig,
+    detect_format,
+    iter_lines,
+)
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
 
+KNOWLEDGE_QUERY_BATCH_MAX = int(os.getenv("KNOWLEDGE_QUERY_BATCH_MAX", "100"))
+
 
 class KnowledgeIngestRequest(BaseModel):
     source: str = Field(..., max_length=200)
@@ -28,13 +48,55 @@ class KnowledgeIngestResponse(BaseModel):
     deduped: bool
 
 
+class DocumentIngestResponse(BaseModel):
+    status: str
+    source: str
+    format: str
+    chunks: int
+    embedded: int
+    unchanged: int
+    deleted: int
+
+
 class KnowledgeQueryItem(BaseModel):
     id: str
     source: str
-    similarity: float
+    similarity: Optional[float]  # cosine similarity; null in lexical mode
+    score: float  # ranking score of the mode (similarity, ts_rank_cd or fused RRF)
     text: str
 
 
+class KnowledgeQueryBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=KNOWLEDGE_QUERY_BATCH_MAX)
+    top_k: int = Field(default=3, ge=1, le=50)
+    supplier_id: Optional[str] = Field(default=None, max_length=50)
+    region: Optional[str] = Field(default=None, max_length=50)
+    doc_type: Optional[str] = Field(default=None, max_length=50)
+    mode: str = Field(default=KNOWLEDGE_RETRIEVAL_MODE, pattern="^(vector|lexical|hybrid)$")
+    vector_weight: float = Field(default=1.0, ge=0)
+    lexical_weight: float = Field(default=1.0, ge=0)
+    prefilter: bool = KNOWLEDGE_LEXICAL_PREFILTER
+
+
+class KnowledgeQueryBatchGroup(BaseModel):
+    query: str
+    items: List[KnowledgeQueryItem]
+
+
+class KnowledgeQueryBatchResponse(BaseModel):
+    results: List[KnowledgeQueryBatchGroup]
+
+
+def _query_item(h) -> dict:
+    return {
+        "id": h.id,
+        "source": h.source,
+        "similarity": h.similarity,
+        "score": h.score,
+        "text": h.chunk_text,
+    }
+
+
 def _find_duplicate(
     db: Session,
     *,
@@ -110,6 +172,7 @@ def ingest_chunk(req: KnowledgeIngestRequest, db: Session = Depends(get_db)):
         db.add(chunk)
         db.commit()
         db.refresh(chunk)
+        invalidate_knowledge_caches()
 
         return {
             "status": "stored",
@@ -123,35 +186,111 @@ def ingest_chunk(req: KnowledgeIngestRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to ingest knowledge chunk: {e}")
 
 
+@router.post("/documents", response_model=DocumentIngestResponse)
+def ingest_document_file(
+    file: UploadFile = File(...),
+    source: str = Form(..., max_length=200),
+    doc_type: Optional[str] = Form(default=None, max_length=50),
+    supplier_id: Optional[str] = Form(default=None, max_length=50),
+    region: Optional[str] = Form(default=None, max_length=50),
+    format: Optional[str] = Form(default=None),
+    chunk_size: int = Form(default=KNOWLEDGE_CHUNK_SIZE),
+    chunk_overlap: int = Form(default=KNOWLEDGE_CHUNK_OVERLAP),
+    split_on_headings: bool = Form(default=True),
+    db: Session = Depends(get_db),
+):
+    """
+    Chunks, embeds and stores a whole SLA/SOP document (text, Markdown or CSV).
+    The upload is spooled to disk by the server and read back line by line. Re-uploading
+    under the same source replaces the previous version, embedding only changed chunks.
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {list(FORMATS)}")
+    try:
+        config = ChunkerConfig(size=chunk_size, overlap=chunk_overlap, split_on_headings=split_on_headings)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    meta = DocumentMeta(source=source, doc_type=doc_type, supplier_id=supplier_id, region=region)
+    try:
+        counts = ingest_document(db, iter_lines(file.file), fmt, meta, config)
+        db.commit()
+        invalidate_knowledge_caches()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to ingest document: {e}")
+
+    return {"status": "stored", "source": source, "format": fmt, **counts}
+
+
 @router.get("/query", response_model=List[KnowledgeQueryItem])
-def query_knowledge(query: str, top_k: int = 3, db: Session = Depends(get_db)):
+def query_knowledge(
+    query: str,
+    top_k: int = Query(default=3, ge=1, le=50),
+    mode: str = Query(default=KNOWLEDGE_RETRIEVAL_MODE, pattern="^(vector|lexical|hybrid)$"),
+    vector_weight: float = Query(default=1.0, ge=0),
+    lexical_weight: float = Query(default=1.0, ge=0),
+    prefilter: bool = KNOWLEDGE_LEXICAL_PREFILTER,
+    supplier_id: Optional[str] = None,
+    region: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    options = RetrievalOptions(
+        mode=mode, vector_weight=vector_weight, lexical_weight=lexical_weight, prefilter=prefilter
+    )
     try:
-        embedding = get_embedding(query)
-
-        # NOTE: cast to ::vector so pgvector operator resolves types
-        result = db.execute(
-            text(
-                """
-                SELECT id, source, chunk_text,
-                       1 - (embedding <=> (:embedding)::vector) AS similarity
-                FROM knowledge_chunks
-                ORDER BY embedding <=> (:embedding)::vector
-                LIMIT :top_k
-                """
-            ),
-            {"embedding": embedding, "top_k": top_k},
+        embedding = get_embedding(query) if options.needs_embedding else None
+        hits = search_knowledge(
+            db,
+            embedding,
+            query,
+            supplier_id=supplier_id,
+            region=region,
+            doc_type=doc_type,
+            top_k=top_k,
+            options=options,
         )
+        return [_query_item(h) for h in hits]
 
-        rows = result.fetchall()
-        return [
-            {
-                "id": str(r.id),
-                "source": r.source,
-                "similarity": float(r.similarity),
-                "text": r.chunk_text,
-            }
-            for r in rows
-        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Knowledge query failed: {e}")
+
+
+@router.post("/query-batch", response_model=KnowledgeQueryBatchResponse)
+def query_knowledge_batch(req: KnowledgeQueryBatchRequest, db: Session = Depends(get_read_db)):
+    """
+    Many queries, one embeddings call and one SQL round trip (LATERAL search per query).
+    Results are grouped per query, in request order.
+    """
+    options = RetrievalOptions(
+        mode=req.mode,
+        vector_weight=req.vector_weight,
+        lexical_weight=req.lexical_weight,
+        prefilter=req.prefilter,
+    )
+    try:
+        embeddings = get_embeddings(req.queries) if options.needs_embedding else None
+        groups = search_knowledge_batch(
+            db,
+            embeddings,
+            req.queries,
+            supplier_id=req.supplier_id,
+            region=req.region,
+            doc_type=req.doc_type,
+            top_k=req.top_k,
+            options=options,
+        )
+        return {
+            "results": [
+                {"query": query, "items": [_query_item(h) for h in hits]}
+                for query, hits in zip(req.queries, groups)
+            ]
+        }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Knowledge query failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Knowledge batch query failed: {e}")
@@ -0,0 +1,69 @@
+import os
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.api.routes.work_items import _work_item_dict
+from app.db.loading import claim_next_escalated, lock_work_item
+from app.db.session import get_db
+
+router = APIRouter(prefix="/review-queue", tags=["review-queue"])
+
+# How long a claimed item stays reserved for its reviewer before others can claim it
+REVIEW_LEASE_SECONDS = float(os.getenv("REVIEW_LEASE_SECONDS", "600"))
+
+
+def _claim_dict(wi) -> dict:
+    return {
+        "reviewer": wi.claimed_by,
+        "expires_at": wi.claim_expires_at.isoformat(),
+        "lease_seconds": REVIEW_LEASE_SECONDS,
+    }
+
+
+@router.get("/next")
+def claim_next(
+    reviewer: str = Query(..., max_length=120),
+    region: str | None = Query(default=None, max_length=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Claims the most urgent ESCALATED work item for `reviewer` (optionally within one region).
+    Calling again before reviewing returns the same item with a renewed lease; 204 when
+    nothing is left to claim.
+    """
+    wi = claim_next_escalated(db, reviewer, REVIEW_LEASE_SECONDS, datetime.utcnow(), region=region)
+    db.commit()
+    if wi is None:
+        return Response(status_code=204)
+
+    return {"work_item": _work_item_dict(wi), "urgency": wi.urgency, "claim": _claim_dict(wi)}
+
+
+@router.delete("/{work_item_id}/claim")
+def release_claim(
+    work_item_id: str,
+    reviewer: str = Query(..., max_length=120),
+    db: Session = Depends(get_db),
+):
+    """
+    Hands a claimed item back to the queue before its lease runs out.
+    """
+    try:
+        wi_uuid = uuid.UUID(work_item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid work_item_id")
+
+    # Locked, so a concurrent review can't clear the claim between the check and the commit
+    wi = lock_work_item(db, wi_uuid)
+    if not wi:
+        raise HTTPException(status_code=404, detail="WorkItem not found")
+    if wi.claimed_by != reviewer:
+        raise HTTPException(status_code=409, detail=f"WorkItem is not claimed by {reviewer}")
+
+    wi.claimed_by = None
+    wi.claim_expires_at = None
+    db.commit()
+    return {"work_item_id": str(wi.id), "released": True}
@@ -1,18 +1,58 @@
+import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.db.loading import (
+    load_work_item,
+    load_work_item_with_history,
+    WorkItemLocked,
+    claim_work_item_for_run,
+    load_work_item_version,
+    load_agent_trace,
+    lock_review_targets,
+    lock_work_item,
+)
 from app.db.models import WorkItem
-from app.db.models import Decision
-from sqlalchemy import select
+from app.db.models import AgentResultRecord, Decision, DecisionRollup, WorkItemIdempotencyKey
+from app.core.agents import NON_VOTING_REASON_CODES
+from app.core.metrics import record_cache_lookup, record_decision, record_intake, record_run_coordination
+from app.core.intake import intake_event
 from app.core.orchestrator import orchestrate
+from app.core.recording import (
+    COMPLETED_STATUSES,
+    claimed_by_other,
+    record_orchestration,
+    record_review,
+    record_reviews,
+    review_status,
+    status_for,
+)
+from app.core.rollups import COUNTERS as ROLLUP_COUNTERS, RollupDeltas
+from app.core.response_cache import work_item_responses
+from app.core.serialization import dumps
+from app.core.single_flight import SingleFlight
 from app.core.scenarios import SCENARIOS
-from sqlalchemy import func
+from sqlalchemy import delete, func, literal, select, text
 
 router = APIRouter(prefix="/work-items", tags=["work-items"])
 
+# How long a /run waits for another worker's in-flight run of the same item before 409
+RUN_LOCK_WAIT_SECONDS = float(os.getenv("RUN_LOCK_WAIT_SECONDS", "30"))
+run_flights = SingleFlight()
+
+# Most items one POST /review-batch may review
+BULK_REVIEW_MAX_ITEMS = int(os.getenv("BULK_REVIEW_MAX_ITEMS", "500"))
+
+# Default window of GET /simulations/report (bounds created_at so old partitions are skipped)
+SIMULATION_REPORT_DAYS = int(os.getenv("SIMULATION_REPORT_DAYS", "30"))
+
 
 class ShipmentDelayEvent(BaseModel):
     shipment_id: str = Field(..., max_length=50)
@@ -39,89 +79,200 @@ class WorkItemResponse(BaseModel):
 
 
 @router.post("", response_model=WorkItemResponse)
-def create_work_item(req: WorkItemCreateRequest, db: Session = Depends(get_db)):
-    wi = WorkItem(
-        type="SHIPMENT_DELAY",
-        status="NEW",
-        payload=req.event.model_dump(),
-        context=None,
-    )
-    db.add(wi)
+def create_work_item(
+    req: WorkItemCreateRequest,
+    idempotency_key: str | None = Header(default=None, max_length=200),
+    db: Session = Depends(get_db),
+):
+    """
+    Resent notices (same Idempotency-Key, or same shipment_id + updated_eta) return the
+    existing item; a newer notice for a shipment whose item is still NEW updates that item.
+    Both answer with Idempotent-Replayed: true.
+    """
+    wi, outcome = intake_event(db, req.event.model_dump(), idempotency_key)
     db.commit()
-    db.refresh(wi)
-
-    return WorkItemResponse(
-        id=str(wi.id),
-        type=wi.type,
-        status=wi.status,
-        payload=wi.payload,
-        context=wi.context,
-    )
+    record_intake(outcome)
 
+    # payload was just validated as ShipmentDelayEvent: no need to re-validate it on the way out
+    headers = {"Idempotent-Replayed": "true"} if outcome != "created" else None
+    return ORJSONResponse(_work_item_dict(wi), headers=headers)
 
-@router.get("/{work_item_id}", response_model=WorkItemResponse)
-def get_work_item(work_item_id: str, db: Session = Depends(get_db)):
-    try:
-        wi_uuid = uuid.UUID(work_item_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid work_item_id")
 
-    wi = db.get(WorkItem, wi_uuid)
-    if not wi:
-        raise HTTPException(status_code=404, detail="WorkItem not found")
+# Hot read paths build plain dicts and serialize them directly. The pydantic response models
+# stay as the documented schema, but re-validating large, already-trusted payload/context dicts
+# on every poll is pure overhead.
+def _work_item_dict(wi: WorkItem) -> dict:
+    return {
+        "id": str(wi.id),
+        "type": wi.type,
+        "status": wi.status,
+        "payload": wi.payload,
+        "context": wi.context,
+    }
 
-    return WorkItemResponse(
-        id=str(wi.id),
-        type=wi.type,
-        status=wi.status,
-        payload=wi.payload,
-        context=wi.context,
-    )
 
-@router.post("/{work_item_id}/run")
-def run_work_item(work_item_id: str, db: Session = Depends(get_db)):
-    try:
-        wi_uuid = uuid.UUID(work_item_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid work_item_id")
+def _work_item_dict_with_trace(db: Session, wi: WorkItem) -> dict:
+    """
+    _work_item_dict for single-item reads. When the trace is not duplicated into context
+    (STORE_AGENT_TRACE_IN_CONTEXT=0) it is rebuilt from agent_results: the entries then carry
+    the reason code name and its reason_code instead of the agent's free-text reason.
+    """
+    work_item = _work_item_dict(wi)
+    if wi.context and "agent_trace" not in wi.context:
+        work_item["context"] = {**wi.context, "agent_trace": load_agent_trace(db, wi.id)}
+    return work_item
 
-    wi = db.get(WorkItem, wi_uuid)
-    if not wi:
-        raise HTTPException(status_code=404, detail="WorkItem not found")
 
-    # ---- MULTI-AGENT ORCHESTRATION ----
-    out = orchestrate(wi.payload, db)
+def _decision_dict(d: Decision) -> dict:
+    return {
+        "id": str(d.id),
+        "decision": d.decision,
+        "reason": d.reason,
+        "confidence": d.confidence,
+        "created_by": d.created_by,
+        "created_at": d.created_at.isoformat(),
+    }
 
-    decision = out["decision"]
-    reason = out["reason"]
-    confidence = float(out["confidence"])
 
-    # Store explainability trace in context
-    wi.context = out["context"]
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
 
-    # Update status
-    wi.status = "AUTO_RESOLVED" if decision == "AUTO_RESOLVE" else "ESCALATED"
 
-    # Persist decision record
-    d = Decision(
-        work_item_id=wi.id,
-        decision=decision,
-        reason=reason,
-        confidence=confidence,
+def _conditional_get(
+    kind: str,
+    wi_uuid: uuid.UUID,
+    if_none_match: str | None,
+    db: Session,
+    render: Callable[[], tuple[int, bytes] | None],
+) -> Response:
+    """
+    Polling fast path for work-item reads:
+    - version probe (no JSONB) -> 304 when the client already has this version
+    - serialized body cached per (kind, id, version) -> no load/serialize for unchanged items
+    - otherwise render() loads + serializes and returns (version, body)
+    """
+    version = load_work_item_version(db, wi_uuid)
+    if version is None:
+        raise HTTPException(status_code=404, detail="WorkItem not found")
+
+    etag = f'"{kind}-{wi_uuid}-{version}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    body = work_item_responses.get((kind, wi_uuid, version))
+    if body is None:
+        rendered = render()
+        if rendered is None:
+            raise HTTPException(status_code=404, detail="WorkItem not found")
+        # the row may have moved on since the probe: key by what was actually rendered
+        version, body = rendered
+        etag = f'"{kind}-{wi_uuid}-{version}"'
+        work_item_responses.put((kind, wi_uuid, version), body)
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
     )
 
-    db.add(d)
-    db.add(wi)
-    db.commit()
 
-    return {
-        "work_item_id": str(wi.id),
-        "new_status": wi.status,
-        "decision": decision,
-        "reason": reason,
-        "confidence": confidence,
-        "agent_summary": wi.context["final"],
+@router.get("/stats")
+def work_item_stats(
+    supplier_id: Optional[str] = None,
+    region: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: str = Query(default="none", pattern="^(none|day|supplier_id|region)$"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Dashboard stats from decision_rollups: cost depends on the number of
+    (supplier, region, day) buckets in range, not on the number of work items.
+    Defaults to the last 30 days.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+
+    bucket = {
+        "none": literal("all"),
+        "day": DecisionRollup.day,
+        "supplier_id": DecisionRollup.supplier_id,
+        "region": DecisionRollup.region,
+    }[group_by]
+
+    stmt = (
+        select(
+            bucket.label("bucket"),
+            *[func.coalesce(func.sum(getattr(DecisionRollup, c)), 0).label(c) for c in ROLLUP_COUNTERS],
+        )
+        .where(DecisionRollup.day >= start, DecisionRollup.day <= end)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    if supplier_id is not None:
+        stmt = stmt.where(DecisionRollup.supplier_id == supplier_id)
+    if region is not None:
+        stmt = stmt.where(DecisionRollup.region == region)
+
+    def _summary(r) -> dict:
+        orchestrated = r.orchestrated or 0
+        reviewed = (r.human_approved or 0) + (r.human_rejected or 0)
+        return {
+            "orchestrated": orchestrated,
+            "auto_resolved": r.auto_resolved,
+            "escalated": r.escalated,
+            "overrides": r.overrides,
+            "auto_resolve_rate": round(r.auto_resolved / orchestrated, 3) if orchestrated else 0.0,
+            "escalation_rate": round(r.escalated / orchestrated, 3) if orchestrated else 0.0,
+            "avg_confidence": round(r.confidence_sum / orchestrated, 3) if orchestrated else None,
+            "human_approved": r.human_approved,
+            "human_rejected": r.human_rejected,
+            "human_approval_rate": round(r.human_approved / reviewed, 3) if reviewed else None,
+        }
+
+    rows = db.execute(stmt).all()
+
+    out = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "supplier_id": supplier_id,
+        "region": region,
     }
+    if group_by == "none":
+        out.update(_summary(rows[0]) if rows else _summary(_EMPTY_STATS))
+    else:
+        out["group_by"] = group_by
+        out["buckets"] = [
+            {group_by: r.bucket.isoformat() if group_by == "day" else r.bucket, **_summary(r)}
+            for r in rows
+        ]
+    return out
+
+
+_EMPTY_STATS = SimpleNamespace(**dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+
+@router.get("/{work_item_id}", response_model=WorkItemResponse)
+def get_work_item(
+    work_item_id: str,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        wi_uuid = uuid.UUID(work_item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid work_item_id")
+
+    def render():
+        wi = load_work_item(db, wi_uuid)
+        if not wi:
+            return None
+        return wi.version, dumps(_work_item_dict_with_trace(db, wi))
+
+    return _conditional_get("item", wi_uuid, if_none_match, db, render)
 
 class HumanReviewRequest(BaseModel):
     action: str = Field(..., pattern="^(APPROVE|REJECT)$")
@@ -135,34 +286,110 @@ def review_work_item(work_item_id: str, req: HumanReviewRequest, db: Session = D
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid work_item_id")
 
-    wi = db.get(WorkItem, wi_uuid)
+    # Locked, so a concurrent claim or bulk review can't change it between the checks and the commit
+    wi = lock_work_item(db, wi_uuid)
     if not wi:
         raise HTTPException(status_code=404, detail="WorkItem not found")
 
     if wi.status != "ESCALATED":
         raise HTTPException(status_code=400, detail=f"WorkItem status must be ESCALATED, got {wi.status}")
 
-    final_status = "HUMAN_APPROVED" if req.action == "APPROVE" else "HUMAN_REJECTED"
-    wi.status = final_status
-
-    d = Decision(
-        work_item_id=wi.id,
-        decision=req.action,
-        reason=req.comment,
-        confidence=1.0,
-        created_by=req.reviewer,
-    )
+    if claimed_by_other(wi, req.reviewer, datetime.utcnow()):
+        raise HTTPException(status_code=409, detail=f"WorkItem is claimed by {wi.claimed_by}")
 
-    db.add(d)
-    db.add(wi)
+    record_review(db, wi, req.action, req.reviewer, req.comment)
     db.commit()
 
+    record_decision(req.action, source="human")
+
     return {
         "work_item_id": str(wi.id),
         "final_status": wi.status,
         "reviewer": req.reviewer
     }
 
+class BulkReviewFilter(BaseModel):
+    supplier_id: str | None = Field(default=None, max_length=50)
+    region: str | None = Field(default=None, max_length=50)
+
+
+class BulkReviewRequest(BaseModel):
+    action: str = Field(..., pattern="^(APPROVE|REJECT)$")
+    reviewer: str = Field(..., max_length=120)
+    comment: str = Field(..., max_length=500)
+    work_item_ids: list[str] | None = Field(default=None, max_length=BULK_REVIEW_MAX_ITEMS)
+    filter: BulkReviewFilter | None = None
+
+
+@router.post("/review-batch")
+def review_work_items(req: BulkReviewRequest, db: Session = Depends(get_db)):
+    """
+    Applies one APPROVE/REJECT to many escalations, e.g. everything from a supplier during a
+    port closure: either the listed work_item_ids, or up to BULK_REVIEW_MAX_ITEMS ESCALATED
+    items matching `filter` (most urgent first). One query loads and locks the targets, then
+    status updates, Decision rows and rollups are written set-based in one transaction.
+
+    Items that can't be reviewed are skipped and reported, per item, with an outcome:
+    REVIEWED, INVALID_ID, NOT_FOUND, NOT_ESCALATED or CLAIMED (another reviewer's live
+    review-queue lease).
+    """
+    if (req.work_item_ids is None) == (req.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either work_item_ids or filter")
+    if req.filter is not None and req.filter.supplier_id is None and req.filter.region is None:
+        raise HTTPException(status_code=400, detail="filter needs supplier_id and/or region")
+
+    now = datetime.utcnow()
+    if req.work_item_ids is not None:
+        requested: list[tuple[str, uuid.UUID | None]] = []
+        seen = set()
+        for raw in req.work_item_ids:
+            try:
+                wi_uuid = uuid.UUID(raw)
+            except ValueError:
+                wi_uuid = None
+            if wi_uuid is None or wi_uuid not in seen:
+                seen.add(wi_uuid)
+                requested.append((raw, wi_uuid))
+        rows = {r.id: r for r in lock_review_targets(db, [u for _, u in requested if u is not None])}
+    else:
+        locked = lock_review_targets(
+            db, supplier_id=req.filter.supplier_id, region=req.filter.region, limit=BULK_REVIEW_MAX_ITEMS
+        )
+        rows = {r.id: r for r in locked}
+        requested = [(str(r.id), r.id) for r in locked]
+
+    targets = []
+    items = []
+    for raw, wi_uuid in requested:
+        row = rows.get(wi_uuid)
+        if wi_uuid is None:
+            items.append({"work_item_id": raw, "outcome": "INVALID_ID"})
+        elif row is None:
+            items.append({"work_item_id": raw, "outcome": "NOT_FOUND"})
+        elif row.status != "ESCALATED":
+            items.append({"work_item_id": raw, "outcome": "NOT_ESCALATED", "status": row.status})
+        elif claimed_by_other(row, req.reviewer, now):
+            items.append({"work_item_id": raw, "outcome": "CLAIMED", "claimed_by": row.claimed_by})
+        else:
+            targets.append(row)
+            items.append({"work_item_id": raw, "outcome": "REVIEWED"})
+
+    record_reviews(db, targets, req.action, req.reviewer, req.comment, now)
+    db.commit()
+
+    if targets:
+        record_decision(req.action, source="human", count=len(targets))
+
+    return {
+        "action": req.action,
+        "reviewer": req.reviewer,
+        "final_status": review_status(req.action),
+        "reviewed": len(targets),
+        "skipped": len(items) - len(targets),
+        "items": items,
+    }
+
+
 class DecisionResponse(BaseModel):
     id: str
     decision: str
@@ -178,74 +405,69 @@ class WorkItemTraceResponse(BaseModel):
 
 
 @router.get("/{work_item_id}/trace", response_model=WorkItemTraceResponse)
-def get_work_item_trace(work_item_id: str, db: Session = Depends(get_db)):
+def get_work_item_trace(
+    work_item_id: str,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_read_db),
+):
     try:
         wi_uuid = uuid.UUID(work_item_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid work_item_id")
 
-    wi = db.get(WorkItem, wi_uuid)
-    if not wi:
-        raise HTTPException(status_code=404, detail="WorkItem not found")
-
-    # pull decisions ordered oldest->newest
-    decisions = (
-        db.execute(
-            select(Decision).where(Decision.work_item_id == wi.id).order_by(Decision.created_at.asc())
+    def render():
+        # work item + decisions ordered oldest->newest, one round trip
+        wi = load_work_item_with_history(db, wi_uuid)
+        if not wi:
+            return None
+        return wi.version, dumps(
+            {
+                "work_item": _work_item_dict_with_trace(db, wi),
+                "decisions": [_decision_dict(d) for d in wi.decisions],
+            }
         )
-        .scalars()
-        .all()
-    )
 
-    return WorkItemTraceResponse(
-        work_item=WorkItemResponse(
-            id=str(wi.id),
-            type=wi.type,
-            status=wi.status,
-            payload=wi.payload,
-            context=wi.context,
-        ),
-        decisions=[
-            DecisionResponse(
-                id=str(d.id),
-                decision=d.decision,
-                reason=d.reason,
-                confidence=d.confidence,
-                created_by=getattr(d, "created_by", None),
-                created_at=d.created_at.isoformat(),
-            )
-            for d in decisions
-        ],
-    )
+    return _conditional_get("trace", wi_uuid, if_none_match, db, render)
+
 
 @router.post("/{work_item_id}/run")
 def run_work_item(work_item_id: str, db: Session = Depends(get_db)):
+    """
+    Single-flight: a work item is orchestrated at most once. Concurrent calls in this worker
+    share the in-flight run; calls from other workers wait on the row lock and then get the
+    stored decision. Completed items are served from the stored decision.
+    """
     try:
         wi_uuid = uuid.UUID(work_item_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid work_item_id")
 
-    wi = db.get(WorkItem, wi_uuid)
+    result, shared = run_flights.do(wi_uuid, lambda: _run_once(db, wi_uuid))
+    if shared:
+        record_run_coordination("shared")
+        return {**result, "idempotent": True}
+    return result
+
+
+def _run_once(db: Session, wi_uuid: uuid.UUID) -> dict:
+    try:
+        # one statement when uncontended: row (locked) + latest decision
+        wi, last_decision = claim_work_item_for_run(db, wi_uuid, RUN_LOCK_WAIT_SECONDS)
+    except WorkItemLocked:
+        record_run_coordination("conflict")
+        raise HTTPException(
+            status_code=409,
+            detail="Work item run already in progress",
+            headers={"Retry-After": str(max(1, int(RUN_LOCK_WAIT_SECONDS)))},
+        )
     if not wi:
         raise HTTPException(status_code=404, detail="WorkItem not found")
 
-    # --- IDPOTENCY GUARD ---
-    if wi.status in {
-        "AUTO_RESOLVED",
-        "ESCALATED",
-        "HUMAN_APPROVED",
-        "HUMAN_REJECTED",
-    }:
-        # fetch latest decision
-        last_decision = (
-            db.execute(
-                select(Decision)
-                .where(Decision.work_item_id == wi.id)
-                .order_by(Decision.created_at.desc())
-            )
-            .scalars()
-            .first()
-        )
+    # --- IDEMPOTENCY GUARD ---
+    if wi.status in COMPLETED_STATUSES:
+        db.rollback()  # release the row lock
+        record_cache_lookup("decision", True)
+        record_run_coordination("stored")
 
         return {
             "work_item_id": str(wi.id),
@@ -258,24 +480,17 @@ def run_work_item(work_item_id: str, db: Session = Depends(get_db)):
         }
 
     # ---- MULTI-AGENT ORCHESTRATION ----
+    # The row lock is held until commit: other workers' runs for this item wait, then see it done
+    record_cache_lookup("decision", False)
+    record_run_coordination("computed")
     out = orchestrate(wi.payload, db)
 
     decision = out["decision"]
     reason = out["reason"]
     confidence = float(out["confidence"])
 
-    wi.context = out["context"]
-    wi.status = "AUTO_RESOLVED" if decision == "AUTO_RESOLVE" else "ESCALATED"
-
-    d = Decision(
-        work_item_id=wi.id,
-        decision=decision,
-        reason=reason,
-        confidence=confidence,
-    )
-
-    db.add(d)
-    db.add(wi)
+    # Store explainability trace, status, decision record and per-agent rows (one transaction)
+    record_orchestration(db, wi, out)
     db.commit()
 
     return {
@@ -287,79 +502,68 @@ def run_work_item(work_item_id: str, db: Session = Depends(get_db)):
         "agent_summary": wi.context["final"],
         "idempotent": False,
     }
+
+@router.get("/analytics/agent-disagreement")
+def agent_disagreement(
+    agent: str = "CostAgent",
+    against: str = "LlmDecisionAgent",
+    group_by: str = Query(default="region", pattern="^(region|supplier_id)$"),
+    db: Session = Depends(get_read_db),
+):
     """
-    Runs a fixed scenario set through the orchestrator and stores results.
-    Returns business metrics to tell a strong story in interviews.
+    How often `agent` disagrees with `against` on the same run, per region or supplier.
+    Index-backed on agent_results; placeholder entries (e.g. LLM disabled) are not counted.
     """
-    results = []
-    auto_resolved = 0
-    escalated = 0
-
-    for ev in SCENARIOS:
-        out = orchestrate(ev, db)
-
-        decision = out["decision"]
-        status = "AUTO_RESOLVED" if decision == "AUTO_RESOLVE" else "ESCALATED"
-        if status == "AUTO_RESOLVED":
-            auto_resolved += 1
-        else:
-            escalated += 1
-
-        wi = WorkItem(
-            type="SHIPMENT_DELAY",
-            status=status,
-            payload=ev,
-            context=out["context"],
-        )
-        db.add(wi)
-        db.flush()  # get wi.id without committing yet
-
-        d = Decision(
-            work_item_id=wi.id,
-            decision=decision,
-            reason=out["reason"],
-            confidence=float(out["confidence"]),
-        )
-        db.add(d)
+    rows = db.execute(
+        text(
+            f"""
+            SELECT a.{group_by} AS bucket,
+                   count(*) AS compared,
+                   count(*) FILTER (WHERE a.recommendation <> b.recommendation) AS disagreements
+            FROM agent_results a
+            JOIN agent_results b
+              ON b.decision_id = a.decision_id
+             AND b.agent = :against
+            WHERE a.agent = :agent
+              AND NOT (b.reason_code = ANY(:non_voting))
+              AND NOT (a.reason_code = ANY(:non_voting))
+            GROUP BY a.{group_by}
+            ORDER BY disagreements DESC
+            """
+        ),
+        {"agent": agent, "against": against, "non_voting": [int(c) for c in NON_VOTING_REASON_CODES]},
+    ).all()
 
-        results.append(
+    return {
+        "agent": agent,
+        "against": against,
+        "group_by": group_by,
+        "buckets": [
             {
-                "work_item_id": str(wi.id),
-                "shipment_id": ev["shipment_id"],
-                "status": status,
-                "decision": decision,
-                "confidence": out["confidence"],
-                "votes_escalate": out["context"]["final"].get("weighted_escalate_score"),
+                group_by: r.bucket,
+                "compared": r.compared,
+                "disagreements": r.disagreements,
+                "disagreement_rate": round(r.disagreements / r.compared, 3) if r.compared else 0.0,
             }
-        )
-
-    db.commit()
-
-    total = len(SCENARIOS)
-    auto_rate = round(auto_resolved / total, 3)
-    esc_rate = round(escalated / total, 3)
-
-    # Simple business impact story (conservative assumptions)
-    # Assumption: each escalated case takes 15 min of analyst time.
-    # Auto-resolve saves that time. Convert to hours.
-    minutes_saved = auto_resolved * 15
-    hours_saved = round(minutes_saved / 60.0, 2)
-
-    return {
-        "total": total,
-        "auto_resolved": auto_resolved,
-        "escalated": escalated,
-        "auto_resolve_rate": auto_rate,
-        "escalation_rate": esc_rate,
-        "estimated_hours_saved_per_run": hours_saved,
-        "items": results,
+            for r in rows
+        ],
     }
 
+
 @router.get("/simulations/report")
-def simulations_report(db: Session = Depends(get_db)):
+def simulations_report(
+    days: int = Query(default=SIMULATION_REPORT_DAYS, ge=1, le=3660),
+    db: Session = Depends(get_read_db),
+):
     # Only simulation items: shipment_id starts with "SIM-"
     # We stored overrides in context.final.override when applicable.
-    items = db.query(WorkItem).filter(WorkItem.payload["shipment_id"].astext.like("SIM-%")).all()
+    # The created_at window lets Postgres skip all but the recent work_items partitions.
+    since = datetime.utcnow() - timedelta(days=days)
+    items = (
+        db.query(WorkItem)
+        .filter(WorkItem.created_at >= since, WorkItem.payload["shipment_id"].astext.like("SIM-%"))
+        .all()
+    )
 
     total = len(items)
     if total == 0:
@@ -390,18 +594,41 @@ def simulations_report(db: Session = Depends(get_db)):
 
 @router.delete("/simulations/reset")
 def simulations_reset(db: Session = Depends(get_db)):
-    sim_items = db.query(WorkItem).filter(WorkItem.payload["shipment_id"].astext.like("SIM-%")).all()
+    sim_items = db.execute(
+        select(WorkItem.id, WorkItem.created_at, WorkItem.payload).where(
+            WorkItem.payload["shipment_id"].astext.like("SIM-%")
+        )
+    ).all()
 
     deleted_work_items = 0
     deleted_decisions = 0
 
-    for wi in sim_items:
-        deleted_decisions += (
-            db.query(Decision).filter(Decision.work_item_id == wi.id).delete()
-        )
-        db.delete(wi)
-        deleted_work_items += 1
-
+    if sim_items:
+        # No foreign keys into the partitioned tables: dependent rows are deleted explicitly
+        ids = [r.id for r in sim_items]
+        oldest = min(r.created_at for r in sim_items)
+        payloads = {r.id: r.payload for r in sim_items}
+        decisions = db.execute(
+            delete(Decision)
+            .where(Decision.work_item_id.in_(ids))
+            .returning(
+                Decision.work_item_id, Decision.decision, Decision.reason, Decision.confidence, Decision.created_at
+            )
+        ).all()
+        deleted_decisions = len(decisions)
+        db.execute(delete(AgentResultRecord).where(AgentResultRecord.work_item_id.in_(ids)))
+        db.execute(delete(WorkItemIdempotencyKey).where(WorkItemIdempotencyKey.work_item_id.in_(ids)))
+        deleted_work_items = db.execute(
+            delete(WorkItem).where(WorkItem.id.in_(ids), WorkItem.created_at >= oldest)
+        ).rowcount
+
+        # Take the deleted decisions back out of their rollup rows: cost follows the number of
+        # simulation decisions, not the history of the days they fall on
+        rollups = RollupDeltas()
+        for d in decisions:
+            payload = payloads[d.work_item_id]
+            rollups.remove_decision(payload, d.decision, d.reason, d.confidence, d.created_at.date())
+        rollups.flush(db)
     db.commit()
     return {
         "deleted_work_items": deleted_work_items,
@@ -417,34 +644,21 @@ def simulate(db: Session = Depends(get_db)):
     results = []
     auto_resolved = 0
     escalated = 0
+    rollups = RollupDeltas()
 
     for ev in SCENARIOS:
         out = orchestrate(ev, db)
 
         decision = out["decision"]
-        status = "AUTO_RESOLVED" if decision == "AUTO_RESOLVE" else "ESCALATED"
+        status = status_for(decision)
 
         if status == "AUTO_RESOLVED":
             auto_resolved += 1
         else:
             escalated += 1
 
-        wi = WorkItem(
-            type="SHIPMENT_DELAY",
-            status=status,
-            payload=ev,
-            context=out["context"],
-        )
-        db.add(wi)
-        db.flush()
-
-        d = Decision(
-            work_item_id=wi.id,
-            decision=decision,
-            reason=out["reason"],
-            confidence=float(out["confidence"]),
-        )
-        db.add(d)
+        wi = WorkItem(type="SHIPMENT_DELAY", payload=ev)
+        record_orchestration(db, wi, out, rollups)
 
         results.append(
             {
@@ -458,6 +672,7 @@ def simulate(db: Session = Depends(get_db)):
             }
         )
 
+    rollups.flush(db)
     db.commit()
 
     total = len(SCENARIOS)
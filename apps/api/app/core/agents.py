@@ -1,13 +1,55 @@
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Protocol
 
+from app.core.policy import AGENT_THRESHOLDS
 
-@dataclass
+
+class ReasonCode(IntEnum):
+    """
+    Small-int encoding of agent reasons for the agent_results table.
+    Values are persisted: append new codes, never renumber.
+    """
+
+    UNSPECIFIED = 0
+
+    RISK_LOW = 10
+    RISK_DELAY = 11
+    RISK_LOW_INVENTORY = 12
+    RISK_DELAY_AND_LOW_INVENTORY = 13
+
+    COST_NORMAL = 20
+    COST_MEDIUM_HIGH = 21
+    COST_HIGH = 22
+
+    SLA_WITHIN_BUFFER = 30
+    SLA_DELAY_EXCEEDS_BUFFER = 31
+    SLA_PRIORITY = 32
+
+    LLM_DECISION = 40
+    LLM_DISABLED = 41
+    LLM_FAILED = 42
+    LLM_PARSE_FAILED = 43
+    LLM_SKIPPED = 44
+    LLM_CIRCUIT_OPEN = 45
+
+
+# Trace entries with these codes are placeholders, not votes
+NON_VOTING_REASON_CODES = {ReasonCode.LLM_DISABLED, ReasonCode.LLM_SKIPPED, ReasonCode.LLM_CIRCUIT_OPEN}
+
+
+@dataclass(slots=True)
 class AgentResult:
+    """
+    One agent's vote. Slotted: the orchestrator allocates one per agent per event.
+    """
+
     name: str
     score: float  # 0.0 to 1.0
     recommendation: str  # "AUTO_RESOLVE" or "ESCALATE"
     reason: str
+    reason_code: int = ReasonCode.UNSPECIFIED
+    prompt_version: str | None = None  # LLM agent only
 
 
 class Agent(Protocol):
@@ -17,50 +59,80 @@ class Agent(Protocol):
         ...
 
 
-class RiskAgent:
+class ThresholdAgent:
+    """
+    Base for the deterministic agents: thresholds come from AGENT_THRESHOLDS unless a
+    replay passes a candidate set.
+    """
+
+    def __init__(self, thresholds: dict | None = None):
+        self.thresholds = thresholds or AGENT_THRESHOLDS
+
+
+class RiskAgent(ThresholdAgent):
     name = "RiskAgent"
 
     def evaluate(self, event: dict) -> AgentResult:
+        t = self.thresholds
         delay_days = int(event.get("delay_days", 0))
         inventory_days = int(event.get("inventory_days_of_supply", 0))
 
         # simple risk heuristic
         score = 0.0
         reasons = []
+        delayed = low_inventory = False
 
-        if delay_days >= 3:
+        if delay_days >= t["RISK_HIGH_DELAY_DAYS"]:
             score += 0.5
             reasons.append(f"delay_days={delay_days} (high)")
-        elif delay_days == 2:
+            delayed = True
+        elif delay_days >= t["RISK_MODERATE_DELAY_DAYS"]:
             score += 0.25
             reasons.append(f"delay_days={delay_days} (moderate)")
+            delayed = True
 
-        if inventory_days < 7:
+        if inventory_days < t["RISK_LOW_INVENTORY_DAYS"]:
             score += 0.6
             reasons.append(f"inventory_days={inventory_days} (low)")
+            low_inventory = True
 
         score = min(score, 1.0)
 
-        rec = "ESCALATE" if score >= 0.6 else "AUTO_RESOLVE"
+        rec = "ESCALATE" if score >= t["RISK_ESCALATE_SCORE"] else "AUTO_RESOLVE"
         reason = " | ".join(reasons) if reasons else "Low operational risk"
-        return AgentResult(self.name, score, rec, reason)
-
-
-class CostAgent:
+        if delayed and low_inventory:
+            code = ReasonCode.RISK_DELAY_AND_LOW_INVENTORY
+        elif low_inventory:
+            code = ReasonCode.RISK_LOW_INVENTORY
+        elif delayed:
+            code = ReasonCode.RISK_DELAY
+        else:
+            code = ReasonCode.RISK_LOW
+        return AgentResult(self.name, score, rec, reason, code)
+
+
+class CostAgent(ThresholdAgent):
     name = "CostAgent"
 
     def evaluate(self, event: dict) -> AgentResult:
+        t = self.thresholds
         order_value = float(event.get("order_value", 0.0))
 
         # high value orders should lean escalation
-        if order_value >= 100000:
-            return AgentResult(self.name, 0.9, "ESCALATE", f"order_value={order_value} (high)")
-        if order_value >= 50000:
-            return AgentResult(self.name, 0.6, "ESCALATE", f"order_value={order_value} (medium-high)")
-        return AgentResult(self.name, 0.2, "AUTO_RESOLVE", f"order_value={order_value} (normal)")
-
-
-class SlaAgent:
+        if order_value >= t["COST_HIGH_ORDER_VALUE"]:
+            return AgentResult(
+                self.name, 0.9, "ESCALATE", f"order_value={order_value} (high)", ReasonCode.COST_HIGH
+            )
+        if order_value >= t["COST_MEDIUM_HIGH_ORDER_VALUE"]:
+            return AgentResult(
+                self.name, 0.6, "ESCALATE", f"order_value={order_value} (medium-high)", ReasonCode.COST_MEDIUM_HIGH
+            )
+        return AgentResult(
+            self.name, 0.2, "AUTO_RESOLVE", f"order_value={order_value} (normal)", ReasonCode.COST_NORMAL
+        )
+
+
+class SlaAgent(ThresholdAgent):
     name = "SlaAgent"
 
     def evaluate(self, event: dict) -> AgentResult:
@@ -68,7 +140,13 @@ class SlaAgent:
         priority_flag = bool(event.get("priority_flag", False))
 
         if priority_flag:
-            return AgentResult(self.name, 0.95, "ESCALATE", "priority_flag=true")
-        if delay_days > 2:
-            return AgentResult(self.name, 0.85, "ESCALATE", f"delay_days={delay_days} exceeds SLA buffer")
-        return AgentResult(self.name, 0.25, "AUTO_RESOLVE", "Within SLA buffer")
\ No newline at end of file
+            return AgentResult(self.name, 0.95, "ESCALATE", "priority_flag=true", ReasonCode.SLA_PRIORITY)
+        if delay_days > self.thresholds["SLA_BUFFER_DAYS"]:
+            return AgentResult(
+                self.name,
+                0.85,
+                "ESCALATE",
+                f"delay_days={delay_days} exceeds SLA buffer",
+                ReasonCode.SLA_DELAY_EXCEEDS_BUFFER,
+            )
+        return AgentResult(self.name, 0.25, "AUTO_RESOLVE", "Within SLA buffer", ReasonCode.SLA_WITHIN_BUFFER)
\ No newline at end of file
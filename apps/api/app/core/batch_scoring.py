@@ -0,0 +1,343 @@
+"""
+Offline batch scoring: shipment delay events from files -> decisions, without the web tier.
+
+    python -m app.core.batch_scoring events.csv more.ndjson [--format csv|ndjson|parquet]
+        [--workers 4] [--chunk-size 500] [--llm off|online|batch]
+        [--output decisions.ndjson | --to-db] [--rejects rejects.ndjson]
+
+    cat events.ndjson | python -m app.core.batch_scoring - --llm off > decisions.ndjson
+
+- Input: CSV (header row), NDJSON or Parquet (needs pyarrow: pip install ".[parquet]"), or
+  stdin ("-", NDJSON unless --format says otherwise). Files are streamed, never loaded whole.
+- Every event is validated with ShipmentDelayEvent, the same model the API uses. Invalid
+  ones are counted and written to --rejects (with the reason) instead of stopping the run.
+- Chunks of --chunk-size events are scored by orchestrate() in a pool of --workers
+  processes (0 = in this process). At most 2 chunks per worker are in flight, so memory
+  stays bounded however large the input.
+- --llm off: deterministic agents only. online: the LLM agent is called per event, as /run
+  does. batch: the planner's LLM calls for a chunk go out as one batch job (orchestrate_batch).
+- Output: NDJSON lines (default stdout), or --to-db: rows COPY'd into batch_scores under a
+  fresh run_id. Scores are not work items and never enter the review queue.
+
+A summary (counts, decisions, events/sec) is printed to stderr at the end.
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import sys
+import uuid
+from collections import Counter, deque
+from datetime import date, datetime
+from itertools import islice
+from time import perf_counter
+from typing import IO, Iterable, Iterator
+
+from pydantic import ValidationError
+
+from app.api.routes.work_items import ShipmentDelayEvent
+from app.core.serialization import dumps, dumps_str, loads
+
+BATCH_SCORING_CHUNK_SIZE = int(os.getenv("BATCH_SCORING_CHUNK_SIZE", "500"))
+LLM_MODES = ("off", "online", "batch")
+FORMATS = ("csv", "ndjson", "parquet")
+
+_COPY_COLUMNS = (
+    "run_id",
+    "shipment_id",
+    "supplier_id",
+    "region",
+    "decision",
+    "confidence",
+    "reason",
+    "payload",
+    "context",
+    "created_at",
+)
+
+# Set per worker process by _init_worker
+_llm_mode = "off"
+
+
+# =============================
+# INPUT
+# =============================
+def detect_format(path: str) -> str:
+    name = path.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".parquet"):
+        return "parquet"
+    return "ndjson"
+
+
+def _read_csv(f: IO[str]) -> Iterator[dict]:
+    yield from csv.DictReader(f)
+
+
+def _read_ndjson(f: IO[bytes]) -> Iterator[dict]:
+    for line in f:
+        if line.strip():
+            yield loads(line)
+
+
+def _read_parquet(path: str) -> Iterator[dict]:
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError:  # pragma: no cover
+        raise SystemExit('Parquet input needs pyarrow: pip install ".[parquet]"')
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=BATCH_SCORING_CHUNK_SIZE):
+        for record in batch.to_pylist():
+            # date32/timestamp ETA columns arrive as date objects; the event model wants strings
+            yield {k: v.isoformat() if isinstance(v, (date, datetime)) else v for k, v in record.items()}
+
+
+def read_records(path: str, fmt: str | None = None) -> Iterator[dict]:
+    fmt = fmt or ("ndjson" if path == "-" else detect_format(path))
+    if fmt == "parquet":
+        if path == "-":
+            raise SystemExit("Parquet can't be read from stdin; pass a file path")
+        yield from _read_parquet(path)
+    elif fmt == "csv":
+        if path == "-":
+            yield from _read_csv(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline=""))
+        else:
+            with open(path, encoding="utf-8", newline="") as f:
+                yield from _read_csv(f)
+    else:
+        if path == "-":
+            yield from _read_ndjson(sys.stdin.buffer)
+        else:
+            with open(path, "rb") as f:
+                yield from _read_ndjson(f)
+
+
+def validate(records: Iterable[tuple[str, dict]], rejects: "RejectLog") -> Iterator[dict]:
+    for location, raw in records:
+        try:
+            yield ShipmentDelayEvent.model_validate(raw).model_dump()
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(p) for p in first["loc"]) or "event"
+            rejects.add(location, raw, f"{field}: {first['msg']}")
+
+
+def _located(paths: list[str], fmt: str | None) -> Iterator[tuple[str, dict]]:
+    for path in paths:
+        for n, record in enumerate(read_records(path, fmt), 1):
+            yield f"{path}:{n}", record
+
+
+def _chunks(events: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(events)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+# =============================
+# SCORING
+# =============================
+def _init_worker(llm_mode: str) -> None:
+    global _llm_mode
+    _llm_mode = llm_mode
+    if llm_mode == "off":
+        os.environ["DISABLE_LLM"] = "1"
+
+
+def score_chunk(events: list[dict]) -> list[dict]:
+    from app.core.orchestrator import orchestrate, orchestrate_batch
+    from app.db.session import SessionLocal
+
+    # The session is only used by the LLM agent (knowledge retrieval)
+    with SessionLocal() as db:
+        if _llm_mode == "batch":
+            outputs = orchestrate_batch(events, db)
+        else:
+            outputs = [orchestrate(event, db) for event in events]
+
+    return [
+        {
+            "shipment_id": event["shipment_id"],
+            "supplier_id": event["supplier_id"],
+            "region": event["region"],
+            "decision": out["decision"],
+            "confidence": out["confidence"],
+            "reason": out["reason"],
+            "payload": event,
+            "context": out["context"],
+        }
+        for event, out in zip(events, outputs)
+    ]
+
+
+def score_stream(chunks: Iterable[list[dict]], workers: int, llm_mode: str) -> Iterator[dict]:
+    """
+    Scored rows in input order. workers=0 scores in this process.
+    """
+    if workers <= 0:
+        _init_worker(llm_mode)
+        for chunk in chunks:
+            yield from score_chunk(chunk)
+        return
+
+    # spawn: workers build their own engine/pools instead of inheriting forked sockets
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(llm_mode,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(score_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+# =============================
+# OUTPUT
+# =============================
+class RejectLog:
+    def __init__(self, f: IO[bytes] | None = None):
+        self.f = f
+        self.count = 0
+
+    def add(self, location: str, raw: dict, error: str) -> None:
+        self.count += 1
+        if self.f is not None:
+            self.f.write(dumps({"location": location, "error": error, "record": raw}) + b"\n")
+
+
+class NdjsonSink:
+    def __init__(self, f: IO[bytes]):
+        self.f = f
+
+    def write(self, row: dict) -> None:
+        self.f.write(dumps(row) + b"\n")
+
+    def close(self, ok: bool = True) -> None:
+        self.f.flush()
+
+
+class CopySink:
+    """
+    Streams rows into batch_scores over one COPY, committed when the run completes.
+    """
+
+    def __init__(self, run_id: uuid.UUID):
+        from app.db.session import engine
+
+        self.run_id = run_id
+        # Pooled DBAPI connection: COPY is driver API, and the commit must reach the driver too
+        self.conn = engine.raw_connection()
+        cursor = self.conn.driver_connection.cursor()
+        self._copy_cm = cursor.copy(f"COPY batch_scores ({', '.join(_COPY_COLUMNS)}) FROM STDIN")
+        self.copy = self._copy_cm.__enter__()
+
+    def write(self, row: dict) -> None:
+        self.copy.write_row(
+            (
+                self.run_id,
+                row["shipment_id"],
+                row["supplier_id"],
+                row["region"],
+                row["decision"],
+                row["confidence"],
+                row["reason"],
+                dumps_str(row["payload"]),
+                dumps_str(row["context"]),
+                datetime.utcnow(),
+            )
+        )
+
+    def close(self, ok: bool = True) -> None:
+        try:
+            if ok:
+                self._copy_cm.__exit__(None, None, None)
+                self.conn.commit()
+            else:
+                self._copy_cm.__exit__(RuntimeError, RuntimeError("aborted"), None)
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+
+
+def run(
+    paths: list[str],
+    sink,
+    *,
+    fmt: str | None = None,
+    workers: int = 0,
+    chunk_size: int = BATCH_SCORING_CHUNK_SIZE,
+    llm_mode: str = "off",
+    rejects: RejectLog | None = None,
+) -> dict:
+    if llm_mode not in LLM_MODES:
+        raise ValueError(f"llm_mode must be one of {list(LLM_MODES)}")
+    rejects = rejects or RejectLog()
+    decisions = Counter()
+
+    t0 = perf_counter()
+    events = validate(_located(paths, fmt), rejects)
+    ok = False
+    try:
+        for row in score_stream(_chunks(events, chunk_size), workers, llm_mode):
+            sink.write(row)
+            decisions[row["decision"]] += 1
+        ok = True
+    finally:
+        # A failed --to-db run leaves nothing behind
+        sink.close(ok)
+    elapsed = perf_counter() - t0
+
+    scored = sum(decisions.values())
+    return {
+        "scored": scored,
+        "rejected": rejects.count,
+        "decisions": dict(decisions),
+        "llm_mode": llm_mode,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(scored / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score shipment delay events offline.")
+    parser.add_argument("inputs", nargs="+", help='CSV / NDJSON / Parquet files, or "-" for stdin')
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="0 = score in-process")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_SCORING_CHUNK_SIZE)
+    parser.add_argument("--llm", choices=LLM_MODES, default="off")
+    out = parser.add_mutually_exclusive_group()
+    out.add_argument("--output", default="-", help='NDJSON decisions file (default "-": stdout)')
+    out.add_argument("--to-db", action="store_true", help="COPY decisions into batch_scores")
+    parser.add_argument("--rejects", help="NDJSON file for events that failed validation")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4()
+    output_file = None
+    if args.to_db:
+        sink = CopySink(run_id)
+    else:
+        output_file = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        sink = NdjsonSink(output_file)
+    rejects_file = open(args.rejects, "wb") if args.rejects else None
+
+    try:
+        summary = run(
+            args.inputs,
+            sink,
+            fmt=args.format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            llm_mode=args.llm,
+            rejects=RejectLog(rejects_file),
+        )
+    finally:
+        for f in (output_file, rejects_file):
+            if f is not None and f is not sys.stdout.buffer:
+                f.close()
+
+    if args.to_db:
+        summary["run_id"] = str(run_id)
+    print(dumps_str(summary), file=sys.stderr)
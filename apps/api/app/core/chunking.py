@@ -0,0 +1,208 @@
+"""
+Streaming document chunker for knowledge ingestion (SLA/SOP files).
+
+Input is an iterator of text lines, so a document is never held in memory as a whole;
+only the current chunk (plus the overlap carried into the next one) is buffered.
+
+- text:      paragraphs (blank-line separated) are packed into chunks of ~size characters
+- markdown:  same, and with split_on_headings a heading always starts a new chunk; every
+             chunk is prefixed with its heading path ("Penalties > Late delivery") so a
+             chunk retrieved on its own still says which section it came from
+- csv:       rows are packed into chunks, each repeating the header row
+
+overlap: up to that many characters of whole trailing units (paragraphs/rows) are repeated
+at the start of the next chunk within the same section, as far as the next unit leaves room:
+chunks never exceed size. A single unit longer than size is split on character boundaries.
+"""
+import codecs
+import csv
+import io
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+KNOWLEDGE_CHUNK_SIZE = int(os.getenv("KNOWLEDGE_CHUNK_SIZE", "1200"))
+KNOWLEDGE_CHUNK_OVERLAP = int(os.getenv("KNOWLEDGE_CHUNK_OVERLAP", "150"))
+
+FORMATS = ("text", "markdown", "csv")
+
+_READ_BLOCK = 64 * 1024
+
+
+@dataclass
+class ChunkerConfig:
+    size: int = KNOWLEDGE_CHUNK_SIZE
+    overlap: int = KNOWLEDGE_CHUNK_OVERLAP
+    split_on_headings: bool = True
+
+    def __post_init__(self):
+        if self.size < 100:
+            raise ValueError("chunk size must be at least 100 characters")
+        if not 0 <= self.overlap < self.size:
+            raise ValueError("chunk overlap must be >= 0 and smaller than the chunk size")
+
+
+def detect_format(filename: str | None, content_type: str | None = None) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".md", ".markdown")) or content_type == "text/markdown":
+        return "markdown"
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    return "text"
+
+
+def iter_lines(f: BinaryIO, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Decodes a binary stream block by block and yields lines (with their newline).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    while True:
+        block = f.read(_READ_BLOCK)
+        final = not block
+        pending += decoder.decode(block, final=final)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if final:
+            break
+    if pending:
+        yield pending
+
+
+class _Packer:
+    """
+    Packs units into chunks of ~size chars; carries whole trailing units as overlap.
+    """
+
+    def __init__(self, config: ChunkerConfig, prefix: str = "", joiner: str = "\n\n"):
+        self.config = config
+        self.prefix = prefix
+        self.joiner = joiner
+        self.units: list[str] = []
+        self.length = 0
+        self.has_new = False  # buffer holds more than carried-over overlap
+
+    def _budget(self) -> int:
+        return max(1, self.config.size - len(self.prefix))
+
+    def add(self, unit: str) -> Iterator[str]:
+        budget = self._budget()
+        if len(unit) > budget:
+            yield from self.flush()
+            step = budget - min(self.config.overlap, budget // 2)
+            for start in range(0, len(unit), step):
+                yield self.prefix + unit[start : start + budget]
+                if start + budget >= len(unit):
+                    break
+            return
+
+        if self.units and self.length + len(self.joiner) + len(unit) > budget:
+            yield self._emit()
+            # the carried overlap must leave room for the unit: drop its oldest units
+            while self.units and self.length + len(self.joiner) + len(unit) > budget:
+                dropped = self.units.pop(0)
+                self.length -= len(dropped) + (len(self.joiner) if self.units else 0)
+        self.units.append(unit)
+        self.length += len(unit) + (len(self.joiner) if len(self.units) > 1 else 0)
+        self.has_new = True
+
+    def _emit(self) -> str:
+        text = self.prefix + self.joiner.join(self.units)
+        # carry whole trailing units as overlap
+        carried: list[str] = []
+        size = 0
+        for unit in reversed(self.units):
+            if size + len(unit) > self.config.overlap:
+                break
+            carried.insert(0, unit)
+            size += len(unit) + len(self.joiner)
+        self.units = carried
+        self.length = max(0, size - len(self.joiner))
+        self.has_new = False
+        return text
+
+    def flush(self) -> Iterator[str]:
+        if self.units and self.has_new:
+            yield self._emit()
+        self.units, self.length, self.has_new = [], 0, False
+
+
+def _paragraphs(lines: Iterable[str]) -> Iterator[tuple[str | None, str]]:
+    """
+    Yields (heading, None-or-paragraph) events: ("# Title", "") for a heading line,
+    (None, text) for a paragraph.
+    """
+    buf: list[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("#") and stripped.lstrip("#").startswith(" "):
+            if buf:
+                yield None, "\n".join(buf)
+                buf = []
+            yield stripped, ""
+        elif not stripped:
+            if buf:
+                yield None, "\n".join(buf)
+                buf = []
+        else:
+            buf.append(line.rstrip("\n").rstrip())
+    if buf:
+        yield None, "\n".join(buf)
+
+
+def _chunk_prose(lines: Iterable[str], config: ChunkerConfig, markdown: bool) -> Iterator[str]:
+    headings: list[tuple[int, str]] = []
+    packer = _Packer(config)
+
+    for heading, paragraph in _paragraphs(lines):
+        if heading is None:
+            yield from packer.add(paragraph)
+            continue
+        if not markdown:
+            yield from packer.add(heading)
+            continue
+
+        level = len(heading) - len(heading.lstrip("#"))
+        title = heading.lstrip("#").strip()
+        headings = [(lvl, t) for lvl, t in headings if lvl < level] + [(level, title)]
+        if config.split_on_headings:
+            yield from packer.flush()
+            packer = _Packer(config, prefix=" > ".join(t for _, t in headings) + "\n\n")
+        else:
+            yield from packer.add(heading)
+
+    yield from packer.flush()
+
+
+def _chunk_csv(lines: Iterable[str], config: ChunkerConfig) -> Iterator[str]:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    def render(row: list[str]) -> str:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="").writerow(row)
+        return out.getvalue()
+
+    packer = _Packer(config, prefix=render(header) + "\n", joiner="\n")
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield from packer.add(render(row))
+    yield from packer.flush()
+
+
+def chunk_document(lines: Iterable[str], fmt: str, config: ChunkerConfig | None = None) -> Iterator[str]:
+    config = config or ChunkerConfig()
+    if fmt == "csv":
+        chunks = _chunk_csv(lines, config)
+    elif fmt in ("markdown", "text"):
+        chunks = _chunk_prose(lines, config, markdown=fmt == "markdown")
+    else:
+        raise ValueError(f"Unsupported format {fmt!r} (expected one of {FORMATS})")
+
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if chunk:
+            yield chunk
@@ -0,0 +1,111 @@
+"""
+Work-item intake: idempotency keys and event coalescing.
+
+Carriers resend the same delay notice, and send several updates for one shipment before
+anyone runs it. For each incoming event:
+
+- replayed:  its key (Idempotency-Key header, else shipment_id + updated_eta) was seen within
+             IDEMPOTENCY_KEY_TTL_HOURS -> the work item it went to is returned unchanged
+- coalesced: the shipment already has a NEW work item -> that item takes the newer event
+             as its payload (older notices only record their key)
+- created:   otherwise a new NEW work item
+
+Intake for one shipment is serialized with a transaction-scoped advisory lock, so two
+concurrent updates can't both decide to create an item.
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import WorkItem, WorkItemIdempotencyKey
+
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+WORK_ITEM_TYPE = "SHIPMENT_DELAY"
+
+# Literal key (not a bound parameter) so the planner matches ix_work_items_new_shipment
+_SHIPMENT_ID = literal_column("work_items.payload ->> 'shipment_id'")
+
+
+def intake_key(event: dict, idempotency_key: str | None = None) -> str:
+    if idempotency_key:
+        return f"hdr:{idempotency_key}"
+    return f"evt:{WORK_ITEM_TYPE}:{event['shipment_id']}:{event['updated_eta']}"
+
+
+def intake_event(db: Session, event: dict, idempotency_key: str | None = None) -> tuple[WorkItem, str]:
+    """
+    Returns (work_item, outcome) with outcome in created|coalesced|replayed. Does not commit;
+    the advisory lock is held until the caller's transaction ends.
+    """
+    key = intake_key(event, idempotency_key)
+    cutoff = datetime.utcnow() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+
+    db.execute(
+        select(func.pg_advisory_xact_lock(func.hashtextextended(f"work_item_intake:{event['shipment_id']}", 0)))
+    )
+
+    # One round trip: the keyed item (replay) if any, else the shipment's newest NEW item.
+    # FOR UPDATE waits out an in-flight /run on the candidate; once it commits the row is
+    # re-checked and no longer matches status = 'NEW'.
+    replay_id = (
+        select(WorkItemIdempotencyKey.work_item_id)
+        .where(WorkItemIdempotencyKey.key == key, WorkItemIdempotencyKey.created_at >= cutoff)
+        .scalar_subquery()
+    )
+    replayed = func.coalesce(WorkItem.id == replay_id, False)
+    row = db.execute(
+        select(WorkItem, replayed)
+        .where(
+            or_(
+                WorkItem.id == replay_id,
+                and_(
+                    WorkItem.type == WORK_ITEM_TYPE,
+                    WorkItem.status == "NEW",
+                    _SHIPMENT_ID == event["shipment_id"],
+                ),
+            )
+        )
+        .order_by(replayed.desc(), WorkItem.created_at.desc())
+        .limit(1)
+        .with_for_update(of=WorkItem)
+    ).first()
+
+    if row is not None and row[1]:
+        return row[0], "replayed"
+
+    if row is not None:
+        wi, outcome = row[0], "coalesced"
+        # Out-of-order delivery: an older notice doesn't overwrite a newer one
+        if str(event.get("updated_eta", "")) >= str(wi.payload.get("updated_eta", "")):
+            wi.payload = event
+    else:
+        wi, outcome = WorkItem(type=WORK_ITEM_TYPE, status="NEW", payload=event, context=None), "created"
+        db.add(wi)
+    db.flush()
+
+    # Expired keys are taken over; a live one means a concurrent request with the same
+    # header key (different shipment, so not serialized by the lock above) won the race
+    now = datetime.utcnow()
+    stmt = pg_insert(WorkItemIdempotencyKey).values(key=key, work_item_id=wi.id, created_at=now)
+    stored = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[WorkItemIdempotencyKey.key],
+            set_={"work_item_id": stmt.excluded.work_item_id, "created_at": stmt.excluded.created_at},
+            where=WorkItemIdempotencyKey.created_at < cutoff,
+        ).returning(WorkItemIdempotencyKey.key)
+    ).first()
+
+    if stored is None:
+        db.rollback()
+        existing = db.execute(
+            select(WorkItem)
+            .join(WorkItemIdempotencyKey, WorkItemIdempotencyKey.work_item_id == WorkItem.id)
+            .where(WorkItemIdempotencyKey.key == key)
+        ).scalar_one()
+        return existing, "replayed"
+
+    return wi, outcome
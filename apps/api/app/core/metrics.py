@@ -0,0 +1,280 @@
+"""
+Prometheus metrics for the API.
+
+Single process: metrics live in the default registry.
+Multiple uvicorn/gunicorn workers: set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory shared by all workers (wipe it before the workers start). Each worker then writes
+its samples to mmap'd files there and /metrics aggregates across all of them.
+"""
+import os
+from contextlib import contextmanager
+from functools import cache
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Buckets tuned for this service: fast CRUD calls (ms) up to slow LLM round trips (s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMPT_TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+ORCHESTRATION_STAGE_LATENCY = Histogram(
+    "orchestration_stage_duration_seconds",
+    "Latency of each orchestration stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+OPENAI_CALL_LATENCY = Histogram(
+    "openai_call_duration_seconds",
+    "Latency of OpenAI API calls.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+OPENAI_CALL_ERRORS = Counter(
+    "openai_call_errors_total",
+    "OpenAI API calls that raised, by exception type.",
+    ["operation", "error"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit|miss). Hit ratio = hit / (hit + miss).",
+    ["cache", "result"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a SQLAlchemy pool connection.",
+    ["engine"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+
+DECISIONS = Counter(
+    "decisions_total",
+    "Decisions recorded, by outcome, override type and source (orchestrator|human).",
+    ["decision", "override", "source"],
+)
+
+LLM_PLANS = Counter(
+    "llm_planner_total",
+    "Evaluation planner outcomes for the LLM agent "
+    "(called|skipped_override|skipped_decided|circuit_open|disabled).",
+    ["outcome"],
+)
+
+LLM_BATCH_ITEMS = Counter(
+    "llm_batch_items_total",
+    "Batch-mode LLM items by result (completed|failed). Failed items fall back to ESCALATE.",
+    ["result"],
+)
+
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Estimated input tokens per LLM decision prompt (after budget trimming).",
+    buckets=PROMPT_TOKEN_BUCKETS,
+)
+
+LLM_CIRCUIT_STATE = Gauge(
+    "llm_circuit_state",
+    "LLM circuit breaker state (0=closed, 1=half_open, 2=open).",
+    ["breaker"],
+    multiprocess_mode="livemax",
+)
+
+LLM_CIRCUIT_TRANSITIONS = Counter(
+    "llm_circuit_transitions_total",
+    "LLM circuit breaker state changes, by new state.",
+    ["breaker", "state"],
+)
+
+LLM_FALLBACKS = Counter(
+    "llm_fallbacks_total",
+    "LLM calls not made or abandoned (circuit_open|deadline|concurrency_limit|error).",
+    ["reason"],
+)
+
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedged duplicate LLM requests (launched|won).",
+    ["result"],
+)
+
+RUN_COORDINATION = Counter(
+    "work_item_runs_total",
+    "/run outcomes: computed, stored (already decided), shared (joined an in-flight run), "
+    "conflict (lock wait timed out).",
+    ["outcome"],
+)
+
+WORK_ITEM_INTAKE = Counter(
+    "work_item_intake_total",
+    "POST /work-items outcomes (created|coalesced|replayed).",
+    ["outcome"],
+)
+
+KNOWLEDGE_CHUNKS = Counter(
+    "knowledge_ingest_chunks_total",
+    "Document ingestion chunks by outcome (embedded|unchanged|deleted).",
+    ["outcome"],
+)
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _is_multiprocess() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Returns (body, content_type) for the /metrics endpoint.
+    """
+    if _is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# labels() hashes and locks on every call; the per-event orchestration metrics have a handful
+# of label combinations, so their children are looked up once
+@cache
+def _stage_latency(stage: str):
+    return ORCHESTRATION_STAGE_LATENCY.labels(stage=stage)
+
+
+@cache
+def _decisions(decision: str, override: str, source: str):
+    return DECISIONS.labels(decision=decision, override=override, source=source)
+
+
+@cache
+def _llm_plans(outcome: str):
+    return LLM_PLANS.labels(outcome=outcome)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        _stage_latency(stage).observe(perf_counter() - t0)
+
+
+@contextmanager
+def openai_call(operation: str):
+    """
+    Times an OpenAI call and counts failures. Exceptions are re-raised unchanged.
+    """
+    t0 = perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OPENAI_CALL_ERRORS.labels(operation=operation, error=type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_CALL_LATENCY.labels(operation=operation).observe(perf_counter() - t0)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_decision(
+    decision: str, override: str | None = None, source: str = "orchestrator", count: int = 1
+) -> None:
+    _decisions(decision, override or "NONE", source).inc(count)
+
+
+def record_llm_plan(outcome: str) -> None:
+    _llm_plans(outcome).inc()
+
+
+def record_prompt_tokens(tokens: int) -> None:
+    LLM_PROMPT_TOKENS.observe(tokens)
+
+
+def record_llm_circuit_state(breaker: str, state: str, transition: bool = True) -> None:
+    LLM_CIRCUIT_STATE.labels(breaker=breaker).set(_CIRCUIT_STATE_VALUES[state])
+    if transition:
+        LLM_CIRCUIT_TRANSITIONS.labels(breaker=breaker, state=state).inc()
+
+
+def record_llm_fallback(reason: str) -> None:
+    LLM_FALLBACKS.labels(reason=reason).inc()
+
+
+def record_llm_hedge(result: str) -> None:
+    LLM_HEDGES.labels(result=result).inc()
+
+
+def record_run_coordination(outcome: str) -> None:
+    RUN_COORDINATION.labels(outcome=outcome).inc()
+
+
+def record_intake(outcome: str) -> None:
+    WORK_ITEM_INTAKE.labels(outcome=outcome).inc()
+
+
+def record_llm_batch_item(result: str) -> None:
+    LLM_BATCH_ITEMS.labels(result=result).inc()
+
+
+def record_knowledge_chunks(outcome: str, count: int) -> None:
+    if count:
+        KNOWLEDGE_CHUNKS.labels(outcome=outcome).inc(count)
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware overhead).
+    Labels by route template (/work-items/{work_item_id}) rather than the raw path,
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "UNMATCHED"
+            HTTP_REQUEST_LATENCY.labels(
+                method=scope.get("method", ""),
+                route=route_path,
+                status=str(status["code"]),
+            ).observe(perf_counter() - t0)
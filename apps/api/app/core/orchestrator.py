@@ -1,8 +1,27 @@
 import os
 from sqlalchemy.orm import Session
 
-from app.core.agents import RiskAgent, CostAgent, SlaAgent, AgentResult
-from app.ai.llm_agent import LlmDecisionAgent
+from app.core.agents import (
+    NON_VOTING_REASON_CODES,
+    AgentResult,
+    CostAgent,
+    ReasonCode,
+    RiskAgent,
+    SlaAgent,
+)
+from app.core.metrics import record_decision, record_llm_plan, stage_timer
+from app.core.policy import POLICY, VOTE_WEIGHTS
+from app.ai.batch import BatchBackend, evaluate_batch
+from app.ai.llm_agent import CIRCUIT_OPEN_REASON, LlmDecisionAgent
+from app.ai.resilience import llm_guard
+
+
+LLM_AGENT_NAME = LlmDecisionAgent.name
+
+# The agent_results table holds a normalized copy of the trace. Set to 0 to stop duplicating
+# it in work_items.context: GET /work-items/{id} and /trace then rebuild it from agent_results,
+# and each entry's reason is its ReasonCode name (e.g. "COST_HIGH") rather than free text.
+STORE_AGENT_TRACE_IN_CONTEXT = os.getenv("STORE_AGENT_TRACE_IN_CONTEXT", "1").lower() in {"1", "true", "yes"}
 
 
 def _is_llm_enabled() -> bool:
@@ -15,145 +34,284 @@ def _is_llm_enabled() -> bool:
     return bool(os.getenv("OPENAI_API_KEY"))
 
 
-def orchestrate(event: dict, db: Session) -> dict:
+# =============================
+# VOTING WEIGHTS
+# =============================
+DETERMINISTIC_VOTE_WEIGHT = VOTE_WEIGHTS["DETERMINISTIC"]
+LLM_VOTE_WEIGHT = VOTE_WEIGHTS["LLM"]
+ESCALATE_THRESHOLD = VOTE_WEIGHTS["ESCALATE_THRESHOLD"]
+
+# "auto": call the LLM only when its vote can still change the outcome (default)
+# "always": call it whenever enabled (e.g. to collect LLM opinions for evaluation)
+LLM_PLANNER_MODE = os.getenv("LLM_PLANNER_MODE", "auto").lower()
+
+
+class Orchestrator:
     """
-    Hybrid orchestration:
+    The orchestration pipeline, configured once and reused for every event:
     - Deterministic agents (Risk, Cost, SLA)
-    - Optional LLM agent (RAG)
     - Hard overrides
+    - Optional LLM agent (RAG), only when the planner says it can still flip the vote
     - Voting logic
+
+    Agents are stateless, so one instance serves every request and worker thread.
+    llm_enabled=None checks _is_llm_enabled() once per evaluation (it follows the
+    environment); pass a bool to pin it, e.g. for offline scoring.
     """
 
-    deterministic_agents = [RiskAgent(), CostAgent(), SlaAgent()]
-    llm_agent = LlmDecisionAgent()
-
-    # Always collect agent_trace items here
-    results: list[AgentResult] = []
-
-    # Run deterministic agents (always)
-    for agent in deterministic_agents:
-        results.append(agent.evaluate(event))
-
-    # Run LLM agent only if enabled, but ALWAYS add a trace record for it
-    llm_enabled = _is_llm_enabled()
-    if llm_enabled:
-        llm_result = llm_agent.evaluate(event, db)
-        llm_trace = AgentResult(
-            name=llm_result["name"],
-            recommendation=llm_result["recommendation"],
-            reason=llm_result["reason"],
-            score=llm_result["score"],
-        )
-    else:
-        # IMPORTANT: still include LLM in trace, but make it neutral and excluded from voting
-        llm_trace = AgentResult(
-            name="LlmDecisionAgent",
-            recommendation="AUTO_RESOLVE",
-            reason="LLM disabled (missing OPENAI_API_KEY or DISABLE_LLM=1).",
-            score=0.0,
-        )
+    __slots__ = ("deterministic_agents", "llm_agent", "llm_enabled")
 
-    results.append(llm_trace)
+    def __init__(
+        self,
+        deterministic_agents: tuple | None = None,
+        llm_agent: LlmDecisionAgent | None = None,
+        llm_enabled: bool | None = None,
+    ):
+        self.deterministic_agents = deterministic_agents or (RiskAgent(), CostAgent(), SlaAgent())
+        self.llm_agent = llm_agent or LlmDecisionAgent()
+        self.llm_enabled = llm_enabled
 
-    # =============================
+    def _llm_enabled(self) -> bool:
+        return _is_llm_enabled() if self.llm_enabled is None else self.llm_enabled
+
+    def evaluate(self, event: dict, db: Session) -> dict:
+        # Run deterministic agents (always, they're cheap)
+        with stage_timer("deterministic_agents"):
+            results = [agent.evaluate(event) for agent in self.deterministic_agents]
+
+        # Plan: overrides + deterministic votes first, LLM only if it matters
+        llm_enabled = self._llm_enabled()
+        override, llm_skip_code, llm_skip_reason = plan_llm(event, results, llm_enabled)
+
+        # Run LLM agent only if needed, but ALWAYS add a trace record for it
+        if llm_skip_code is None:
+            with stage_timer("llm_agent"):
+                results.append(llm_agent_result(self.llm_agent.evaluate(event, db)))
+        else:
+            results.append(llm_placeholder(llm_skip_code, llm_skip_reason))
+
+        return finalize(results, override, llm_enabled)
+
+    def evaluate_batch(self, events: list[dict], db: Session, backend: BatchBackend | None = None) -> list[dict]:
+        """
+        evaluate() for a chunk of an offline run (`python -m app.core.batch_scoring --llm batch`):
+        same agents, planner and voting, but every LLM call the planner asks for goes out in
+        one batch job (app.ai.batch). Returns one output per event, in order.
+        """
+        llm_enabled = self._llm_enabled()
+
+        planned = []
+        with stage_timer("deterministic_agents"):
+            for event in events:
+                results = [agent.evaluate(event) for agent in self.deterministic_agents]
+                planned.append((results, *plan_llm(event, results, llm_enabled)))
+
+        to_call = {str(i): events[i] for i, (_, _, skip_code, _) in enumerate(planned) if skip_code is None}
+        llm_results = evaluate_batch(self.llm_agent, to_call, db, backend) if to_call else {}
+
+        outputs = []
+        for i, (results, override, llm_skip_code, llm_skip_reason) in enumerate(planned):
+            if llm_skip_code is None:
+                results.append(llm_agent_result(llm_results[str(i)]))
+            else:
+                results.append(llm_placeholder(llm_skip_code, llm_skip_reason))
+            outputs.append(finalize(results, override, llm_enabled))
+        return outputs
+
+
+_orchestrator = Orchestrator()
+
+
+def orchestrate(event: dict, db: Session) -> dict:
+    """
+    Hybrid orchestration of one event with the shared Orchestrator.
+    """
+    return _orchestrator.evaluate(event, db)
+
+
+def orchestrate_batch(events: list[dict], db: Session, backend: BatchBackend | None = None) -> list[dict]:
+    return _orchestrator.evaluate_batch(events, db, backend)
+
+
+def hard_override(event: dict, policy: dict = POLICY) -> str | None:
     # HARD OVERRIDE 1: PRIORITY
-    # =============================
-    if bool(event.get("priority_flag", False)):
-        return _override_response(results, "PRIORITY_FLAG")
+    if policy["ESCALATE_IF_PRIORITY"] and bool(event.get("priority_flag", False)):
+        return "PRIORITY_FLAG"
 
-    # =============================
     # HARD OVERRIDE 2: HIGH VALUE
-    # =============================
     order_value = float(event.get("order_value", 0.0))
-    if order_value >= 100000:
-        return _override_response(results, "HIGH_ORDER_VALUE")
+    if order_value >= policy["ESCALATE_IF_ORDER_VALUE_GTE"]:
+        return "HIGH_ORDER_VALUE"
+
+    return None
+
+
+def plan_llm(
+    event: dict, deterministic_results: list[AgentResult], llm_enabled: bool
+) -> tuple[str | None, ReasonCode | None, str | None]:
+    """
+    Evaluation planner. Returns (override, llm_skip_code, llm_skip_reason); a None skip code
+    means call the LLM, otherwise the code and reason go on its placeholder trace entry.
+
+    The LLM vote (weight LLM_VOTE_WEIGHT) can only change the outcome when the deterministic
+    escalate score is in [ESCALATE_THRESHOLD - LLM_VOTE_WEIGHT, ESCALATE_THRESHOLD):
+    below it the item auto-resolves even if the LLM escalates, at or above it the item
+    escalates whatever the LLM says. Outside that band the embedding + retrieval + chat
+    completion would be paid for nothing.
+    """
+    override = hard_override(event)
+
+    skip_code = skip_reason = None
+    if not llm_enabled:
+        outcome, skip_code, skip_reason = "disabled", ReasonCode.LLM_DISABLED, _LLM_DISABLED_PLACEHOLDER.reason
+    elif LLM_PLANNER_MODE == "always":
+        outcome = "called"
+    elif override:
+        outcome, skip_code = "skipped_override", ReasonCode.LLM_SKIPPED
+        skip_reason = f"Skipped: outcome fixed by override {override}."
+    elif llm_guard.breaker.is_open():
+        # Provider failing: deterministic-only vote until the breaker lets a trial call through
+        outcome, skip_code, skip_reason = "circuit_open", ReasonCode.LLM_CIRCUIT_OPEN, CIRCUIT_OPEN_REASON
+    else:
+        det_score = weighted_escalate_score(deterministic_results)
+        if llm_can_flip(det_score):
+            outcome = "called"
+        else:
+            outcome, skip_code = "skipped_decided", ReasonCode.LLM_SKIPPED
+            skip_reason = f"Skipped: deterministic escalate score {det_score} decides the vote without the LLM."
+
+    record_llm_plan(outcome)
+    return override, skip_code, skip_reason
+
+
+def llm_agent_result(llm_result: dict) -> AgentResult:
+    return AgentResult(
+        name=llm_result["name"],
+        recommendation=llm_result["recommendation"],
+        reason=llm_result["reason"],
+        score=llm_result["score"],
+        reason_code=llm_result.get("reason_code", ReasonCode.UNSPECIFIED),
+        prompt_version=llm_result.get("prompt_version"),
+    )
+
+
+def llm_can_flip(det_score: float, weights: dict = VOTE_WEIGHTS) -> bool:
+    return weights["ESCALATE_THRESHOLD"] - weights["LLM"] <= det_score < weights["ESCALATE_THRESHOLD"]
+
+
+# Same trace record for every event while the LLM is off: built once, never mutated
+_LLM_DISABLED_PLACEHOLDER = AgentResult(
+    name=LLM_AGENT_NAME,
+    recommendation="AUTO_RESOLVE",
+    reason="LLM disabled (missing OPENAI_API_KEY or DISABLE_LLM=1).",
+    score=0.0,
+    reason_code=ReasonCode.LLM_DISABLED,
+)
+
+
+def llm_placeholder(code: ReasonCode, reason: str) -> AgentResult:
+    # IMPORTANT: still include LLM in trace, but make it neutral and excluded from voting
+    if code == ReasonCode.LLM_DISABLED:
+        return _LLM_DISABLED_PLACEHOLDER
+    return AgentResult(name=LLM_AGENT_NAME, recommendation="SKIPPED", reason=reason, score=0.0, reason_code=code)
 
-    # =============================
-    # HYBRID VOTING LOGIC
-    # =============================
-    # Deterministic agents count always.
-    # LLM contributes only if enabled.
-    escalate_score = 0.0
-    votes_escalate = 0
 
+def weighted_escalate_score(results: list[AgentResult], weights: dict = VOTE_WEIGHTS) -> float:
+    score = 0.0
     for r in results:
-        # Skip LLM in voting if disabled
-        if r.name == "LlmDecisionAgent" and not llm_enabled:
+        if r.reason_code in NON_VOTING_REASON_CODES or r.recommendation != "ESCALATE":
             continue
+        score += weights["LLM"] if r.name == LLM_AGENT_NAME else weights["DETERMINISTIC"]
+    return score
 
+
+def finalize(results: list[AgentResult], override: str | None, llm_enabled: bool) -> dict:
+    """
+    Decision, confidence and context for one event's agent results. One pass over the
+    results collects everything the override and vote paths need.
+    """
+    # Placeholders (LLM disabled/skipped) neither vote nor score
+    escalate_score = score_sum = 0.0
+    voters = votes_escalate = 0
+    key_reasons = []
+    llm_called = False
+    prompt_version = None
+    for r in results:
+        if prompt_version is None and r.prompt_version:
+            prompt_version = r.prompt_version
+        if r.reason_code in NON_VOTING_REASON_CODES:
+            continue
+        is_llm = r.name == LLM_AGENT_NAME
+        llm_called = llm_called or is_llm
+        voters += 1
+        score_sum += r.score
         if r.recommendation == "ESCALATE":
             votes_escalate += 1
-            if r.name == "LlmDecisionAgent":
-                escalate_score += 1.5
-            else:
-                escalate_score += 1.0
+            escalate_score += LLM_VOTE_WEIGHT if is_llm else DETERMINISTIC_VOTE_WEIGHT
+            key_reasons.append(r.reason)
+    avg_score = score_sum / max(1, voters)
 
-    final_decision = "ESCALATE" if escalate_score >= 2 else "AUTO_RESOLVE"
+    if override:
+        final = {
+            "decision": "ESCALATE",
+            "override": override,
+            "avg_score": avg_score,
+            "llm_enabled": llm_enabled,
+            "llm_called": llm_called,
+            "llm_prompt_version": prompt_version,
+        }
+        record_decision("ESCALATE", override)
+        return _response("ESCALATE", f"Escalated due to override: {override}", 1.0, final, results)
 
-    # avg_score should be computed consistently
-    scoring_results = [r for r in results if not (r.name == "LlmDecisionAgent" and not llm_enabled)]
-    avg_score = sum(r.score for r in scoring_results) / max(1, len(scoring_results))
+    # =============================
+    # HYBRID VOTING LOGIC
+    # =============================
+    # Deterministic agents count always.
+    # LLM contributes only if it actually ran.
+    with stage_timer("voting"):
+        final_decision = "ESCALATE" if escalate_score >= ESCALATE_THRESHOLD else "AUTO_RESOLVE"
 
-    key_reasons = [
-        r.reason
-        for r in scoring_results
-        if r.recommendation == "ESCALATE"
-    ]
+        if key_reasons:
+            reason = "Escalated because: " + " | ".join(key_reasons)
+        else:
+            reason = "Auto-resolved: low combined risk across agents."
 
-    if key_reasons:
-        reason = "Escalated because: " + " | ".join(key_reasons)
-    else:
-        reason = "Auto-resolved: low combined risk across agents."
-
-    context = {
-        "agent_trace": [
-            {
-                "name": r.name,
-                "score": r.score,
-                "recommendation": r.recommendation,
-                "reason": r.reason,
-            }
-            for r in results
-        ],
-        "final": {
+        final = {
             "decision": final_decision,
             "votes_escalate": votes_escalate,
             "weighted_escalate_score": escalate_score,
             "avg_score": avg_score,
             "llm_enabled": llm_enabled,
-        },
-    }
+            "llm_called": llm_called,
+            "llm_prompt_version": prompt_version,
+        }
+        record_decision(final_decision)
+        return _response(final_decision, reason, round(min(1.0, 0.5 + avg_score / 2), 3), final, results)
 
+
+def _response(decision: str, reason: str, confidence: float, final: dict, results: list[AgentResult]) -> dict:
+    context = {"final": final}
+    if STORE_AGENT_TRACE_IN_CONTEXT:
+        context["agent_trace"] = agent_trace(results)
     return {
-        "decision": final_decision,
+        "decision": decision,
         "reason": reason,
-        "confidence": round(min(1.0, 0.5 + avg_score / 2), 3),
+        "confidence": confidence,
         "context": context,
+        "agent_results": results,
     }
 
 
-def _override_response(results: list[AgentResult], override_type: str) -> dict:
-    avg_score = sum(r.score for r in results) / max(1, len(results))
-
-    return {
-        "decision": "ESCALATE",
-        "reason": f"Escalated due to override: {override_type}",
-        "confidence": 1.0,
-        "context": {
-            "agent_trace": [
-                {
-                    "name": r.name,
-                    "score": r.score,
-                    "recommendation": r.recommendation,
-                    "reason": r.reason,
-                }
-                for r in results
-            ],
-            "final": {
-                "decision": "ESCALATE",
-                "override": override_type,
-                "avg_score": avg_score,
-                "llm_enabled": _is_llm_enabled(),
-            },
-        },
-    }
\ No newline at end of file
+def agent_trace(results: list[AgentResult]) -> list[dict]:
+    trace = []
+    for r in results:
+        entry = {
+            "name": r.name,
+            "score": r.score,
+            "recommendation": r.recommendation,
+            "reason": r.reason,
+        }
+        if r.prompt_version:
+            entry["prompt_version"] = r.prompt_version
+        trace.append(entry)
+    return trace
@@ -4,4 +4,23 @@ POLICY = {
     "MIN_SUPPLIER_RELIABILITY_FOR_AUTO_RESOLVE": 0.80,  # placeholder until supplier context is added
     "ESCALATE_IF_PRIORITY": True,
     "ESCALATE_IF_ORDER_VALUE_GTE": 100000,
-}
\ No newline at end of file
+}
+
+# Deterministic agent thresholds (app.core.agents)
+AGENT_THRESHOLDS = {
+    "RISK_HIGH_DELAY_DAYS": 3,
+    "RISK_MODERATE_DELAY_DAYS": 2,
+    "RISK_LOW_INVENTORY_DAYS": 7,
+    "RISK_ESCALATE_SCORE": 0.6,
+    "COST_HIGH_ORDER_VALUE": 100000,
+    "COST_MEDIUM_HIGH_ORDER_VALUE": 50000,
+    "SLA_BUFFER_DAYS": 2,
+}
+
+# Hybrid vote (app.core.orchestrator): an item escalates when the weighted ESCALATE votes
+# reach ESCALATE_THRESHOLD
+VOTE_WEIGHTS = {
+    "DETERMINISTIC": 1.0,
+    "LLM": 1.5,
+    "ESCALATE_THRESHOLD": 2.0,
+}
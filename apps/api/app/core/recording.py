@@ -0,0 +1,173 @@
+"""
+Persisting orchestration outcomes.
+
+Every path that turns an orchestrate() result into rows (single run, simulate, batch) goes
+through record_orchestration so the work item, its Decision, the agent_results rows and the
+decision rollups are written the same way, in the caller's transaction.
+"""
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.rollups import RollupDeltas
+from app.db.models import AgentResultRecord, Decision, WorkItem
+
+
+# Statuses after which /run serves the stored decision instead of orchestrating again
+COMPLETED_STATUSES = {"AUTO_RESOLVED", "ESCALATED", "HUMAN_APPROVED", "HUMAN_REJECTED"}
+
+
+def status_for(decision: str) -> str:
+    return "AUTO_RESOLVED" if decision == "AUTO_RESOLVE" else "ESCALATED"
+
+
+def review_status(action: str) -> str:
+    return "HUMAN_APPROVED" if action == "APPROVE" else "HUMAN_REJECTED"
+
+
+def record_orchestration(
+    db: Session, wi: WorkItem, out: dict, rollups: RollupDeltas | None = None
+) -> Decision:
+    """
+    Applies an orchestrate() result to `wi` (status + context) and adds its Decision and
+    agent_results rows. Does not commit. `wi` may be pending (simulate) or persistent (run).
+
+    Batch callers pass a shared RollupDeltas and flush it once; otherwise the rollup
+    update is applied right away.
+    """
+    if wi.id is None:
+        wi.id = uuid.uuid4()
+    wi.context = out["context"]
+    wi.status = status_for(out["decision"])
+
+    d = Decision(
+        id=uuid.uuid4(),
+        work_item_id=wi.id,
+        decision=out["decision"],
+        reason=out["reason"],
+        confidence=float(out["confidence"]),
+    )
+
+    db.add(wi)
+    db.add(d)
+    db.add_all(
+        AgentResultRecord(
+            work_item_id=wi.id,
+            decision_id=d.id,
+            agent=r.name,
+            supplier_id=wi.payload.get("supplier_id"),
+            region=wi.payload.get("region"),
+            score=r.score,
+            recommendation=r.recommendation,
+            reason_code=int(r.reason_code),
+        )
+        for r in out["agent_results"]
+    )
+
+    _apply_rollups(db, rollups, lambda deltas: deltas.add_orchestration(wi.payload, out))
+    return d
+
+
+def claimed_by_other(wi: WorkItem, reviewer: str, now: datetime) -> bool:
+    """
+    True while another reviewer holds an unexpired review-queue lease on `wi`.
+    """
+    return (
+        wi.claimed_by is not None
+        and wi.claimed_by != reviewer
+        and wi.claim_expires_at is not None
+        and wi.claim_expires_at > now
+    )
+
+
+def record_review(
+    db: Session,
+    wi: WorkItem,
+    action: str,
+    reviewer: str,
+    comment: str,
+    rollups: RollupDeltas | None = None,
+) -> Decision:
+    """
+    Applies a human APPROVE/REJECT to an ESCALATED work item. Does not commit.
+    """
+    wi.status = review_status(action)
+    wi.claimed_by = None
+    wi.claim_expires_at = None
+
+    d = Decision(
+        work_item_id=wi.id,
+        decision=action,
+        reason=comment,
+        confidence=1.0,
+        created_by=reviewer,
+    )
+    db.add(d)
+    db.add(wi)
+
+    _apply_rollups(db, rollups, lambda deltas: deltas.add_review(wi.payload, action))
+    return d
+
+
+def record_reviews(
+    db: Session,
+    targets: list,
+    action: str,
+    reviewer: str,
+    comment: str,
+    now: datetime,
+    rollups: RollupDeltas | None = None,
+) -> None:
+    """
+    record_review for many ESCALATED rows at once, set-based: one UPDATE of work_items, one
+    multi-row INSERT of decisions and one rollup upsert. `targets` are rows (id, created_at,
+    payload) the caller has already locked and checked. Does not commit.
+    """
+    if not targets:
+        return
+
+    db.execute(
+        update(WorkItem)
+        .where(tuple_(WorkItem.id, WorkItem.created_at).in_([(t.id, t.created_at) for t in targets]))
+        .values(
+            status=review_status(action),
+            claimed_by=None,
+            claim_expires_at=None,
+            # raw UPDATE: bump the row version ourselves so ETags and stale writers notice
+            version=WorkItem.version + 1,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        insert(Decision),
+        [
+            {
+                "id": uuid.uuid4(),
+                "work_item_id": t.id,
+                "decision": action,
+                "reason": comment,
+                "confidence": 1.0,
+                "created_by": reviewer,
+                "created_at": now,
+            }
+            for t in targets
+        ],
+    )
+
+    def add(deltas: RollupDeltas) -> None:
+        for t in targets:
+            deltas.add_review(t.payload, action)
+
+    _apply_rollups(db, rollups, add)
+
+
+def _apply_rollups(db: Session, rollups: RollupDeltas | None, add) -> None:
+    if rollups is not None:
+        add(rollups)
+        return
+    deltas = RollupDeltas()
+    add(deltas)
+    deltas.flush(db)
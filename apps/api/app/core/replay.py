@@ -0,0 +1,265 @@
+"""
+Shadow replay: how would a candidate configuration have decided historical work items?
+
+    python -m app.core.replay candidate.json [--since 2026-01-01] [--until 2026-02-01]
+
+candidate.json holds partial overrides of the live settings in app.core.policy:
+
+    {"POLICY": {"ESCALATE_IF_ORDER_VALUE_GTE": 150000},
+     "AGENT_THRESHOLDS": {"SLA_BUFFER_DAYS": 3},
+     "VOTE_WEIGHTS": {"LLM": 1.0}}
+
+Every orchestrated work item is re-evaluated twice, under the live and the candidate settings.
+Both runs use the same deterministic agents, overrides and weighted vote. The LLM is never
+called: its stored vote (agent_results) is reused. Items where the candidate would need an
+LLM vote that was never recorded (the planner skipped it at the time) are counted as
+llm_unavailable and voted deterministic-only.
+
+The report counts flips from live to candidate, by direction, supplier and region. It also
+measures agreement with human reviews. A human APPROVE upholds the escalation (label
+ESCALATE); a REJECT says the item could have auto-resolved (label AUTO_RESOLVE).
+
+Read-only: runs in a READ ONLY transaction (replica when healthy) and streams rows through a
+server-side cursor in chunks of REPLAY_CHUNK_SIZE. Memory stays bounded by the chunk size
+plus one counter per supplier/region.
+"""
+import argparse
+import os
+import sys
+from collections import Counter, defaultdict
+from copy import deepcopy
+from datetime import datetime
+
+from sqlalchemy import and_, select, text, true
+from sqlalchemy.orm import Session
+
+from app.core.agents import NON_VOTING_REASON_CODES, AgentResult, CostAgent, RiskAgent, SlaAgent
+from app.core.orchestrator import hard_override, llm_can_flip, weighted_escalate_score
+from app.core.policy import AGENT_THRESHOLDS, POLICY, VOTE_WEIGHTS
+from app.db.models import AgentResultRecord, WorkItem
+
+REPLAY_CHUNK_SIZE = int(os.getenv("REPLAY_CHUNK_SIZE", "5000"))
+SAMPLE_FLIPS = 20
+
+HUMAN_LABELS = {"HUMAN_APPROVED": "ESCALATE", "HUMAN_REJECTED": "AUTO_RESOLVE"}
+
+LIVE_CONFIG = {"POLICY": POLICY, "AGENT_THRESHOLDS": AGENT_THRESHOLDS, "VOTE_WEIGHTS": VOTE_WEIGHTS}
+
+
+def resolve_config(overrides: dict | None) -> dict:
+    """
+    Live settings with `overrides` applied. Unknown sections/keys raise ValueError so a typo
+    can't silently replay the live config.
+    """
+    config = deepcopy(LIVE_CONFIG)
+    for section, values in (overrides or {}).items():
+        if section not in config:
+            raise ValueError(f"Unknown config section {section!r} (expected one of {sorted(config)})")
+        unknown = set(values) - set(config[section])
+        if unknown:
+            raise ValueError(f"Unknown {section} keys: {sorted(unknown)}")
+        config[section].update(values)
+    return config
+
+
+class Evaluator:
+    """
+    Offline decision for one payload under one config (no DB, no LLM, no metrics).
+    """
+
+    def __init__(self, config: dict):
+        self.policy = config["POLICY"]
+        self.weights = config["VOTE_WEIGHTS"]
+        thresholds = config["AGENT_THRESHOLDS"]
+        self.agents = [RiskAgent(thresholds), CostAgent(thresholds), SlaAgent(thresholds)]
+
+    def decide(self, payload: dict, llm_vote: AgentResult | None) -> tuple[str, bool]:
+        """
+        Returns (decision, llm_unavailable).
+        """
+        if hard_override(payload, self.policy):
+            return "ESCALATE", False
+
+        results = [agent.evaluate(payload) for agent in self.agents]
+        det_score = weighted_escalate_score(results, self.weights)
+        llm_unavailable = False
+        if llm_can_flip(det_score, self.weights):
+            if llm_vote is None:
+                llm_unavailable = True
+            else:
+                results.append(llm_vote)
+
+        score = weighted_escalate_score(results, self.weights)
+        decision = "ESCALATE" if score >= self.weights["ESCALATE_THRESHOLD"] else "AUTO_RESOLVE"
+        return decision, llm_unavailable
+
+
+class ReplayReport:
+    def __init__(self, candidate_overrides: dict):
+        self.candidate_overrides = candidate_overrides
+        self.scanned = 0
+        self.live = Counter()
+        self.candidate = Counter()
+        self.flips = Counter()
+        self.flips_by_supplier: dict[str, Counter] = defaultdict(Counter)
+        self.flips_by_region: dict[str, Counter] = defaultdict(Counter)
+        self.llm_unavailable = 0
+        self.live_vs_stored_mismatch = 0
+        self.reviewed = 0
+        self.live_agree = 0
+        self.candidate_agree = 0
+        self.sample_flips: list[dict] = []
+
+    def add(self, row, live: str, candidate: str, llm_unavailable: bool) -> None:
+        self.scanned += 1
+        self.live[live] += 1
+        self.candidate[candidate] += 1
+        self.llm_unavailable += llm_unavailable
+        if row.stored_decision and row.stored_decision != live:
+            self.live_vs_stored_mismatch += 1
+
+        label = HUMAN_LABELS.get(row.status)
+        if label:
+            self.reviewed += 1
+            self.live_agree += live == label
+            self.candidate_agree += candidate == label
+
+        if live == candidate:
+            return
+        direction = f"{live}->{candidate}"
+        self.flips[direction] += 1
+        self.flips_by_supplier[row.payload.get("supplier_id") or "UNKNOWN"][direction] += 1
+        self.flips_by_region[row.payload.get("region") or "UNKNOWN"][direction] += 1
+        if len(self.sample_flips) < SAMPLE_FLIPS:
+            self.sample_flips.append(
+                {
+                    "work_item_id": str(row.id),
+                    "shipment_id": row.payload.get("shipment_id"),
+                    "status": row.status,
+                    "flip": direction,
+                }
+            )
+
+    def as_dict(self) -> dict:
+        def rate(n: int) -> float | None:
+            return round(n / self.reviewed, 4) if self.reviewed else None
+
+        return {
+            "candidate": self.candidate_overrides,
+            "scanned": self.scanned,
+            "live_decisions": dict(self.live),
+            "candidate_decisions": dict(self.candidate),
+            "flips": {"total": sum(self.flips.values()), **self.flips},
+            "flips_by_supplier": {k: dict(v) for k, v in sorted(self.flips_by_supplier.items())},
+            "flips_by_region": {k: dict(v) for k, v in sorted(self.flips_by_region.items())},
+            "llm_unavailable": self.llm_unavailable,
+            # live replay differs from what was stored: settings/code changed since those runs
+            "live_vs_stored_mismatch": self.live_vs_stored_mismatch,
+            "human_agreement": {
+                "reviewed": self.reviewed,
+                "live_agree": self.live_agree,
+                "candidate_agree": self.candidate_agree,
+                "live_rate": rate(self.live_agree),
+                "candidate_rate": rate(self.candidate_agree),
+            },
+            "sample_flips": self.sample_flips,
+        }
+
+
+def _history_stmt(since: datetime | None, until: datetime | None):
+    # Latest stored LLM vote per item (placeholders excluded), one row per work item
+    llm = (
+        select(AgentResultRecord.recommendation, AgentResultRecord.score, AgentResultRecord.reason_code)
+        .where(
+            AgentResultRecord.work_item_id == WorkItem.id,
+            AgentResultRecord.agent == "LlmDecisionAgent",
+            AgentResultRecord.reason_code.not_in([int(c) for c in NON_VOTING_REASON_CODES]),
+        )
+        .order_by(AgentResultRecord.id.desc())
+        .limit(1)
+        .lateral()
+    )
+
+    filters = [WorkItem.status != "NEW"]
+    if since is not None:
+        filters.append(WorkItem.created_at >= since)
+    if until is not None:
+        filters.append(WorkItem.created_at < until)
+
+    return (
+        select(
+            WorkItem.id,
+            WorkItem.status,
+            WorkItem.payload,
+            WorkItem.context["final"]["decision"].astext.label("stored_decision"),
+            llm.c.recommendation.label("llm_recommendation"),
+            llm.c.score.label("llm_score"),
+            llm.c.reason_code.label("llm_reason_code"),
+        )
+        .outerjoin(llm, true())
+        .where(and_(*filters))
+    )
+
+
+def replay(
+    db: Session,
+    candidate_overrides: dict,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    chunk_size: int = REPLAY_CHUNK_SIZE,
+) -> dict:
+    live_eval = Evaluator(resolve_config(None))
+    candidate_eval = Evaluator(resolve_config(candidate_overrides))
+    report = ReplayReport(candidate_overrides)
+
+    # Guard rail on top of the code only reading: the server rejects any write
+    db.execute(text("SET TRANSACTION READ ONLY"))
+
+    result = db.execute(
+        _history_stmt(since, until),
+        execution_options={"stream_results": True, "yield_per": chunk_size},
+    )
+    for chunk in result.partitions():
+        for row in chunk:
+            llm_vote = None
+            if row.llm_recommendation is not None:
+                llm_vote = AgentResult(
+                    name="LlmDecisionAgent",
+                    score=row.llm_score,
+                    recommendation=row.llm_recommendation,
+                    reason="stored",
+                    reason_code=row.llm_reason_code,
+                )
+            live, _ = live_eval.decide(row.payload, llm_vote)
+            candidate, llm_unavailable = candidate_eval.decide(row.payload, llm_vote)
+            report.add(row, live, candidate, llm_unavailable)
+
+    db.rollback()
+    return report.as_dict()
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+if __name__ == "__main__":
+    from app.core.serialization import dumps_str, loads
+    from app.db.session import new_read_session
+
+    parser = argparse.ArgumentParser(description="Replay history under a candidate configuration.")
+    parser.add_argument("config", help="JSON file with POLICY / AGENT_THRESHOLDS / VOTE_WEIGHTS overrides")
+    parser.add_argument("--since", type=_parse_date)
+    parser.add_argument("--until", type=_parse_date)
+    parser.add_argument("--chunk-size", type=int, default=REPLAY_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.config, "rb") as f:
+        overrides = loads(f.read())
+
+    try:
+        with new_read_session() as session:
+            report = replay(session, overrides, args.since, args.until, args.chunk_size)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(2)
+    print(dumps_str(report))
@@ -0,0 +1,50 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from app.core.metrics import record_cache_lookup
+
+
+class ResponseCache:
+    """
+    Small per-process LRU of serialized response bodies.
+
+    Keys carry the row version, so an update never needs an explicit invalidation:
+    the old (id, version) entry just stops being asked for and ages out.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            body = self._data.get(key)
+            if body is not None:
+                self._data.move_to_end(key)
+        record_cache_lookup(self.name, body is not None)
+        return body
+
+    def put(self, key: tuple, body: bytes) -> None:
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = body
+            self._bytes += len(body)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+work_item_responses = ResponseCache(
+    "work_item_response",
+    max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "2048")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
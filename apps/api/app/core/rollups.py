@@ -0,0 +1,150 @@
+"""
+Incrementally maintained decision rollups per (supplier_id, region, day).
+
+Writers add deltas in the same transaction as the Decision rows they describe; batch paths
+collect deltas for the whole batch and apply them with one multi-row upsert.
+
+Rebuild from raw rows (after a backfill or to verify drift):
+
+    python -m app.core.rollups rebuild [YYYY-MM-DD]
+"""
+import sys
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import DecisionRollup
+
+COUNTERS = (
+    "orchestrated",
+    "auto_resolved",
+    "escalated",
+    "overrides",
+    "confidence_sum",
+    "human_approved",
+    "human_rejected",
+)
+
+# Decision.reason of an override escalation (app.core.orchestrator)
+OVERRIDE_REASON_PREFIX = "Escalated due to override:"
+
+
+def _key(payload: dict, day: date | None) -> tuple[str, str, date]:
+    return (
+        payload.get("supplier_id") or "",
+        payload.get("region") or "",
+        day or datetime.utcnow().date(),
+    )
+
+
+class RollupDeltas:
+    """
+    Accumulates counter deltas; flush() applies them with a single INSERT .. ON CONFLICT.
+    """
+
+    def __init__(self):
+        self._deltas: dict[tuple, dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    def add_orchestration(self, payload: dict, out: dict, day: date | None = None) -> None:
+        d = self._deltas[_key(payload, day)]
+        d["orchestrated"] += 1
+        if out["decision"] == "AUTO_RESOLVE":
+            d["auto_resolved"] += 1
+        else:
+            d["escalated"] += 1
+        if (out.get("context") or {}).get("final", {}).get("override"):
+            d["overrides"] += 1
+        d["confidence_sum"] += float(out["confidence"])
+
+    def add_review(self, payload: dict, action: str, day: date | None = None) -> None:
+        d = self._deltas[_key(payload, day)]
+        if action == "APPROVE":
+            d["human_approved"] += 1
+        else:
+            d["human_rejected"] += 1
+
+    def remove_decision(self, payload: dict, decision: str, reason: str, confidence: float, day: date) -> None:
+        """
+        Negative deltas for a deleted Decision row, counted the way the rebuild query counts it.
+        """
+        d = self._deltas[_key(payload, day)]
+        if decision in ("APPROVE", "REJECT"):
+            d["human_approved" if decision == "APPROVE" else "human_rejected"] -= 1
+            return
+        d["orchestrated"] -= 1
+        d["auto_resolved" if decision == "AUTO_RESOLVE" else "escalated"] -= 1
+        if reason.startswith(OVERRIDE_REASON_PREFIX):
+            d["overrides"] -= 1
+        d["confidence_sum"] -= float(confidence)
+
+    def flush(self, db: Session) -> None:
+        if not self._deltas:
+            return
+
+        rows = [
+            {"supplier_id": k[0], "region": k[1], "day": k[2], **counts}
+            for k, counts in self._deltas.items()
+        ]
+        stmt = insert(DecisionRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["supplier_id", "region", "day"],
+            set_={c: getattr(DecisionRollup, c) + getattr(stmt.excluded, c) for c in COUNTERS},
+        )
+        db.execute(stmt)
+        self._deltas.clear()
+
+
+_REBUILD_SQL = text(
+    """
+    INSERT INTO decision_rollups (
+        supplier_id, region, day,
+        orchestrated, auto_resolved, escalated, overrides, confidence_sum,
+        human_approved, human_rejected
+    )
+    SELECT
+        COALESCE(w.payload->>'supplier_id', ''),
+        COALESCE(w.payload->>'region', ''),
+        d.created_at::date,
+        count(*) FILTER (WHERE d.decision IN ('AUTO_RESOLVE', 'ESCALATE')),
+        count(*) FILTER (WHERE d.decision = 'AUTO_RESOLVE'),
+        count(*) FILTER (WHERE d.decision = 'ESCALATE'),
+        count(*) FILTER (WHERE d.reason LIKE 'Escalated due to override:%'),
+        COALESCE(sum(d.confidence) FILTER (WHERE d.decision IN ('AUTO_RESOLVE', 'ESCALATE')), 0),
+        count(*) FILTER (WHERE d.decision = 'APPROVE'),
+        count(*) FILTER (WHERE d.decision = 'REJECT')
+    FROM decisions d
+    JOIN work_items w ON w.id = d.work_item_id
+    WHERE CAST(:since AS date) IS NULL OR d.created_at >= CAST(:since AS date)
+    GROUP BY 1, 2, 3
+    """
+)
+
+
+def rebuild_rollups(db: Session, since: date | None = None) -> int:
+    """
+    Recomputes rollup rows from decisions + work_items: all of them, or only days >= since.
+    Does not commit. A full rebuild loses the days whose partitions retention has archived
+    (app.db.partitions); pass `since` to keep them.
+    """
+    if since is None:
+        db.execute(text("TRUNCATE decision_rollups"))
+    else:
+        db.execute(text("DELETE FROM decision_rollups WHERE day >= :since"), {"since": since})
+    return db.execute(_REBUILD_SQL, {"since": since}).rowcount
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["rebuild"] or len(sys.argv) > 3:
+        print("usage: python -m app.core.rollups rebuild [since YYYY-MM-DD]")
+        sys.exit(2)
+
+    from app.db.session import SessionLocal
+
+    since_day = date.fromisoformat(sys.argv[2]) if len(sys.argv) == 3 else None
+    with SessionLocal() as session:
+        n = rebuild_rollups(session, since_day)
+        session.commit()
+    print(f"Rebuilt {n} rollup rows.")
@@ -0,0 +1,20 @@
+"""
+One JSON codec for the hot paths: JSONB columns, API responses, LLM event encoding.
+orjson is several times faster than the stdlib encoder on the nested payload/context dicts.
+"""
+import orjson
+
+
+def dumps(obj, sort_keys: bool = False) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, option=option)
+
+
+def dumps_str(obj, sort_keys: bool = False) -> str:
+    # SQLAlchemy's json_serializer must return str
+    return dumps(obj, sort_keys=sort_keys).decode()
+
+
+loads = orjson.loads
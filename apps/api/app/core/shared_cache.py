@@ -0,0 +1,220 @@
+"""
+Host-wide caches shared by every worker process, backed by memory-mapped files.
+
+Enable by pointing SHARED_CACHE_DIR at a directory all workers on the host can write,
+ideally tmpfs (e.g. /dev/shm/supplychain-cache). Without it nothing is shared and each
+cache falls back to its per-process behaviour (see app.ai.embeddings / app.ai.llm_agent).
+
+Each cache is one file: a fixed-size, set-associative hash table.
+- Keys are hashed (blake2b, 16 bytes) to a set of SHARED_CACHE_WAYS slots. A put reuses the
+  key's slot, else an empty or stale one, else evicts the least recently used slot of the set.
+- Slots have a fixed size, so memory is bounded by the file size whatever the worker count;
+  values that don't fit are simply not cached.
+- Concurrency: one lock per stripe of sets, a threading.Lock inside the process plus an fcntl
+  byte-range lock across processes. Readers never see a half-written slot.
+- invalidate() bumps a generation counter in the file header; entries written under an older
+  generation read as misses. Optional TTL bounds staleness for writes made on other hosts.
+
+The layout (slot count/size) is checked on open: a file written with other settings is
+replaced, and workers still mapping the old file keep using it until they restart.
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from hashlib import blake2b
+from pathlib import Path
+from time import time
+
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")
+SHARED_CACHE_WAYS = int(os.getenv("SHARED_CACHE_WAYS", "8"))
+
+_MAGIC = b"SCC1"
+# magic, slots, slot_bytes, ways, generation
+_HEADER = struct.Struct("<4sIIIQ")
+_HEADER_BYTES = 64
+# key digest, generation, stored_at, last_used, value length
+_SLOT = struct.Struct("<16sQddI")
+_SLOT_HEADER_BYTES = 48
+_EMPTY_DIGEST = bytes(16)
+_STRIPES = 32
+# fcntl lock offsets: one byte per stripe, then the header (generation) lock
+_GENERATION_LOCK = _STRIPES
+
+
+class SharedCache:
+    """
+    get/put/invalidate on bytes keys and values. Thread- and process-safe. Callers record
+    hit/miss metrics under their own cache name.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: str | Path,
+        slots: int,
+        slot_bytes: int,
+        ways: int = SHARED_CACHE_WAYS,
+        ttl_seconds: float = 0,
+    ):
+        if slot_bytes <= _SLOT_HEADER_BYTES:
+            raise ValueError(f"slot_bytes must be > {_SLOT_HEADER_BYTES}")
+        self.name = name
+        self.ways = max(1, ways)
+        self.sets = max(1, slots // self.ways)
+        self.slots = self.sets * self.ways
+        self.slot_bytes = slot_bytes
+        self.max_value_bytes = slot_bytes - _SLOT_HEADER_BYTES
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(directory) / f"{name}.cache"
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+        self._generation_lock = threading.Lock()
+        self._fd, self._mm = self._open()
+
+    # ---------- file ----------
+    def _open(self) -> tuple[int, mmap.mmap]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = _HEADER_BYTES + self.slots * self.slot_bytes
+        expected = (_MAGIC, self.slots, self.slot_bytes, self.ways)
+
+        # Creation and layout checks are serialized by a lock file that is never replaced
+        with open(self.path.with_suffix(".lock"), "wb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            current = os.pread(fd, _HEADER.size, 0)
+            if len(current) == _HEADER.size and _HEADER.unpack(current)[:4] == expected:
+                return fd, mmap.mmap(fd, size)
+
+            if current:
+                # Written with another layout: start a new file, old mappings keep the old one
+                os.close(fd)
+                os.unlink(self.path)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            os.ftruncate(fd, size)
+            mm = mmap.mmap(fd, size)
+            _HEADER.pack_into(mm, 0, *expected, 1)
+            return fd, mm
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    # ---------- locking ----------
+    def _stripe(self, set_index: int):
+        return _StripeLock(self._fd, self._locks[set_index % _STRIPES], set_index % _STRIPES)
+
+    @property
+    def generation(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[4]
+
+    # ---------- cache ----------
+    def _locate(self, key: bytes) -> tuple[bytes, int]:
+        digest = blake2b(key, digest_size=16).digest()
+        return digest, int.from_bytes(digest[:8], "little") % self.sets
+
+    def _slot_offset(self, set_index: int, way: int) -> int:
+        return _HEADER_BYTES + (set_index * self.ways + way) * self.slot_bytes
+
+    def _live(self, generation: int, stored_at: float, current_generation: int, now: float) -> bool:
+        if generation != current_generation:
+            return False
+        return not self.ttl_seconds or now - stored_at <= self.ttl_seconds
+
+    def get(self, key: bytes) -> bytes | None:
+        digest, set_index = self._locate(key)
+        value = None
+        with self._stripe(set_index):
+            current_generation = self.generation
+            now = time()
+            for way in range(self.ways):
+                offset = self._slot_offset(set_index, way)
+                slot_digest, generation, stored_at, _, length = _SLOT.unpack_from(self._mm, offset)
+                if slot_digest != digest:
+                    continue
+                if self._live(generation, stored_at, current_generation, now):
+                    struct.pack_into("<d", self._mm, offset + 32, now)
+                    start = offset + _SLOT_HEADER_BYTES
+                    value = self._mm[start : start + length]
+                break
+        return value
+
+    def put(self, key: bytes, value: bytes) -> None:
+        if len(value) > self.max_value_bytes:
+            return
+        digest, set_index = self._locate(key)
+        with self._stripe(set_index):
+            current_generation = self.generation
+            now = time()
+            victim, victim_used = None, None
+            for way in range(self.ways):
+                offset = self._slot_offset(set_index, way)
+                slot_digest, generation, stored_at, last_used, _ = _SLOT.unpack_from(self._mm, offset)
+                if slot_digest == digest or slot_digest == _EMPTY_DIGEST:
+                    victim = offset
+                    break
+                # stale entries go first, then the least recently used
+                used = last_used if self._live(generation, stored_at, current_generation, now) else -1.0
+                if victim_used is None or used < victim_used:
+                    victim, victim_used = offset, used
+
+            start = victim + _SLOT_HEADER_BYTES
+            self._mm[start : start + len(value)] = value
+            _SLOT.pack_into(self._mm, victim, digest, current_generation, now, now, len(value))
+
+    def invalidate(self) -> None:
+        """
+        Drops every entry, for every process on the host (entries are not erased, they just
+        stop matching the generation).
+        """
+        with _StripeLock(self._fd, self._generation_lock, _GENERATION_LOCK):
+            _HEADER.pack_into(self._mm, 0, _MAGIC, self.slots, self.slot_bytes, self.ways, self.generation + 1)
+
+
+class _StripeLock:
+    """
+    threading.Lock for this process + fcntl lock on one byte for the others (fcntl locks
+    belong to the process, so they don't exclude this process's own threads).
+    """
+
+    __slots__ = ("fd", "lock", "offset")
+
+    def __init__(self, fd: int, lock: threading.Lock, offset: int):
+        self.fd = fd
+        self.lock = lock
+        self.offset = offset
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, self.offset)
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc):
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.offset)
+        finally:
+            self.lock.release()
+
+
+_caches: dict[str, SharedCache] = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(name: str, slots: int, slot_bytes: int, ttl_seconds: float = 0) -> SharedCache | None:
+    """
+    The named cache of this process, opened on first use; None when SHARED_CACHE_DIR is unset
+    or the cache is sized to 0.
+    """
+    if not SHARED_CACHE_DIR or slots <= 0:
+        return None
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = SharedCache(name, SHARED_CACHE_DIR, slots, slot_bytes, ttl_seconds=ttl_seconds)
+                _caches[name] = cache
+    return cache
@@ -0,0 +1,54 @@
+"""
+In-process single-flight: concurrent calls for the same key share one execution.
+
+Covers callers inside one worker (no DB round trip needed to find out a run is already
+in progress). Across workers, /run relies on the work item's row lock instead.
+"""
+from threading import Event, Lock
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: float | None = None) -> tuple[T, bool]:
+        """
+        Returns (result, shared). The first caller for `key` runs fn; callers arriving while
+        it runs wait for it and get the same result (or exception) with shared=True.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise TimeoutError(f"in-flight call for {key!r} did not finish in {timeout}s")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
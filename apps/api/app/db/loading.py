@@ -0,0 +1,265 @@
+"""
+Loading profiles for WorkItem.
+
+WorkItem.decisions is lazy="raise_on_sql", so every caller picks how many decisions it needs
+up front and pays exactly one round trip for it:
+
+- load_work_item:                         the row only
+- lock_work_item:                         the row, locked FOR UPDATE (single review, claim release)
+- load_work_item_version:                 just the row version (ETag checks)
+- load_work_item_with_latest_decision:    row + newest decision (idempotent re-runs)
+- claim_work_item_for_run:                same, with the work_items row locked (FOR UPDATE)
+- load_work_item_with_history:            row + all decisions oldest->newest (trace)
+- load_agent_trace:                       latest run's agent_results rows as trace dicts
+- claim_next_escalated:                   most urgent unclaimed ESCALATED row, leased to a reviewer
+- lock_review_targets:                    the rows a bulk review applies to, locked (FOR UPDATE)
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, true, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from app.core.agents import ReasonCode
+from app.db.models import AgentResultRecord, Decision, WorkItem
+
+
+def load_work_item(db: Session, work_item_id: uuid.UUID) -> WorkItem | None:
+    return db.get(WorkItem, work_item_id)
+
+
+def lock_work_item(db: Session, work_item_id: uuid.UUID) -> WorkItem | None:
+    """
+    The row locked until the caller commits, for writers that check then update it (review,
+    claim release): the checks can't be invalidated by a concurrent claim or bulk review.
+    """
+    # populate_existing: a locked read must not be answered from the identity map
+    stmt = (
+        select(WorkItem)
+        .where(WorkItem.id == work_item_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def load_work_item_version(db: Session, work_item_id: uuid.UUID) -> int | None:
+    # Version probe for conditional GETs: touches neither payload nor context
+    return db.execute(select(WorkItem.version).where(WorkItem.id == work_item_id)).scalar_one_or_none()
+
+
+class WorkItemLocked(Exception):
+    """Another transaction held the work item's row lock for longer than we were willing to wait."""
+
+
+def load_work_item_with_latest_decision(
+    db: Session, work_item_id: uuid.UUID, lock: str | None = None
+) -> tuple[WorkItem | None, Decision | None]:
+    """
+    lock: None, "nowait" (FOR UPDATE NOWAIT) or "wait" (FOR UPDATE, bounded by lock_timeout).
+    Only the work_items row is locked, not the decision.
+    """
+    latest = (
+        select(Decision)
+        .where(Decision.work_item_id == WorkItem.id)
+        .order_by(Decision.created_at.desc())
+        .limit(1)
+        .lateral()
+    )
+    latest_decision = aliased(Decision, latest)
+
+    stmt = select(WorkItem, latest_decision).outerjoin(latest, true()).where(WorkItem.id == work_item_id)
+    if lock is not None:
+        # populate_existing: a locked read must not be answered from the identity map
+        stmt = stmt.with_for_update(of=WorkItem, nowait=lock == "nowait").execution_options(
+            populate_existing=True
+        )
+
+    row = db.execute(stmt).first()
+
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
+def _lock_not_available(e: OperationalError) -> bool:
+    # 55P03 lock_not_available: NOWAIT conflict or lock_timeout expiry
+    return getattr(e.orig, "sqlstate", None) == "55P03"
+
+
+def claim_work_item_for_run(
+    db: Session, work_item_id: uuid.UUID, wait_seconds: float
+) -> tuple[WorkItem | None, Decision | None]:
+    """
+    Row-locks the work item for an orchestration run; the lock is held until the caller
+    commits or rolls back. Uncontended this is one statement (NOWAIT). If another worker
+    holds the lock (a run in flight), waits up to wait_seconds for it to finish and returns
+    the row as that run left it, so the caller can serve the stored decision.
+    Raises WorkItemLocked if the wait times out.
+    """
+    try:
+        return load_work_item_with_latest_decision(db, work_item_id, lock="nowait")
+    except OperationalError as e:
+        if not _lock_not_available(e):
+            raise
+        db.rollback()
+
+    db.execute(select(func.set_config("lock_timeout", f"{int(wait_seconds * 1000)}ms", True)))
+    try:
+        claimed = load_work_item_with_latest_decision(db, work_item_id, lock="wait")
+    except OperationalError as e:
+        if not _lock_not_available(e):
+            raise
+        db.rollback()
+        raise WorkItemLocked(str(work_item_id)) from e
+
+    # The timeout bounds this wait only: the caller's writes later in the transaction must
+    # not fail on it (0 = no timeout, the server default)
+    db.execute(select(func.set_config("lock_timeout", "0", True)))
+    return claimed
+
+
+def load_work_item_with_history(db: Session, work_item_id: uuid.UUID) -> WorkItem | None:
+    return (
+        db.execute(
+            select(WorkItem)
+            .options(joinedload(WorkItem.decisions))
+            .where(WorkItem.id == work_item_id)
+        )
+        .unique()
+        .scalar_one_or_none()
+    )
+
+
+def load_agent_trace(db: Session, work_item_id: uuid.UUID) -> list[dict]:
+    """
+    Rebuilds context["agent_trace"] for the latest orchestration run from agent_results
+    (used when STORE_AGENT_TRACE_IN_CONTEXT=0). Reasons come back as their code names.
+    """
+    latest_decision_id = (
+        select(AgentResultRecord.decision_id)
+        .where(AgentResultRecord.work_item_id == work_item_id)
+        .order_by(AgentResultRecord.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(AgentResultRecord)
+        .where(AgentResultRecord.decision_id == latest_decision_id)
+        .order_by(AgentResultRecord.id)
+    ).scalars()
+
+    def _reason(code: int) -> str:
+        try:
+            return ReasonCode(code).name
+        except ValueError:
+            return ReasonCode.UNSPECIFIED.name
+
+    return [
+        {
+            "name": r.agent,
+            "score": r.score,
+            "recommendation": r.recommendation,
+            "reason": _reason(r.reason_code),
+            "reason_code": r.reason_code,
+        }
+        for r in rows
+    ]
+
+
+def claim_next_escalated(
+    db: Session, reviewer: str, lease_seconds: float, now: datetime, region: str | None = None
+) -> WorkItem | None:
+    """
+    Leases the most urgent ESCALATED item (urgency desc, then oldest) to `reviewer` in one
+    statement: the pick walks ix_work_items_review_queue with FOR UPDATE SKIP LOCKED, so
+    concurrent reviewers each get a different row instead of queueing on the same one.
+    Items under another reviewer's unexpired lease are skipped. A reviewer who still holds a
+    live claim gets that item back (lease renewed) even if a more urgent one has arrived
+    since: the claim is looked up first (ix_work_items_review_claims) and the queue is only
+    walked when there is none. Does not commit.
+    """
+    own = (
+        select(WorkItem.id, WorkItem.created_at)
+        .where(
+            WorkItem.status == "ESCALATED",
+            WorkItem.claimed_by == reviewer,
+            WorkItem.claim_expires_at >= now,
+        )
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    pick = (
+        select(WorkItem.id, WorkItem.created_at)
+        .where(
+            WorkItem.status == "ESCALATED",
+            or_(WorkItem.claim_expires_at.is_(None), WorkItem.claim_expires_at < now),
+        )
+        .order_by(WorkItem.urgency.desc(), WorkItem.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if region is not None:
+        own = own.where(WorkItem.payload["region"].astext == region)
+        pick = pick.where(WorkItem.payload["region"].astext == region)
+    own = own.cte("own_claim")
+    # one-time filter: with a live claim the queue is not scanned (nor any row locked) at all
+    pick = pick.where(~select(own.c.id).exists()).cte("next_unclaimed")
+    candidate = (
+        select(own.c.id, own.c.created_at).union_all(select(pick.c.id, pick.c.created_at)).cte("candidate")
+    )
+
+    stmt = (
+        update(WorkItem)
+        .where(WorkItem.id == candidate.c.id, WorkItem.created_at == candidate.c.created_at)
+        .values(
+            claimed_by=reviewer,
+            claim_expires_at=now + timedelta(seconds=lease_seconds),
+            # raw UPDATE: bump the row version ourselves so ETags and stale writers notice
+            version=WorkItem.version + 1,
+            updated_at=now,
+        )
+        .returning(WorkItem)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def lock_review_targets(
+    db: Session,
+    work_item_ids: list[uuid.UUID] | None = None,
+    supplier_id: str | None = None,
+    region: str | None = None,
+    limit: int = 500,
+) -> list[Row]:
+    """
+    One statement for a bulk review: the listed items whatever their status (so the caller can
+    report which ones aren't ESCALATED), or up to `limit` ESCALATED items matching the filter,
+    most urgent first. Listed rows are locked FOR UPDATE, waiting out concurrent reviews;
+    filtered rows use SKIP LOCKED, leaving rows being reviewed right now to their reviewer.
+    Rows carry the columns the review needs, not full WorkItems.
+    """
+    stmt = select(
+        WorkItem.id,
+        WorkItem.created_at,
+        WorkItem.status,
+        WorkItem.payload,
+        WorkItem.claimed_by,
+        WorkItem.claim_expires_at,
+    )
+    if work_item_ids is not None:
+        stmt = stmt.where(WorkItem.id.in_(work_item_ids)).with_for_update()
+    else:
+        stmt = stmt.where(WorkItem.status == "ESCALATED")
+        if supplier_id is not None:
+            stmt = stmt.where(WorkItem.payload["supplier_id"].astext == supplier_id)
+        if region is not None:
+            stmt = stmt.where(WorkItem.payload["region"].astext == region)
+        stmt = (
+            stmt.order_by(WorkItem.urgency.desc(), WorkItem.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    return list(db.execute(stmt))
@@ -0,0 +1,67 @@
+"""
+Explicit schema management.
+
+    python -m app.db.migrate
+
+Run once per deploy (release step / init container) and start the API with FAST_START=1,
+so workers don't issue DDL on every boot.
+"""
+from sqlalchemy import text
+
+from app.db.models import URGENCY_SQL
+from app.db.partitions import (
+    PARTITIONED_TABLES,
+    attach_history,
+    ensure_partitions,
+    prepare_legacy_tables,
+)
+from app.db.session import Base, engine
+
+# Idempotent DDL for tables that create_all() won't alter, applied in order
+MIGRATIONS: list[str] = [
+    # work_items.version: row version behind ETags and the response cache
+    "ALTER TABLE work_items ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    # intake coalescing lookup (NEW items by shipment)
+    "CREATE INDEX IF NOT EXISTS ix_work_items_new_shipment ON work_items ((payload ->> 'shipment_id')) "
+    "WHERE status = 'NEW'",
+    # document ingestion: per-source chunk hashes for incremental re-ingest
+    "ALTER TABLE knowledge_chunks ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_knowledge_chunks_source_hash "
+    "ON knowledge_chunks (source, content_hash) WHERE content_hash IS NOT NULL",
+    # hybrid retrieval: full-text column + GIN index
+    "ALTER TABLE knowledge_chunks ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', chunk_text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_knowledge_chunks_search_tsv ON knowledge_chunks USING gin (search_tsv)",
+    # review queue: urgency score, reviewer lease, partial index over ESCALATED items
+    "ALTER TABLE work_items ADD COLUMN IF NOT EXISTS urgency DOUBLE PRECISION "
+    f"GENERATED ALWAYS AS ({URGENCY_SQL}) STORED NOT NULL",
+    "ALTER TABLE work_items ADD COLUMN IF NOT EXISTS claimed_by VARCHAR(120)",
+    "ALTER TABLE work_items ADD COLUMN IF NOT EXISTS claim_expires_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_work_items_review_queue ON work_items (urgency DESC, created_at) "
+    "WHERE status = 'ESCALATED'",
+    "CREATE INDEX IF NOT EXISTS ix_work_items_review_claims ON work_items (claimed_by) "
+    "WHERE status = 'ESCALATED' AND claimed_by IS NOT NULL",
+]
+
+# Serializes concurrent migrators (several workers booting without FAST_START)
+_MIGRATION_LOCK_ID = 7_340_001
+
+
+def migrate() -> None:
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+        # Pre-partitioning work_items/decisions are set aside first, so create_all() builds
+        # the partitioned parents; the old tables become their history partitions
+        prepare_legacy_tables(conn)
+        Base.metadata.create_all(bind=conn)
+        for table in PARTITIONED_TABLES:
+            attach_history(conn, table)
+            ensure_partitions(conn, table)
+        for stmt in MIGRATIONS:
+            conn.execute(text(stmt))
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Schema is up to date.")
@@ -1,8 +1,21 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text, Column
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -11,6 +24,18 @@ from pgvector.sqlalchemy import Vector
 from app.db.session import Base
 
 
+# Review-queue urgency in [0, 1] from the (validated) event payload, stored on the row so the
+# queue index can order by it:
+#   0.40 * delay (capped at 14 days)
+#   0.35 * missing inventory cover (30+ days of supply = nothing missing)
+#   0.25 * order value (capped at 200k)
+URGENCY_SQL = (
+    "0.40 * LEAST(COALESCE((payload ->> 'delay_days')::float8, 0), 14) / 14"
+    " + 0.35 * (1 - LEAST(COALESCE((payload ->> 'inventory_days_of_supply')::float8, 30), 30) / 30)"
+    " + 0.25 * LEAST(COALESCE((payload ->> 'order_value')::float8, 0), 200000) / 200000"
+)
+
+
 class WorkItem(Base):
     __tablename__ = "work_items"
 
@@ -26,16 +51,74 @@ class WorkItem(Base):
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
     context: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Partition key (app.db.partitions): part of the table's primary key, never updated
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, primary_key=True, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+    # Review queue (GET /review-queue/next): urgency recomputed by Postgres whenever the
+    # payload changes; a claim is a reviewer's lease on an ESCALATED item
+    urgency: Mapped[float] = mapped_column(Float, Computed(URGENCY_SQL, persisted=True))
+    claimed_by: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    claim_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Bumped by the ORM on every UPDATE (status/context changes); drives ETags + response cache.
+    # Raw Core UPDATEs must bump it themselves.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
 
+    # No implicit loading: pick a profile from app.db.loading instead.
+    # No FK behind it (partitioned parent); deleting a work item deletes its rows explicitly.
     decisions: Mapped[list["Decision"]] = relationship(
         "Decision",
+        primaryjoin="foreign(Decision.work_item_id) == WorkItem.id",
         back_populates="work_item",
-        lazy="selectin",
-        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        order_by="Decision.created_at",
     )
 
+    # The ORM identity stays `id`; created_at is only in the table key for partitioning
+    __mapper_args__ = {"version_id_col": version, "primary_key": [id]}
+
+    __table_args__ = (
+        # Intake coalescing: "is there still a NEW item for this shipment?"
+        Index(
+            "ix_work_items_new_shipment",
+            text("(payload ->> 'shipment_id')"),
+            postgresql_where=text("status = 'NEW'"),
+        ),
+        # Review queue: ESCALATED items, most urgent (then oldest) first
+        Index(
+            "ix_work_items_review_queue",
+            text("urgency DESC"),
+            "created_at",
+            postgresql_where=text("status = 'ESCALATED'"),
+        ),
+        # Review queue: a reviewer's live claim, checked before walking the queue
+        Index(
+            "ix_work_items_review_claims",
+            "claimed_by",
+            postgresql_where=text("status = 'ESCALATED' AND claimed_by IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class WorkItemIdempotencyKey(Base):
+    """
+    Maps an intake key (Idempotency-Key header, or shipment_id + updated_eta) to the work item
+    it created or was coalesced into. Keys older than IDEMPOTENCY_KEY_TTL_HOURS are ignored
+    and may be reused.
+    """
+
+    __tablename__ = "work_item_idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    work_item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
 
 class Decision(Base):
     __tablename__ = "decisions"
@@ -46,24 +129,113 @@ class Decision(Base):
         default=uuid.uuid4,
     )
 
-    work_item_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True),
-        ForeignKey("work_items.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
-    )
+    work_item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
 
     decision: Mapped[str] = mapped_column(String(30), nullable=False)
     reason: Mapped[str] = mapped_column(Text, nullable=False)
     confidence: Mapped[float] = mapped_column(Float, nullable=False, default=1.0)
     created_by: Mapped[str | None] = mapped_column(String(120), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Partition key (app.db.partitions)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, primary_key=True, nullable=False
+    )
 
     work_item: Mapped["WorkItem"] = relationship(
         "WorkItem",
+        primaryjoin="foreign(Decision.work_item_id) == WorkItem.id",
         back_populates="decisions",
     )
 
+    agent_results: Mapped[list["AgentResultRecord"]] = relationship(
+        "AgentResultRecord",
+        primaryjoin="foreign(AgentResultRecord.decision_id) == Decision.id",
+        lazy="raise_on_sql",
+        viewonly=True,
+    )
+
+    __mapper_args__ = {"primary_key": [id]}
+
+    __table_args__ = ({"postgresql_partition_by": "RANGE (created_at)"},)
+
+
+class AgentResultRecord(Base):
+    """
+    One row per agent per orchestration run: the normalized, indexable copy of
+    context["agent_trace"]. supplier_id/region are denormalized from the payload so
+    per-supplier/per-region analytics don't need to touch work_items JSONB.
+    """
+
+    __tablename__ = "agent_results"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Plain ids: work_items and decisions are partitioned, so no foreign keys can point at them
+    work_item_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    decision_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+    agent: Mapped[str] = mapped_column(String(50), nullable=False)
+    supplier_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    region: Mapped[str | None] = mapped_column(String(50), nullable=True)
+
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    recommendation: Mapped[str] = mapped_column(String(30), nullable=False)
+    reason_code: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_agent_results_agent_region", "agent", "region"),
+        Index("ix_agent_results_agent_supplier", "agent", "supplier_id"),
+    )
+
+
+class DecisionRollup(Base):
+    """
+    Pre-aggregated decision counts per (supplier_id, region, day), maintained incrementally
+    by app.core.rollups. Dashboards read these instead of scanning work_items.
+    """
+
+    __tablename__ = "decision_rollups"
+
+    supplier_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    region: Mapped[str] = mapped_column(String(50), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    orchestrated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    auto_resolved: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    escalated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    overrides: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confidence_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    human_approved: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    human_rejected: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_decision_rollups_day", "day"),)
+
+
+class BatchScore(Base):
+    """
+    Decisions from the offline scorer (python -m app.core.batch_scoring --to-db), one row per
+    event, grouped by run_id. Written with COPY; not work items, so nothing here is reviewed.
+    """
+
+    __tablename__ = "batch_scores"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+    shipment_id: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    supplier_id: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    region: Mapped[str | None] = mapped_column(String(50), nullable=True)
+
+    decision: Mapped[str] = mapped_column(String(30), nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    reason: Mapped[str] = mapped_column(Text, nullable=False)
+
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    context: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
 
 class KnowledgeChunk(Base):
     __tablename__ = "knowledge_chunks"
@@ -80,4 +252,22 @@ class KnowledgeChunk(Base):
     # Start with 1536 dims (fits common embedding models). We can change later.
     embedding = Column(Vector(1536), nullable=False)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    # sha256 of chunk_text for chunks from document ingestion (NULL for single-chunk /ingest);
+    # a re-ingested document only embeds chunks whose hash isn't stored for its source yet
+    content_hash = Column(String(64), nullable=True)
+
+    # Full-text side of hybrid retrieval (app.ai.retrieval); maintained by Postgres
+    search_tsv = Column(TSVECTOR, Computed("to_tsvector('english', chunk_text)", persisted=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ux_knowledge_chunks_source_hash",
+            "source",
+            "content_hash",
+            unique=True,
+            postgresql_where=text("content_hash IS NOT NULL"),
+        ),
+        Index("ix_knowledge_chunks_search_tsv", "search_tsv", postgresql_using="gin"),
+    )
\ No newline at end of file
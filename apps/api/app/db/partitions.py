@@ -0,0 +1,288 @@
+"""
+Monthly range partitioning of work_items and decisions by created_at, plus retention.
+
+    python -m app.db.partitions status
+    python -m app.db.partitions maintain [--retention-months 24] [--archive-dir /backups/partitions]
+
+Layout per table (e.g. work_items):
+- work_items_history:  FROM (MINVALUE) TO (<first managed month>): rows older than the monthly
+                       partitions. An existing unpartitioned table becomes this partition.
+- work_items_p2026_11: FROM ('2026-11-01') TO ('2026-12-01'), one per month, created
+                       PARTITION_PREMAKE_MONTHS ahead by migrate() and by `maintain`.
+
+Queries that bound created_at (replay --since, simulations report) only touch the matching
+partitions; primary-key lookups probe each partition's (id, created_at) index, which
+retention keeps to a bounded number.
+
+Retention (`maintain`): partitions whose upper bound is older than PARTITION_RETENTION_MONTHS
+are detached. With an archive dir they are exported (gzipped CSV with header, via COPY) and
+dropped; without one they are left as standalone tables for manual handling. Expired
+idempotency keys are purged in the same run. Decision rollups are not touched: they keep the
+aggregates of archived months.
+
+Postgres requires the partition key in every unique constraint, so both tables have
+PRIMARY KEY (id, created_at), and rows referencing them (decisions, agent_results,
+idempotency keys) carry plain indexed ids instead of foreign keys.
+"""
+import argparse
+import gzip
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from app.db.session import Base
+
+PARTITIONED_TABLES = ("work_items", "decisions")
+
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+PARTITION_ARCHIVE_DIR = os.getenv("PARTITION_ARCHIVE_DIR", "")
+# Detaching takes an ACCESS EXCLUSIVE lock on the parent; don't queue behind long queries
+PARTITION_LOCK_TIMEOUT_MS = int(os.getenv("PARTITION_LOCK_TIMEOUT_MS", "5000"))
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, 1)
+
+
+def add_months(ts: datetime, months: int) -> datetime:
+    index = ts.year * 12 + ts.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _parse_bound(value: str) -> datetime | None:
+    if value == "MINVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}).scalar()
+    return relkind == "p"
+
+
+def list_partitions(conn: Connection, table: str) -> list[tuple[str, datetime | None, datetime]]:
+    """
+    (name, lower, upper) oldest first; lower is None for the MINVALUE (history) partition.
+    """
+    rows = conn.execute(
+        text(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:t)
+            """
+        ),
+        {"t": table},
+    ).all()
+    out = []
+    for name, bound in rows:
+        m = _BOUND.search(bound or "")
+        if m:
+            out.append((name, _parse_bound(m.group(1)), _parse_bound(m.group(2))))
+    return sorted(out, key=lambda p: p[2])
+
+
+# =============================
+# MIGRATION: unpartitioned -> partitioned
+# =============================
+def prepare_legacy_tables(conn: Connection) -> None:
+    """
+    Runs before create_all(): an unpartitioned table is set aside as <table>_history (its
+    foreign keys and primary key dropped, indexes renamed) so create_all() creates the
+    partitioned parent; attach_history() then attaches it. No-op once converted.
+    """
+    for table in PARTITIONED_TABLES:
+        relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}).scalar()
+        if relkind != "r":
+            continue
+
+        fks = conn.execute(
+            text(
+                """
+                SELECT conrelid::regclass::text, conname FROM pg_constraint
+                WHERE contype IN ('f', 'p')
+                  AND (conrelid = to_regclass(:t) OR confrelid = to_regclass(:t))
+                ORDER BY contype = 'p'
+                """
+            ),
+            {"t": table},
+        ).all()
+        for owner, name in fks:
+            conn.execute(text(f'ALTER TABLE {owner} DROP CONSTRAINT "{name}"'))
+
+        indexes = conn.execute(
+            text("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = to_regclass(:t)"),
+            {"t": table},
+        ).scalars()
+        for index in list(indexes):
+            conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{(index + "_history")[:63]}"'))
+
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_history"))
+
+
+def _add_missing_columns(conn: Connection, table: str, history: str) -> None:
+    """
+    ATTACH requires the partition to have every column of the parent: columns added to the
+    model since the legacy table was last migrated are added here, as the model declares them.
+    """
+    existing = set(
+        conn.execute(
+            text(
+                "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(:t) AND attnum > 0 AND NOT attisdropped"
+            ),
+            {"t": history},
+        ).scalars()
+    )
+    for column in Base.metadata.tables[table].columns:
+        if column.name not in existing:
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {history} ADD COLUMN {ddl}"))
+
+
+def attach_history(conn: Connection, table: str, now: datetime | None = None) -> None:
+    """
+    Runs after create_all(): makes sure `table` has its MINVALUE partition, either the
+    set-aside legacy table (bounded just past its newest row) or a new empty one.
+    """
+    if list_partitions(conn, table):
+        return
+
+    history = f"{table}_history"
+    exists = conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": history}).scalar()
+    upper = month_start(now or datetime.utcnow())
+    if exists:
+        _add_missing_columns(conn, table, history)
+        newest = conn.execute(text(f"SELECT max(created_at) FROM {history}")).scalar()
+        if newest is not None:
+            upper = max(upper, add_months(month_start(newest), 1))
+        conn.execute(
+            text(f"ALTER TABLE {table} ATTACH PARTITION {history} FOR VALUES FROM (MINVALUE) TO ('{upper:%Y-%m-%d}')")
+        )
+    else:
+        conn.execute(
+            text(f"CREATE TABLE {history} PARTITION OF {table} FOR VALUES FROM (MINVALUE) TO ('{upper:%Y-%m-%d}')")
+        )
+
+
+def ensure_partitions(
+    conn: Connection, table: str, months_ahead: int = PARTITION_PREMAKE_MONTHS, now: datetime | None = None
+) -> list[str]:
+    """
+    Creates the monthly partitions after the newest existing one, up to and including the
+    month `months_ahead` months from now. Returns the names created.
+    """
+    partitions = list_partitions(conn, table)
+    if not partitions:
+        raise RuntimeError(f"{table} has no partitions; run migrate() first")
+
+    start = partitions[-1][2]
+    last = add_months(month_start(now or datetime.utcnow()), months_ahead)
+    created = []
+    while start <= last:
+        end = add_months(start, 1)
+        name = f"{table}_p{start:%Y_%m}"
+        conn.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+        )
+        created.append(name)
+        start = end
+    return created
+
+
+# =============================
+# RETENTION
+# =============================
+def _export(conn: Connection, partition: str, archive_dir: Path) -> Path:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f"{partition}.csv.gz"
+    tmp = path.with_suffix(".gz.tmp")
+    cursor = conn.connection.driver_connection.cursor()
+    with gzip.open(tmp, "wb") as out, cursor.copy(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)") as copy:
+        for block in copy:
+            out.write(block)
+    shutil.move(tmp, path)
+    return path
+
+
+def detach_expired(
+    conn: Connection, table: str, cutoff: datetime, archive_dir: Path | None = None
+) -> list[dict]:
+    """
+    Detaches every partition of `table` whose rows are all older than `cutoff`; with
+    archive_dir, exports and drops it. Returns one entry per partition handled.
+    """
+    conn.execute(text(f"SET LOCAL lock_timeout = {PARTITION_LOCK_TIMEOUT_MS}"))
+    handled = []
+    for name, _lower, upper in list_partitions(conn, table):
+        if upper > cutoff:
+            break
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        entry = {"table": table, "partition": name, "upper": upper.date().isoformat(), "archive": None}
+        if archive_dir is not None:
+            entry["archive"] = str(_export(conn, name, archive_dir))
+            conn.execute(text(f"DROP TABLE {name}"))
+        handled.append(entry)
+    return handled
+
+
+def purge_expired_idempotency_keys(conn: Connection, now: datetime | None = None) -> int:
+    from app.core.intake import IDEMPOTENCY_KEY_TTL_HOURS
+
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    return conn.execute(
+        text("DELETE FROM work_item_idempotency_keys WHERE created_at < :cutoff"), {"cutoff": cutoff}
+    ).rowcount
+
+
+def maintain(
+    conn: Connection,
+    retention_months: int = PARTITION_RETENTION_MONTHS,
+    archive_dir: Path | None = None,
+    now: datetime | None = None,
+) -> dict:
+    now = now or datetime.utcnow()
+    report = {"created": [], "detached": [], "idempotency_keys_purged": 0}
+    for table in PARTITIONED_TABLES:
+        report["created"] += ensure_partitions(conn, table, now=now)
+        if retention_months > 0:
+            cutoff = add_months(month_start(now), -retention_months)
+            report["detached"] += detach_expired(conn, table, cutoff, archive_dir)
+    report["idempotency_keys_purged"] = purge_expired_idempotency_keys(conn, now)
+    return report
+
+
+if __name__ == "__main__":
+    from app.core.serialization import dumps_str
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Partition maintenance for work_items/decisions.")
+    parser.add_argument("command", choices=("status", "maintain"))
+    parser.add_argument("--retention-months", type=int, default=PARTITION_RETENTION_MONTHS,
+                        help="0 = keep everything")
+    parser.add_argument("--archive-dir", default=PARTITION_ARCHIVE_DIR or None,
+                        help="export + drop detached partitions here (default: detach only)")
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        if args.command == "status":
+            result = {
+                table: [
+                    {"partition": name, "from": lower and lower.date().isoformat(), "to": upper.date().isoformat()}
+                    for name, lower, upper in list_partitions(connection, table)
+                ]
+                for table in PARTITIONED_TABLES
+            }
+        else:
+            archive = Path(args.archive_dir) if args.archive_dir else None
+            result = maintain(connection, args.retention_months, archive)
+    print(dumps_str(result))
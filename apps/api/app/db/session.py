@@ -1,23 +1,136 @@
 import os
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic, perf_counter
+
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
+from app.core.serialization import dumps_str, loads
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long callers waited for a connection.
+    Long waits mean the pool is saturated (raise pool_size or shed load).
+    """
+
+    engine_label = "primary"
+
+    def _do_get(self):
+        t0 = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(engine=self.engine_label).observe(perf_counter() - t0)
+
+
+def _timed_pool(label: str) -> type[TimedQueuePool]:
+    # A subclass (not an instance attribute) so the label survives pool.recreate() on dispose
+    return type(f"TimedQueuePool_{label}", (TimedQueuePool,), {"engine_label": label})
+
+
+def _engine_settings(prefix: str) -> dict:
+    """
+    Per-engine pool settings (DB_POOL_SIZE / DB_REPLICA_POOL_SIZE, ...) plus the JSON codec.
+    """
+    return {
+        "pool_size": int(os.getenv(f"{prefix}_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv(f"{prefix}_MAX_OVERFLOW", "10")),
+        "pool_recycle": int(os.getenv(f"{prefix}_POOL_RECYCLE", "-1")),
+        "pool_timeout": float(os.getenv(f"{prefix}_POOL_TIMEOUT", "30")),
+        # orjson for payload/context JSONB in both directions
+        "json_serializer": dumps_str,
+        "json_deserializer": loads,
+    }
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", "")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    poolclass=_timed_pool("primary"),
+    **_engine_settings("DB"),
+)
+
+# expire_on_commit=False: sessions are per request, and reading wi.status after commit
+# shouldn't cost another SELECT of the whole row (context JSONB included)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+
+# =============================
+# READ REPLICA (optional)
+# =============================
+# Read-only endpoints go to the replica while its replay lag is within tolerance,
+# otherwise (lagging, unreachable, not configured) they fall back to the primary.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "2"))
+
+read_engine = (
+    create_engine(
+        DATABASE_REPLICA_URL,
+        pool_pre_ping=True,
+        poolclass=_timed_pool("replica"),
+        **_engine_settings("DB_REPLICA"),
+    )
+    if DATABASE_REPLICA_URL
+    else None
+)
+
+ReadSessionLocal = (
+    sessionmaker(bind=read_engine, autoflush=False, autocommit=False, expire_on_commit=False)
+    if read_engine is not None
+    else None
+)
+
+# Lag = 0 when the replica has replayed everything it received (an idle primary would
+# otherwise look "behind" by the time since its last commit).
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+             WHEN NOT pg_is_in_recovery() THEN 0
+             WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+             ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END
+    """
+)
+
+_replica_state = {"usable": False, "lag_seconds": None, "checked_at": float("-inf"), "error": None}
+_replica_lock = Lock()
+
+
+def _replica_usable() -> bool:
+    if read_engine is None:
+        return False
+
+    if monotonic() - _replica_state["checked_at"] < REPLICA_CHECK_INTERVAL_SECONDS:
+        return _replica_state["usable"]
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    with _replica_lock:
+        # another thread may have refreshed while we waited
+        if monotonic() - _replica_state["checked_at"] < REPLICA_CHECK_INTERVAL_SECONDS:
+            return _replica_state["usable"]
+        try:
+            with read_engine.connect() as conn:
+                lag = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0.0)
+            _replica_state.update(usable=lag <= REPLICA_MAX_LAG_SECONDS, lag_seconds=lag, error=None)
+        except Exception as e:
+            _replica_state.update(usable=False, lag_seconds=None, error=type(e).__name__)
+        _replica_state["checked_at"] = monotonic()
+        return _replica_state["usable"]
 
 
 def init_db() -> None:
-    # Runs on startup
-    with engine.begin() as conn:
-        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
-    Base.metadata.create_all(bind=engine)
+    # Runs on startup unless FAST_START=1 (then `python -m app.db.migrate` owns the schema)
+    from app.db.migrate import migrate
+
+    migrate()
 
 
 def get_db():
@@ -25,4 +138,64 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def new_read_session() -> Session:
+    # Replica when healthy, primary otherwise
+    return ReadSessionLocal() if _replica_usable() else SessionLocal()
+
+
+def get_read_db():
+    """
+    Dependency for read-only endpoints: replica when healthy, primary otherwise.
+    """
+    db = new_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def read_session(fallback: Session):
+    """
+    Replica session for read-only work done inside a write request (e.g. knowledge retrieval
+    during /run). Without a healthy replica the caller's session is reused as-is, so the
+    request doesn't take a second primary connection.
+    """
+    if not _replica_usable():
+        yield fallback
+        return
+
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _pool_status(eng) -> dict:
+    pool = eng.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "recycle": pool._recycle,
+    }
+
+
+def pool_stats() -> dict:
+    stats = {"primary": _pool_status(engine)}
+    if read_engine is not None:
+        _replica_usable()
+        stats["replica"] = {
+            **_pool_status(read_engine),
+            "usable": _replica_state["usable"],
+            "lag_seconds": _replica_state["lag_seconds"],
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "error": _replica_state["error"],
+        }
+    return stats
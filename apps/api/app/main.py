@@ -1,17 +1,24 @@
-from fastapi import FastAPI
+import os
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.health import router as health_router
 from app.api.routes.work_items import router as work_items_router
 from app.api.routes.knowledge import router as knowledge_router
 from app.api.routes.portfolio import router as portfolio_router
+from app.api.routes.review_queue import router as review_queue_router
 
 
+from app.core.metrics import PrometheusMiddleware, render_latest
 from app.db.session import init_db
 
 app = FastAPI(
     title="Supply Chain AI Orchestrator",
     version="0.1.0",
-    description="Decision automation + escalation (human-in-the-loop) for supply chain exceptions."
+    description="Decision automation + escalation (human-in-the-loop) for supply chain exceptions.",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -20,22 +27,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
+app.add_middleware(PrometheusMiddleware)
+
+
+@app.exception_handler(StaleDataError)
+def _stale_work_item(request: Request, exc: StaleDataError):
+    # version_id_col mismatch: the row changed between our read and our write
+    return ORJSONResponse(
+        status_code=409, content={"detail": "WorkItem was modified concurrently; reload and retry"}
+    )
+
+
+# FAST_START=1: schema is managed by `python -m app.db.migrate`, so workers skip DDL on boot
+FAST_START = os.getenv("FAST_START", "").lower() in {"1", "true", "yes"}
+
 
 @app.on_event("startup")
 def _startup():
-    init_db()
+    if not FAST_START:
+        init_db()
 
 app.include_router(health_router)
 app.include_router(work_items_router)
 app.include_router(knowledge_router)   # 👈 THIS LINE IS REQUIRED
 app.include_router(portfolio_router)
+app.include_router(review_queue_router)
 
 
 @app.get("/version", tags=["meta"])
 def version():
     return {"version": app.version, "service": app.title}
 
+@app.get("/metrics", tags=["meta"], include_in_schema=False)
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/healthz")
 def healthz():
     return {"status": "ok"}
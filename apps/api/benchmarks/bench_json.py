@@ -0,0 +1,109 @@
+"""
+JSON codec throughput: stdlib json + pydantic response models vs the orjson path.
+
+    PYTHONPATH=. python benchmarks/bench_json.py [--seconds 1.0] [--trace-entries 4]
+
+Measures, per work item:
+- jsonb encode/decode   (what SQLAlchemy does for payload/context on write/read)
+- GET response          (model construction + validation + serialization vs dict -> orjson)
+- LLM event encoding    (two json.dumps calls per evaluate() vs one orjson call)
+"""
+import argparse
+import json
+import uuid
+from time import perf_counter
+
+from app.api.routes.work_items import WorkItemResponse
+from app.core.serialization import dumps, dumps_str, loads
+
+
+def _sample(trace_entries: int) -> tuple[dict, dict]:
+    payload = {
+        "shipment_id": "T-1001",
+        "supplier_id": "SUP-001",
+        "original_eta": "2026-03-01",
+        "updated_eta": "2026-03-04",
+        "delay_days": 3,
+        "inventory_days_of_supply": 5,
+        "order_value": 80000.0,
+        "region": "US-CENTRAL",
+        "priority_flag": False,
+    }
+    context = {
+        "agent_trace": [
+            {
+                "name": f"Agent{i}",
+                "score": 0.25 + i / 100,
+                "recommendation": "ESCALATE" if i % 2 else "AUTO_RESOLVE",
+                "reason": "delay_days=3 (high) | inventory_days=5 (low) " * 4,
+            }
+            for i in range(trace_entries)
+        ],
+        "final": {
+            "decision": "ESCALATE",
+            "votes_escalate": 3,
+            "weighted_escalate_score": 3.5,
+            "avg_score": 0.71,
+            "llm_enabled": True,
+        },
+    }
+    return payload, context
+
+
+def _rate(fn, seconds: float) -> float:
+    n = 0
+    t0 = perf_counter()
+    deadline = t0 + seconds
+    while perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        n += 100
+    return n / (perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--trace-entries", type=int, default=4)
+    args = parser.parse_args()
+
+    payload, context = _sample(args.trace_entries)
+    wi_id = str(uuid.uuid4())
+    ctx_json = json.dumps(context)
+
+    cases = [
+        (
+            "jsonb encode (context)",
+            lambda: json.dumps(context),
+            lambda: dumps_str(context),
+        ),
+        (
+            "jsonb decode (context)",
+            lambda: json.loads(ctx_json),
+            lambda: loads(ctx_json),
+        ),
+        (
+            "GET /work-items/{id} body",
+            lambda: WorkItemResponse(
+                id=wi_id, type="SHIPMENT_DELAY", status="ESCALATED", payload=payload, context=context
+            ).model_dump_json(),
+            lambda: dumps(
+                {"id": wi_id, "type": "SHIPMENT_DELAY", "status": "ESCALATED", "payload": payload, "context": context}
+            ),
+        ),
+        (
+            "LLM event encoding",
+            lambda: (json.dumps(payload, sort_keys=True), json.dumps(payload, indent=2)),
+            lambda: dumps_str(payload, sort_keys=True),
+        ),
+    ]
+
+    print(f"{'case':<28}{'before ops/s':>15}{'after ops/s':>15}{'speedup':>10}")
+    for name, before, after in cases:
+        b = _rate(before, args.seconds)
+        a = _rate(after, args.seconds)
+        print(f"{name:<28}{b:>15,.0f}{a:>15,.0f}{a / b:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Orchestrator throughput: events/sec on one core, deterministic path (no LLM, no DB).
+
+    PYTHONPATH=. python benchmarks/bench_orchestrator.py [--seconds 2.0]
+
+Cases, over the simulation scenario set:
+- baseline: orchestrate() as it was before the shared pipeline (orchestrator_baseline.py)
+- fresh:  a new Orchestrator (and agents) per event, the allocation pattern orchestrate()
+          had before the shared pipeline
+- shared: orchestrate(), i.e. the module's Orchestrator reused for every event
+- batch:  orchestrate_batch() over the whole scenario list
+
+DISABLE_LLM is forced so the numbers measure the agents, planner and voting only.
+"""
+import argparse
+import os
+
+os.environ["DISABLE_LLM"] = "1"
+
+from time import perf_counter  # noqa: E402
+
+import orchestrator_baseline  # noqa: E402
+from app.core.orchestrator import Orchestrator, orchestrate, orchestrate_batch  # noqa: E402
+from app.core.scenarios import SCENARIOS  # noqa: E402
+
+
+def _rate(fn, events_per_call: int, seconds: float) -> float:
+    n = 0
+    t0 = perf_counter()
+    deadline = t0 + seconds
+    while perf_counter() < deadline:
+        for _ in range(20):
+            fn()
+        n += 20 * events_per_call
+    return n / (perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    def baseline():
+        for event in SCENARIOS:
+            orchestrator_baseline.orchestrate(event, None)
+
+    def fresh():
+        for event in SCENARIOS:
+            Orchestrator().evaluate(event, None)
+
+    def shared():
+        for event in SCENARIOS:
+            orchestrate(event, None)
+
+    cases = [
+        ("baseline (previous orchestrate)", baseline, len(SCENARIOS)),
+        ("fresh Orchestrator per event", fresh, len(SCENARIOS)),
+        ("shared (orchestrate)", shared, len(SCENARIOS)),
+        ("orchestrate_batch", lambda: orchestrate_batch(SCENARIOS, None), len(SCENARIOS)),
+    ]
+
+    print(f"{'case':<32}{'events/s/core':>15}")
+    for name, fn, per_call in cases:
+        print(f"{name:<32}{_rate(fn, per_call, args.seconds):>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
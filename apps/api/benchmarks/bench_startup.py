@@ -0,0 +1,72 @@
+"""
+Worker cold-start benchmark.
+
+    DATABASE_URL=... python benchmarks/bench_startup.py [--runs 7]
+
+Each run is a fresh interpreter that imports app.main and runs the startup hooks, i.e. what a
+new uvicorn worker pays before it can accept traffic. Modes:
+
+- eager: previous behaviour (OpenAI clients built at import + DDL on boot), emulated by
+  building the client before importing the app
+- lazy:  lazy OpenAI client, DDL on boot (default)
+- fast:  lazy OpenAI client, FAST_START=1 (schema owned by `python -m app.db.migrate`)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+CHILD = r"""
+import sys
+from time import perf_counter
+t0 = perf_counter()
+if sys.argv[1] == "eager":
+    from app.ai.clients import get_openai_client
+    get_openai_client()
+from fastapi.testclient import TestClient
+from app.main import app
+t_import = perf_counter()
+with TestClient(app):
+    pass
+t_ready = perf_counter()
+print(f"{(t_import - t0) * 1000:.1f} {(t_ready - t0) * 1000:.1f}")
+"""
+
+
+def _run(mode: str) -> tuple[float, float]:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    env["FAST_START"] = "1" if mode == "fast" else "0"
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        cwd=API_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    # Make sure the schema exists so "fast" measures a real deployment
+    subprocess.run([sys.executable, "-m", "app.db.migrate"], cwd=API_DIR, check=True, capture_output=True)
+
+    print(f"{'mode':<8}{'import ms (p50)':>18}{'ready ms (p50)':>18}{'ready ms (min)':>18}")
+    for mode in ("eager", "lazy", "fast"):
+        samples = [_run(mode) for _ in range(args.runs)]
+        imports = [s[0] for s in samples]
+        ready = [s[1] for s in samples]
+        print(f"{mode:<8}{statistics.median(imports):>18.1f}{statistics.median(ready):>18.1f}{min(ready):>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,512 @@
+"""
+End-to-end load test: the real app under uvicorn, a local Postgres and a stand-in LLM.
+
+    DATABASE_URL=... PYTHONPATH=. python benchmarks/load_test.py
+        [--concurrency 16 | --ramp 4,8,16,32,64] [--step-seconds 20] [--warmup-seconds 3]
+        [--mix create=30,run=30,trace=25,knowledge=10,review=5]
+        [--workers 2] [--llm on|off] [--llm-latency-ms 400] [--llm-jitter-ms 100]
+        [--embed-latency-ms 40] [--seed-knowledge 100] [--url http://host:8000] [--json out.json]
+
+What runs:
+- The LLM stand-in is an OpenAI-compatible HTTP server in this process. It answers
+  /v1/embeddings and /v1/chat/completions after the configured latency (plus uniform jitter),
+  so the app's real client, resilience guard and planner run unchanged. The chat reply is a
+  valid decision, ESCALATE or AUTO_RESOLVE at random.
+- The app is started as `uvicorn app.main:app --workers N` with OPENAI_BASE_URL pointing at the
+  stand-in and PROMETHEUS_MULTIPROC_DIR set, so /metrics covers every worker. With --url the
+  harness drives an already running deployment instead (its own LLM config applies).
+- Each step runs `concurrency` virtual users in a closed loop for warmup + step seconds; only
+  requests started after the warmup are counted. Users pick operations by --mix weight:
+    create     POST /work-items (new shipment each time)
+    run        POST /work-items/{id}/run on an item created earlier (creates one if none)
+    trace      GET  /work-items/{id}/trace on a processed item
+    knowledge  GET  /knowledge/query
+    review     POST /work-items/{id}/review on an ESCALATED item
+  Items are shared between users, so runs, traces and reviews hit what creates produced.
+
+Per step the report has throughput and p50/p95/p99 latency per endpoint, errors (5xx and
+transport failures) and DB pool saturation:
+- checked out: peak connections in use over pool_size + max_overflow, sampled from /health/db
+  (one worker's pool per sample when --workers > 1)
+- checkout wait: mean wait for a pooled connection and the share of checkouts that waited
+  over 10 ms, from the db_pool_checkout_wait_seconds histogram on /metrics
+
+With --ramp the knee is the last step that still raised throughput by 10% without doubling
+the first step's p95: past it, more concurrency only adds queueing.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import zlib
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import monotonic, perf_counter, sleep
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.core.serialization import dumps, dumps_str, loads
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+OPERATIONS = ("create", "run", "trace", "knowledge", "review")
+DEFAULT_MIX = "create=30,run=30,trace=25,knowledge=10,review=5"
+EMBED_DIMS = 1536
+# POOL_WAIT_BUCKETS edge used for the "waited" share
+POOL_WAIT_THRESHOLD = "0.01"
+
+SUPPLIERS = [f"SUP-{i:03d}" for i in range(1, 11)]
+REGIONS = ["US-CENTRAL", "US-EAST", "EU-WEST", "APAC"]
+QUERIES = [
+    "late delivery penalty clause",
+    "expedite approval for low inventory",
+    "customs hold escalation path",
+    "detention fees for containers",
+    "SLA buffer for priority orders",
+]
+
+
+# =============================
+# LLM STAND-IN
+# =============================
+class LlmStandIn:
+    """
+    OpenAI-compatible /v1/embeddings + /v1/chat/completions with configurable latency.
+    """
+
+    def __init__(self, chat_latency_ms: float, jitter_ms: float, embed_latency_ms: float):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if self.path.endswith("/embeddings"):
+                    stand_in._sleep(embed_latency_ms)
+                    reply = stand_in.embeddings(body)
+                elif self.path.endswith("/chat/completions"):
+                    stand_in._sleep(chat_latency_ms)
+                    reply = stand_in.chat(body)
+                else:
+                    self.send_error(404)
+                    return
+                payload = dumps(reply)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.jitter_ms = jitter_ms
+        rng = random.Random(0)
+        self.vectors = [[rng.random() for _ in range(EMBED_DIMS)] for _ in range(64)]
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def _sleep(self, latency_ms: float) -> None:
+        sleep(max(0.0, latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+    def embeddings(self, body: dict) -> dict:
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        # deterministic per text, so repeated queries retrieve the same chunks; vectors come
+        # from a fixed pool so the stand-in doesn't compete with the load generator for CPU
+        data = [
+            {"object": "embedding", "index": i, "embedding": self.vectors[zlib.crc32(str(t).encode()) % len(self.vectors)]}
+            for i, t in enumerate(texts)
+        ]
+        return {"object": "list", "data": data, "model": body["model"], "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+    @staticmethod
+    def chat(body: dict) -> dict:
+        decision = random.choice(["ESCALATE", "AUTO_RESOLVE"])
+        content = dumps_str({"decision": decision, "reason": "load test stand-in", "confidence": 0.7})
+        return {
+            "id": "chatcmpl-loadtest",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def start_app(
+    workers: int, llm: str, llm_base_url: str, metrics_dir: str, log_path: Path
+) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": llm_base_url,
+        "OPENAI_API_KEY": "sk-loadtest",
+        "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+    }
+    if llm == "off":
+        env["DISABLE_LLM"] = "1"
+    else:
+        env.pop("DISABLE_LLM", None)
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=API_DIR,
+        env=env,
+        # the agents log every decision; keep that out of the report
+        stdout=log_path.open("wb"),
+        stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = monotonic() + 120
+    while monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"uvicorn exited with {proc.returncode}, see {log_path}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        sleep(0.25)
+    proc.terminate()
+    raise SystemExit("app did not become healthy within 120s")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# =============================
+# LOAD
+# =============================
+@dataclass
+class StepStats:
+    concurrency: int
+    seconds: float
+    latencies: dict = field(default_factory=lambda: defaultdict(list))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    rejected: dict = field(default_factory=lambda: defaultdict(int))
+    pool_peak: int = 0
+    pool_capacity: int = 0
+
+    def record(self, op: str, latency: float, status: int | None) -> None:
+        if status is None or status >= 500:
+            self.errors[op] += 1
+        elif status >= 400:
+            self.rejected[op] += 1
+        else:
+            self.latencies[op].append(latency)
+
+
+@dataclass
+class SharedItems:
+    new: deque = field(default_factory=deque)
+    processed: deque = field(default_factory=lambda: deque(maxlen=5000))
+    escalated: deque = field(default_factory=deque)
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r} in --mix (use {', '.join(OPERATIONS)})")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, mix: dict[str, float], seed: int):
+        self.client = client
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.items = SharedItems()
+        self.rng = random.Random(seed)
+        self.tag = f"LT{seed:x}"
+        self.seq = 0
+
+    def _event(self) -> dict:
+        self.seq += 1
+        delay = self.rng.randint(0, 7)
+        return {
+            "shipment_id": f"{self.tag}-{self.seq}",
+            "supplier_id": self.rng.choice(SUPPLIERS),
+            "original_eta": "2026-03-01",
+            "updated_eta": f"2026-03-{1 + delay:02d}",
+            "delay_days": delay,
+            "inventory_days_of_supply": self.rng.randint(2, 20),
+            "order_value": round(self.rng.uniform(5_000, 120_000), 2),
+            "region": self.rng.choice(REGIONS),
+            "priority_flag": self.rng.random() < 0.05,
+        }
+
+    async def _timed(self, stats: StepStats | None, op: str, method: str, url: str, **kwargs):
+        t0 = perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+            status = r.status_code
+        except httpx.HTTPError:
+            r, status = None, None
+        if stats is not None:
+            stats.record(op, perf_counter() - t0, status)
+        return r if status is not None and status < 400 else None
+
+    async def create(self, stats):
+        r = await self._timed(stats, "create", "POST", "/work-items", json={"event": self._event()})
+        if r is not None:
+            self.items.new.append(r.json()["id"])
+
+    async def run(self, stats):
+        if not self.items.new:
+            return await self.create(stats)
+        wi_id = self.items.new.popleft()
+        r = await self._timed(stats, "run", "POST", f"/work-items/{wi_id}/run")
+        if r is not None:
+            self.items.processed.append(wi_id)
+            if r.json()["new_status"] == "ESCALATED":
+                self.items.escalated.append(wi_id)
+
+    async def trace(self, stats):
+        if not self.items.processed:
+            return await self.run(stats)
+        wi_id = self.rng.choice(self.items.processed)
+        await self._timed(stats, "trace", "GET", f"/work-items/{wi_id}/trace")
+
+    async def knowledge(self, stats):
+        params = {"query": self.rng.choice(QUERIES), "supplier_id": self.rng.choice(SUPPLIERS), "top_k": 5}
+        await self._timed(stats, "knowledge", "GET", "/knowledge/query", params=params)
+
+    async def review(self, stats):
+        if not self.items.escalated:
+            return await self.run(stats)
+        wi_id = self.items.escalated.popleft()
+        body = {"action": self.rng.choice(["APPROVE", "REJECT"]), "reviewer": "loadtest", "comment": "load test"}
+        await self._timed(stats, "review", "POST", f"/work-items/{wi_id}/review", json=body)
+
+    async def _user(self, stats: StepStats, measure_from: float, until: float) -> None:
+        while (now := monotonic()) < until:
+            op = self.rng.choices(self.ops, self.weights)[0]
+            await getattr(self, op)(stats if now >= measure_from else None)
+
+    async def _sample_pool(self, stats: StepStats, until: float) -> None:
+        while monotonic() < until:
+            try:
+                primary = (await self.client.get("/health/db")).json()["primary"]
+                stats.pool_peak = max(stats.pool_peak, primary["checked_out"])
+                stats.pool_capacity = primary["size"] + primary["max_overflow"]
+            except (httpx.HTTPError, KeyError, ValueError):
+                pass
+            await asyncio.sleep(0.5)
+
+    async def step(self, concurrency: int, warmup: float, seconds: float) -> StepStats:
+        stats = StepStats(concurrency, seconds)
+        measure_from = monotonic() + warmup
+        until = measure_from + seconds
+        await asyncio.gather(
+            self._sample_pool(stats, until),
+            *(self._user(stats, measure_from, until) for _ in range(concurrency)),
+        )
+        return stats
+
+
+async def pool_wait(client: httpx.AsyncClient) -> dict:
+    """
+    Cumulative primary-pool checkout wait histogram: {"sum", "count", "fast"} (fast = <= 10 ms).
+    """
+    out = {"sum": 0.0, "count": 0.0, "fast": 0.0}
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return out
+    for family in text_string_to_metric_families(text):
+        if family.name != "db_pool_checkout_wait_seconds":
+            continue
+        for s in family.samples:
+            if s.labels.get("engine") != "primary":
+                continue
+            if s.name.endswith("_sum"):
+                out["sum"] += s.value
+            elif s.name.endswith("_count"):
+                out["count"] += s.value
+            elif s.name.endswith("_bucket") and s.labels.get("le") == POOL_WAIT_THRESHOLD:
+                out["fast"] += s.value
+    return out
+
+
+async def seed_knowledge(client: httpx.AsyncClient, count: int) -> None:
+    rng = random.Random(7)
+    for i in range(count):
+        await client.post(
+            "/knowledge/ingest",
+            json={
+                "source": "LOADTEST",
+                "doc_type": "SOP",
+                "supplier_id": rng.choice(SUPPLIERS),
+                "region": rng.choice(REGIONS),
+                "chunk_text": f"{rng.choice(QUERIES).capitalize()}: load test guidance #{i}.",
+            },
+        )
+
+
+# =============================
+# REPORT
+# =============================
+def summarize(stats: StepStats, wait_before: dict, wait_after: dict) -> dict:
+    endpoints = {}
+    total_ok = 0
+    all_latencies = []
+    for op in OPERATIONS:
+        lat = sorted(stats.latencies.get(op, []))
+        if not lat and not stats.errors.get(op) and not stats.rejected.get(op):
+            continue
+        total_ok += len(lat)
+        all_latencies += lat
+        endpoints[op] = {
+            "ok": len(lat),
+            "rps": round(len(lat) / stats.seconds, 1),
+            "p50_ms": _ms(percentile(lat, 50)),
+            "p95_ms": _ms(percentile(lat, 95)),
+            "p99_ms": _ms(percentile(lat, 99)),
+            "errors": stats.errors.get(op, 0),
+            "rejected": stats.rejected.get(op, 0),
+        }
+    all_latencies.sort()
+
+    waits = wait_after["count"] - wait_before["count"]
+    return {
+        "concurrency": stats.concurrency,
+        "rps": round(total_ok / stats.seconds, 1),
+        "p95_ms": _ms(percentile(all_latencies, 95)),
+        "errors": sum(stats.errors.values()),
+        "endpoints": endpoints,
+        "pool": {
+            "peak_checked_out": stats.pool_peak,
+            "capacity": stats.pool_capacity,
+            "mean_checkout_wait_ms": _ms((wait_after["sum"] - wait_before["sum"]) / waits) if waits else None,
+            "waited_over_10ms": round(1 - (wait_after["fast"] - wait_before["fast"]) / waits, 3) if waits else None,
+        },
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def find_knee(steps: list[dict]) -> int | None:
+    if len(steps) < 2 or steps[0]["p95_ms"] is None:
+        return None
+    knee = steps[0]["concurrency"]
+    for prev, cur in zip(steps, steps[1:]):
+        if cur["rps"] < prev["rps"] * 1.1 or (cur["p95_ms"] or 0) > 2 * steps[0]["p95_ms"]:
+            break
+        knee = cur["concurrency"]
+    return knee
+
+
+def print_step(s: dict) -> None:
+    print(f"\nconcurrency {s['concurrency']}: {s['rps']} req/s, p95 {s['p95_ms']} ms, errors {s['errors']}")
+    print(f"  {'endpoint':<10}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'4xx':>6}")
+    for op, e in s["endpoints"].items():
+        print(
+            f"  {op:<10}{e['rps']:>8}{e['p50_ms'] or '-':>9}{e['p95_ms'] or '-':>9}{e['p99_ms'] or '-':>9}"
+            f"{e['errors']:>8}{e['rejected']:>6}"
+        )
+    p = s["pool"]
+    print(
+        f"  pool: peak {p['peak_checked_out']}/{p['capacity']} checked out, "
+        f"mean checkout wait {p['mean_checkout_wait_ms']} ms, waited >10ms {p['waited_over_10ms']}"
+    )
+
+
+async def main_async(args, url: str) -> list[dict]:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=max(args.ramp) + 4, max_keepalive_connections=max(args.ramp) + 4)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        if args.seed_knowledge:
+            await seed_knowledge(client, args.seed_knowledge)
+        generator = LoadGenerator(client, mix, args.seed)
+        steps = []
+        for concurrency in args.ramp:
+            before = await pool_wait(client)
+            stats = await generator.step(concurrency, args.warmup_seconds, args.step_seconds)
+            summary = summarize(stats, before, await pool_wait(client))
+            print_step(summary)
+            steps.append(summary)
+        return steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test.")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, help="one step at this many virtual users")
+    load.add_argument("--ramp", default="4,8,16,32", help="comma-separated concurrency steps")
+    parser.add_argument("--step-seconds", type=float, default=20.0)
+    parser.add_argument("--warmup-seconds", type=float, default=3.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers")
+    parser.add_argument("--llm", choices=("on", "off"), default="on")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=40.0)
+    parser.add_argument("--seed-knowledge", type=int, default=100, help="knowledge chunks to ingest first")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=random.randrange(1 << 32))
+    parser.add_argument("--url", help="drive this running deployment instead of starting one")
+    parser.add_argument("--json", help="write the full report here")
+    args = parser.parse_args()
+    args.ramp = [args.concurrency] if args.concurrency else [int(c) for c in args.ramp.split(",")]
+
+    stand_in = proc = None
+    try:
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            stand_in = LlmStandIn(args.llm_latency_ms, args.llm_jitter_ms, args.embed_latency_ms)
+            work_dir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+            (work_dir / "metrics").mkdir()
+            log_path = work_dir / "app.log"
+            print(f"app log: {log_path}")
+            proc, url = start_app(args.workers, args.llm, stand_in.base_url, str(work_dir / "metrics"), log_path)
+        steps = asyncio.run(main_async(args, url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(30)
+        if stand_in is not None:
+            stand_in.close()
+
+    knee = find_knee(steps)
+    if knee is not None:
+        print(f"\nknee: ~{knee} concurrent users")
+    if args.json:
+        report = {"target": args.url or "local", "workers": None if args.url else args.workers,
+                  "llm": args.llm, "mix": parse_mix(args.mix), "knee": knee, "steps": steps}
+        Path(args.json).write_bytes(dumps(report))
+
+
+if __name__ == "__main__":
+    main()
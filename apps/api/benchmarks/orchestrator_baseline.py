@@ -0,0 +1,301 @@
+"""
+Frozen copy of app.core.orchestrator.orchestrate() from before the reusable Orchestrator
+pipeline, kept as the baseline case of bench_orchestrator.py. Do not import it from app code.
+
+orchestrate() and every helper it called are copied verbatim. The settings and metric
+helpers (labels() looked up on every call) are reproduced as they were then. The agents come
+from app.core.agents, so AgentResult is today's slotted dataclass: if anything, the baseline
+is slightly faster than the original was.
+"""
+import os
+from contextlib import contextmanager
+from time import perf_counter
+
+from sqlalchemy.orm import Session
+
+from app.ai.llm_agent import CIRCUIT_OPEN_REASON, LlmDecisionAgent
+from app.ai.resilience import llm_guard
+from app.core.agents import (
+    NON_VOTING_REASON_CODES,
+    AgentResult,
+    CostAgent,
+    ReasonCode,
+    RiskAgent,
+    SlaAgent,
+)
+from app.core.metrics import DECISIONS, LLM_PLANS, ORCHESTRATION_STAGE_LATENCY
+from app.core.policy import POLICY, VOTE_WEIGHTS
+
+STORE_AGENT_TRACE_IN_CONTEXT = os.getenv("STORE_AGENT_TRACE_IN_CONTEXT", "1").lower() in {"1", "true", "yes"}
+
+
+def _is_llm_enabled() -> bool:
+    if os.getenv("DISABLE_LLM", "").lower() in {"1", "true", "yes"}:
+        return False
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+DETERMINISTIC_VOTE_WEIGHT = VOTE_WEIGHTS["DETERMINISTIC"]
+LLM_VOTE_WEIGHT = VOTE_WEIGHTS["LLM"]
+ESCALATE_THRESHOLD = VOTE_WEIGHTS["ESCALATE_THRESHOLD"]
+
+LLM_PLANNER_MODE = os.getenv("LLM_PLANNER_MODE", "auto").lower()
+
+
+@contextmanager
+def stage_timer(stage: str):
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        ORCHESTRATION_STAGE_LATENCY.labels(stage=stage).observe(perf_counter() - t0)
+
+
+def record_decision(decision: str, override: str | None = None, source: str = "orchestrator") -> None:
+    DECISIONS.labels(decision=decision, override=override or "NONE", source=source).inc()
+
+
+def record_llm_plan(outcome: str) -> None:
+    LLM_PLANS.labels(outcome=outcome).inc()
+
+
+def orchestrate(event: dict, db: Session) -> dict:
+    """
+    Hybrid orchestration:
+    - Deterministic agents (Risk, Cost, SLA)
+    - Hard overrides
+    - Optional LLM agent (RAG), only when the planner says it can still flip the vote
+    - Voting logic
+    """
+
+    deterministic_agents = [RiskAgent(), CostAgent(), SlaAgent()]
+    llm_agent = LlmDecisionAgent()
+
+    # Always collect agent_trace items here
+    results: list[AgentResult] = []
+
+    # Run deterministic agents (always, they're cheap)
+    with stage_timer("deterministic_agents"):
+        for agent in deterministic_agents:
+            results.append(agent.evaluate(event))
+
+    # Plan: overrides + deterministic votes first, LLM only if it matters
+    llm_enabled = _is_llm_enabled()
+    override, llm_skip_reason = plan_llm(event, results, llm_enabled)
+
+    # Run LLM agent only if needed, but ALWAYS add a trace record for it
+    if llm_skip_reason is None:
+        with stage_timer("llm_agent"):
+            llm_trace = llm_agent_result(llm_agent.evaluate(event, db))
+    else:
+        llm_trace = llm_placeholder(llm_enabled, llm_skip_reason)
+
+    results.append(llm_trace)
+
+    return finalize(results, override, llm_enabled)
+
+
+def hard_override(event: dict, policy: dict = POLICY) -> str | None:
+    # HARD OVERRIDE 1: PRIORITY
+    if policy["ESCALATE_IF_PRIORITY"] and bool(event.get("priority_flag", False)):
+        return "PRIORITY_FLAG"
+
+    # HARD OVERRIDE 2: HIGH VALUE
+    order_value = float(event.get("order_value", 0.0))
+    if order_value >= policy["ESCALATE_IF_ORDER_VALUE_GTE"]:
+        return "HIGH_ORDER_VALUE"
+
+    return None
+
+
+def plan_llm(
+    event: dict, deterministic_results: list[AgentResult], llm_enabled: bool
+) -> tuple[str | None, str | None]:
+    """
+    Evaluation planner. Returns (override, llm_skip_reason); skip reason None = call the LLM.
+
+    The LLM vote (weight LLM_VOTE_WEIGHT) can only change the outcome when the deterministic
+    escalate score is in [ESCALATE_THRESHOLD - LLM_VOTE_WEIGHT, ESCALATE_THRESHOLD):
+    below it the item auto-resolves even if the LLM escalates, at or above it the item
+    escalates whatever the LLM says. Outside that band the embedding + retrieval + chat
+    completion would be paid for nothing.
+    """
+    override = hard_override(event)
+
+    if not llm_enabled:
+        outcome, skip_reason = "disabled", "LLM disabled (missing OPENAI_API_KEY or DISABLE_LLM=1)."
+    elif LLM_PLANNER_MODE == "always":
+        outcome, skip_reason = "called", None
+    elif override:
+        outcome, skip_reason = "skipped_override", f"Skipped: outcome fixed by override {override}."
+    elif llm_guard.breaker.is_open():
+        # Provider failing: deterministic-only vote until the breaker lets a trial call through
+        outcome, skip_reason = "circuit_open", CIRCUIT_OPEN_REASON
+    else:
+        det_score = weighted_escalate_score(deterministic_results)
+        if llm_can_flip(det_score):
+            outcome, skip_reason = "called", None
+        else:
+            outcome, skip_reason = (
+                "skipped_decided",
+                f"Skipped: deterministic escalate score {det_score} decides the vote without the LLM.",
+            )
+
+    record_llm_plan(outcome)
+    return override, skip_reason
+
+
+def llm_agent_result(llm_result: dict) -> AgentResult:
+    return AgentResult(
+        name=llm_result["name"],
+        recommendation=llm_result["recommendation"],
+        reason=llm_result["reason"],
+        score=llm_result["score"],
+        reason_code=llm_result.get("reason_code", ReasonCode.UNSPECIFIED),
+        prompt_version=llm_result.get("prompt_version"),
+    )
+
+
+def llm_can_flip(det_score: float, weights: dict = VOTE_WEIGHTS) -> bool:
+    return weights["ESCALATE_THRESHOLD"] - weights["LLM"] <= det_score < weights["ESCALATE_THRESHOLD"]
+
+
+def llm_placeholder(llm_enabled: bool, reason: str) -> AgentResult:
+    # IMPORTANT: still include LLM in trace, but make it neutral and excluded from voting
+    if not llm_enabled:
+        return AgentResult(
+            name="LlmDecisionAgent",
+            recommendation="AUTO_RESOLVE",
+            reason=reason,
+            score=0.0,
+            reason_code=ReasonCode.LLM_DISABLED,
+        )
+    return AgentResult(
+        name="LlmDecisionAgent",
+        recommendation="SKIPPED",
+        reason=reason,
+        score=0.0,
+        reason_code=ReasonCode.LLM_CIRCUIT_OPEN if reason == CIRCUIT_OPEN_REASON else ReasonCode.LLM_SKIPPED,
+    )
+
+
+def weighted_escalate_score(results: list[AgentResult], weights: dict = VOTE_WEIGHTS) -> float:
+    score = 0.0
+    for r in results:
+        if r.reason_code in NON_VOTING_REASON_CODES or r.recommendation != "ESCALATE":
+            continue
+        score += weights["LLM"] if r.name == "LlmDecisionAgent" else weights["DETERMINISTIC"]
+    return score
+
+
+def finalize(results: list[AgentResult], override: str | None, llm_enabled: bool) -> dict:
+    if override:
+        return _override_response(results, override)
+
+    # =============================
+    # HYBRID VOTING LOGIC
+    # =============================
+    # Deterministic agents count always.
+    # LLM contributes only if it actually ran.
+    with stage_timer("voting"):
+        return _vote(results, llm_enabled)
+
+
+def _vote(results: list[AgentResult], llm_enabled: bool) -> dict:
+    # Placeholders (LLM disabled/skipped) neither vote nor score
+    scoring_results = [r for r in results if r.reason_code not in NON_VOTING_REASON_CODES]
+
+    escalate_score = weighted_escalate_score(scoring_results)
+    votes_escalate = sum(1 for r in scoring_results if r.recommendation == "ESCALATE")
+
+    final_decision = "ESCALATE" if escalate_score >= ESCALATE_THRESHOLD else "AUTO_RESOLVE"
+
+    # avg_score should be computed consistently
+    avg_score = sum(r.score for r in scoring_results) / max(1, len(scoring_results))
+
+    key_reasons = [
+        r.reason
+        for r in scoring_results
+        if r.recommendation == "ESCALATE"
+    ]
+
+    if key_reasons:
+        reason = "Escalated because: " + " | ".join(key_reasons)
+    else:
+        reason = "Auto-resolved: low combined risk across agents."
+
+    context = {
+        "final": {
+            "decision": final_decision,
+            "votes_escalate": votes_escalate,
+            "weighted_escalate_score": escalate_score,
+            "avg_score": avg_score,
+            "llm_enabled": llm_enabled,
+            "llm_called": _llm_called(results),
+            "llm_prompt_version": _llm_prompt_version(results),
+        },
+    }
+
+    if STORE_AGENT_TRACE_IN_CONTEXT:
+        context["agent_trace"] = agent_trace(results)
+
+    record_decision(final_decision)
+
+    return {
+        "decision": final_decision,
+        "reason": reason,
+        "confidence": round(min(1.0, 0.5 + avg_score / 2), 3),
+        "context": context,
+        "agent_results": results,
+    }
+
+
+def _override_response(results: list[AgentResult], override_type: str) -> dict:
+    scoring_results = [r for r in results if r.reason_code not in NON_VOTING_REASON_CODES]
+    avg_score = sum(r.score for r in scoring_results) / max(1, len(scoring_results))
+
+    context = {
+        "final": {
+            "decision": "ESCALATE",
+            "override": override_type,
+            "avg_score": avg_score,
+            "llm_enabled": _is_llm_enabled(),
+            "llm_called": _llm_called(results),
+            "llm_prompt_version": _llm_prompt_version(results),
+        },
+    }
+    if STORE_AGENT_TRACE_IN_CONTEXT:
+        context["agent_trace"] = agent_trace(results)
+
+    record_decision("ESCALATE", override_type)
+
+    return {
+        "decision": "ESCALATE",
+        "reason": f"Escalated due to override: {override_type}",
+        "confidence": 1.0,
+        "context": context,
+        "agent_results": results,
+    }
+
+
+def _llm_called(results: list[AgentResult]) -> bool:
+    return any(r.name == "LlmDecisionAgent" and r.reason_code not in NON_VOTING_REASON_CODES for r in results)
+
+
+def _llm_prompt_version(results: list[AgentResult]) -> str | None:
+    return next((r.prompt_version for r in results if r.prompt_version), None)
+
+
+def agent_trace(results: list[AgentResult]) -> list[dict]:
+    trace = []
+    for r in results:
+        entry = {
+            "name": r.name,
+            "score": r.score,
+            "recommendation": r.recommendation,
+            "reason": r.reason,
+        }
+        if r.prompt_version:
+            entry["prompt_version"] = r.prompt_version
+        trace.append(entry)
+    return trace
\ No newline at end of file
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine, read_engine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts SQL statements sent to the primary and replica engines inside the block.
+    """
+    counter = QueryCounter()
+    engines = [e for e in (engine, read_engine) if e is not None]
+    for e in engines:
+        event.listen(e, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def assert_num_queries():
+    """
+    with assert_num_queries(1):
+        client.get(...)
+
+    Fails with the captured SQL when the endpoint issues a different number of statements,
+    so N+1 regressions show up as a test failure instead of a slow dashboard.
+    """
+
+    @contextmanager
+    def _assert(expected: int):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count == expected, (
+            f"expected {expected} SQL statements, got {counter.count}:\n"
+            + "\n---\n".join(counter.statements)
+        )
+
+    return _assert
@@ -0,0 +1,48 @@
+"""
+Test data shared by the test modules.
+"""
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+# Overrides for an event that Risk and SLA both vote to escalate (decided without the LLM)
+ESCALATING = {"updated_eta": "2026-03-04", "delay_days": 3, "inventory_days_of_supply": 5, "order_value": 80000}
+
+
+def make_event(**overrides) -> dict:
+    """
+    A valid shipment delay event that auto-resolves (no agent votes to escalate). The
+    shipment_id is unique, so intake never deduplicates or coalesces it with another test's.
+    """
+    return {
+        "shipment_id": f"T-{uuid.uuid4().hex[:8]}",
+        "supplier_id": "SUP-001",
+        "original_eta": "2026-03-01",
+        "updated_eta": "2026-03-02",
+        "delay_days": 1,
+        "inventory_days_of_supply": 14,
+        "order_value": 25000,
+        "region": "US-CENTRAL",
+        "priority_flag": False,
+        **overrides,
+    }
+
+
+def create_work_item(**overrides) -> str:
+    r = client.post("/work-items", json={"event": make_event(**overrides)})
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def create_and_run(**overrides) -> str:
+    """
+    create_work_item + /run; returns the work item id.
+    """
+    work_item_id = create_work_item(**overrides)
+    r = client.post(f"/work-items/{work_item_id}/run")
+    assert r.status_code == 200, r.text
+    return work_item_id
@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import app.api.routes.work_items as work_items_routes
+from app.core import orchestrator
+from app.core.agents import ReasonCode
+from app.db.models import AgentResultRecord, Decision
+from app.db.session import SessionLocal
+from app.main import app
+from tests.helpers import create_and_run, create_work_item
+
+client = TestClient(app)
+
+
+def _agent_results(work_item_id: str) -> list[AgentResultRecord]:
+    with SessionLocal() as db:
+        return list(
+            db.execute(
+                select(AgentResultRecord)
+                .where(AgentResultRecord.work_item_id == uuid.UUID(work_item_id))
+                .order_by(AgentResultRecord.id)
+            ).scalars()
+        )
+
+
+def _disagreement(**params) -> dict:
+    r = client.get("/work-items/analytics/agent-disagreement", params=params)
+    assert r.status_code == 200, r.text
+    return {b[params["group_by"]]: b for b in r.json()["buckets"]}
+
+
+def test_run_writes_one_agent_result_per_agent_with_its_decision():
+    supplier_id = f"SUP-AR-{uuid.uuid4().hex[:6]}"
+    work_item_id = create_and_run(supplier_id=supplier_id, region="AR-EAST", order_value=60000)
+
+    rows = _agent_results(work_item_id)
+    with SessionLocal() as db:
+        decision = db.execute(select(Decision).where(Decision.work_item_id == uuid.UUID(work_item_id))).scalar_one()
+
+    assert [r.agent for r in rows] == ["RiskAgent", "CostAgent", "SlaAgent", "LlmDecisionAgent"]
+    assert {r.decision_id for r in rows} == {decision.id}
+    assert {(r.supplier_id, r.region) for r in rows} == {(supplier_id, "AR-EAST")}
+    cost = rows[1]
+    assert (cost.recommendation, cost.score, cost.reason_code) == ("ESCALATE", 0.6, ReasonCode.COST_MEDIUM_HIGH)
+
+
+def test_agent_results_roll_back_with_the_decision(monkeypatch):
+    work_item_id = create_work_item()
+    record_orchestration = work_items_routes.record_orchestration
+
+    def record_then_fail(db, wi, out, rollups=None):
+        record_orchestration(db, wi, out, rollups)
+        db.flush()  # rows are written, then the transaction fails before commit
+        raise RuntimeError("commit never reached")
+
+    monkeypatch.setattr(work_items_routes, "record_orchestration", record_then_fail)
+    with pytest.raises(RuntimeError):
+        client.post(f"/work-items/{work_item_id}/run")
+
+    assert _agent_results(work_item_id) == []
+    with SessionLocal() as db:
+        assert db.execute(select(Decision).where(Decision.work_item_id == uuid.UUID(work_item_id))).first() is None
+    assert client.get(f"/work-items/{work_item_id}").json()["status"] == "NEW"
+
+
+def test_item_reads_rebuild_the_trace_when_it_is_not_stored_in_context(monkeypatch):
+    monkeypatch.setattr(orchestrator, "STORE_AGENT_TRACE_IN_CONTEXT", False)
+    work_item_id = create_and_run(order_value=60000)
+
+    item = client.get(f"/work-items/{work_item_id}").json()
+    trace = client.get(f"/work-items/{work_item_id}/trace").json()["work_item"]
+    assert item == trace
+
+    cost = item["context"]["agent_trace"][1]
+    assert cost == {
+        "name": "CostAgent",
+        "score": 0.6,
+        "recommendation": "ESCALATE",
+        "reason": "COST_MEDIUM_HIGH",
+        "reason_code": ReasonCode.COST_MEDIUM_HIGH,
+    }
+
+
+@pytest.mark.parametrize("group_by", ["region", "supplier_id"])
+def test_agent_disagreement_counts_per_group(group_by):
+    tag = uuid.uuid4().hex[:6]
+    a = {"supplier_id": f"SUP-DA-{tag}", "region": f"DA-A-{tag}"}
+    b = {"supplier_id": f"SUP-DB-{tag}", "region": f"DA-B-{tag}"}
+
+    create_and_run(**a, order_value=60000)  # Cost escalates, SLA doesn't
+    create_and_run(**a, priority_flag=True, order_value=60000)  # both escalate
+    create_and_run(**a)  # neither escalates
+    create_and_run(**b, priority_flag=True)  # SLA escalates, Cost doesn't
+
+    buckets = _disagreement(agent="CostAgent", against="SlaAgent", group_by=group_by)
+    counts = {k: (v["compared"], v["disagreements"], v["disagreement_rate"]) for k, v in buckets.items()}
+    assert counts[a[group_by]] == (3, 1, 0.333)
+    assert counts[b[group_by]] == (1, 1, 1.0)
+
+    # LLM disabled: its placeholder entries are not votes, so nothing is compared
+    assert a[group_by] not in _disagreement(agent="CostAgent", group_by=group_by)
+
+
+def test_agent_disagreement_rejects_other_group_by_columns():
+    r = client.get("/work-items/analytics/agent-disagreement", params={"group_by": "agent; DROP TABLE agent_results"})
+    assert r.status_code == 422
+    r = client.get("/work-items/analytics/agent-disagreement", params={"group_by": "recommendation"})
+    assert r.status_code == 422
@@ -0,0 +1,70 @@
+import json
+
+from app.ai.batch import LocalFileBatchBackend, evaluate_batch
+from app.ai.llm_agent import LlmDecisionAgent
+from app.core import orchestrator
+from app.core.agents import ReasonCode
+from tests.helpers import make_event
+
+# one deterministic escalate vote: the planner sends every one of these to the LLM
+BASE = make_event(order_value=60000)
+
+REPLIES = {
+    "B-AUTO": json.dumps({"decision": "AUTO_RESOLVE", "reason": "within SLA", "confidence": 0.9}),
+    "B-ESC": json.dumps({"decision": "ESCALATE", "reason": "SLA breach", "confidence": 0.8}),
+    "B-GARBAGE": "not json",
+}
+
+
+def _responder(body: dict) -> str:
+    shipment_id = body["messages"][-1]["content"]
+    if shipment_id not in REPLIES:
+        raise RuntimeError("item failed")
+    return REPLIES[shipment_id]
+
+
+def test_batch_results_feed_voting_and_failures_escalate(tmp_path, monkeypatch):
+    monkeypatch.setattr(orchestrator, "_is_llm_enabled", lambda: True)
+    monkeypatch.setattr(
+        LlmDecisionAgent, "build_messages", lambda self, event, db: [{"role": "user", "content": event["shipment_id"]}]
+    )
+
+    events = [
+        {**BASE, "shipment_id": sid}
+        for sid in ("B-AUTO", "B-ESC", "B-GARBAGE", "B-FAILED")
+    ]
+    events.append({**BASE, "shipment_id": "B-OVERRIDE", "priority_flag": True})
+
+    backend = LocalFileBatchBackend(tmp_path, responder=_responder)
+    outs = orchestrator.orchestrate_batch(events, db=None, backend=backend)
+
+    # one job, only the four events the planner wanted the LLM for
+    [input_file] = tmp_path.glob("*.input.jsonl")
+    assert len(input_file.read_text().splitlines()) == 4
+
+    def llm(out):
+        return out["agent_results"][-1]
+
+    assert [o["decision"] for o in outs] == ["AUTO_RESOLVE", "ESCALATE", "ESCALATE", "ESCALATE", "ESCALATE"]
+    assert [llm(o).reason_code for o in outs] == [
+        ReasonCode.LLM_DECISION,
+        ReasonCode.LLM_DECISION,
+        ReasonCode.LLM_PARSE_FAILED,
+        ReasonCode.LLM_FAILED,
+        ReasonCode.LLM_SKIPPED,
+    ]
+    assert llm(outs[3]).recommendation == "ESCALATE"
+    assert outs[4]["context"]["final"]["override"] == "PRIORITY_FLAG"
+
+
+def test_local_backend_times_out_to_safe_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        LlmDecisionAgent, "build_messages", lambda self, event, db: [{"role": "user", "content": "x"}]
+    )
+
+    # no responder and nobody writes the output file
+    backend = LocalFileBatchBackend(tmp_path, poll_seconds=0.01)
+    results = evaluate_batch(LlmDecisionAgent(), {"0": BASE}, db=None, backend=backend, timeout_seconds=0.05)
+
+    assert results["0"]["recommendation"] == "ESCALATE"
+    assert results["0"]["reason_code"] == ReasonCode.LLM_FAILED
@@ -0,0 +1,62 @@
+import io
+import uuid
+
+from sqlalchemy import select
+
+from app.core.batch_scoring import CopySink, NdjsonSink, RejectLog, run
+from app.core.serialization import loads
+from app.db.models import BatchScore
+from app.db.session import SessionLocal
+
+CSV = """shipment_id,supplier_id,original_eta,updated_eta,delay_days,inventory_days_of_supply,order_value,region,priority_flag
+T-BS-1,SUP-001,2026-03-01,2026-03-02,1,14,25000,US-CENTRAL,false
+T-BS-2,SUP-001,2026-03-01,2026-03-06,5,3,25000,US-CENTRAL,false
+T-BS-3,SUP-001,2026-03-01,2026-03-02,not-a-number,14,25000,US-CENTRAL,false
+"""
+
+NDJSON = (
+    '{"shipment_id": "T-BS-4", "supplier_id": "SUP-002", "original_eta": "2026-03-01", '
+    '"updated_eta": "2026-03-02", "delay_days": 1, "inventory_days_of_supply": 14, '
+    '"order_value": 250000, "region": "EU-WEST", "priority_flag": false}\n'
+)
+
+
+def _inputs(tmp_path) -> list[str]:
+    (tmp_path / "events.csv").write_text(CSV)
+    (tmp_path / "events.ndjson").write_text(NDJSON)
+    return [str(tmp_path / "events.csv"), str(tmp_path / "events.ndjson")]
+
+
+def test_scores_csv_and_ndjson_in_order_and_rejects_invalid_rows(tmp_path):
+    out, rejected = io.BytesIO(), io.BytesIO()
+
+    summary = run(_inputs(tmp_path), NdjsonSink(out), chunk_size=2, rejects=RejectLog(rejected))
+
+    rows = [loads(line) for line in out.getvalue().splitlines()]
+    assert [r["shipment_id"] for r in rows] == ["T-BS-1", "T-BS-2", "T-BS-4"]
+    assert [r["decision"] for r in rows] == ["AUTO_RESOLVE", "ESCALATE", "ESCALATE"]
+    assert summary["scored"] == 3 and summary["rejected"] == 1
+    assert summary["events_per_sec"] > 0
+
+    reject = loads(rejected.getvalue())
+    assert reject["location"].endswith("events.csv:3")
+    assert reject["error"].startswith("delay_days")
+
+
+def test_worker_pool_copies_decisions_into_postgres(tmp_path):
+    run_id = uuid.uuid4()
+
+    summary = run(_inputs(tmp_path), CopySink(run_id), workers=2, chunk_size=1)
+
+    with SessionLocal() as db:
+        stored = db.execute(
+            select(BatchScore.shipment_id, BatchScore.decision)
+            .where(BatchScore.run_id == run_id)
+            .order_by(BatchScore.id)
+        ).all()
+    assert summary["decisions"] == {"AUTO_RESOLVE": 1, "ESCALATE": 2}
+    assert [tuple(r) for r in stored] == [
+        ("T-BS-1", "AUTO_RESOLVE"),
+        ("T-BS-2", "ESCALATE"),
+        ("T-BS-4", "ESCALATE"),
+    ]
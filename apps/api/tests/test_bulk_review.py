@@ -0,0 +1,81 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from tests.helpers import create_and_run
+
+client = TestClient(app)
+
+
+def _run(supplier_id: str, escalate: bool = True, region: str = "APAC") -> str:
+    # priority_flag is a hard override: escalate=False leaves no agent voting to escalate
+    return create_and_run(supplier_id=supplier_id, region=region, priority_flag=escalate, order_value=1000)
+
+
+def _review_batch(**body):
+    return client.post(
+        "/work-items/review-batch", json={"action": "APPROVE", "reviewer": "ops", "comment": "port closure", **body}
+    )
+
+
+def test_listed_items_report_per_item_outcomes():
+    supplier_id = f"SUP-BR-{uuid.uuid4().hex[:6]}"
+    first, second = _run(supplier_id), _run(supplier_id)
+    resolved = _run(supplier_id, escalate=False)
+    missing = str(uuid.uuid4())
+
+    r = _review_batch(work_item_ids=[first, second, second, resolved, "not-a-uuid", missing])
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["reviewed"], body["skipped"]) == (2, 3)
+    assert [(i["work_item_id"], i["outcome"]) for i in body["items"]] == [
+        (first, "REVIEWED"),
+        (second, "REVIEWED"),
+        (resolved, "NOT_ESCALATED"),
+        ("not-a-uuid", "INVALID_ID"),
+        (missing, "NOT_FOUND"),
+    ]
+
+    trace = client.get(f"/work-items/{first}/trace").json()
+    assert trace["work_item"]["status"] == "HUMAN_APPROVED"
+    assert [(d["decision"], d["created_by"]) for d in trace["decisions"]] == [("ESCALATE", None), ("APPROVE", "ops")]
+
+
+def test_items_claimed_by_another_reviewer_are_skipped():
+    region = f"BR-{uuid.uuid4().hex[:8]}"
+    work_item_id = _run(f"SUP-BR-{uuid.uuid4().hex[:6]}", region=region)
+    client.get("/review-queue/next", params={"reviewer": "alice", "region": region})
+
+    items = _review_batch(work_item_ids=[work_item_id]).json()["items"]
+    assert items == [{"work_item_id": work_item_id, "outcome": "CLAIMED", "claimed_by": "alice"}]
+
+    items = _review_batch(work_item_ids=[work_item_id], reviewer="alice").json()["items"]
+    assert items == [{"work_item_id": work_item_id, "outcome": "REVIEWED"}]
+
+    # the bulk review bumped the version and cleared the claim: releasing it is a conflict
+    r = client.delete(f"/review-queue/{work_item_id}/claim", params={"reviewer": "alice"})
+    assert r.status_code == 409
+
+
+def test_filter_reviews_all_matching_escalations_set_based(assert_num_queries):
+    supplier_id = f"SUP-BR-{uuid.uuid4().hex[:6]}"
+    escalated = {_run(supplier_id) for _ in range(3)}
+    _run(supplier_id, escalate=False)
+
+    # lock targets, UPDATE work_items, INSERT decisions, upsert rollups
+    with assert_num_queries(4):
+        r = _review_batch(action="REJECT", filter={"supplier_id": supplier_id})
+    assert r.status_code == 200, r.text
+    assert {i["work_item_id"] for i in r.json()["items"]} == escalated
+    assert r.json()["final_status"] == "HUMAN_REJECTED"
+
+    for work_item_id in escalated:
+        assert client.get(f"/work-items/{work_item_id}").json()["status"] == "HUMAN_REJECTED"
+    assert _review_batch(filter={"supplier_id": supplier_id}).json()["reviewed"] == 0
+
+
+def test_needs_exactly_one_selector():
+    assert _review_batch().status_code == 400
+    assert _review_batch(work_item_ids=[], filter={"region": "EU"}).status_code == 400
+    assert _review_batch(filter={}).status_code == 400
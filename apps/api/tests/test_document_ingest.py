@@ -0,0 +1,133 @@
+import io
+import uuid
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import app.ai.embeddings as embeddings
+import app.ai.ingestion as ingestion
+from app.core.chunking import ChunkerConfig, chunk_document, iter_lines
+from app.db.models import KnowledgeChunk
+from app.db.session import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+SLA = """# Supplier SLA
+
+## Late delivery
+Deliveries more than 2 days late incur a 5% penalty on the order value.
+
+## Escalation
+Priority orders are escalated to the regional lead within 4 hours.
+"""
+
+
+def _chunks(text: str, fmt: str, **config) -> list[str]:
+    lines = iter_lines(io.BytesIO(text.encode("utf-8")))
+    return list(chunk_document(lines, fmt, ChunkerConfig(**config)))
+
+
+def test_markdown_chunks_carry_their_heading_path():
+    chunks = _chunks(SLA, "markdown")
+
+    assert chunks == [
+        "Supplier SLA > Late delivery\n\nDeliveries more than 2 days late incur a 5% penalty on the order value.",
+        "Supplier SLA > Escalation\n\nPriority orders are escalated to the regional lead within 4 hours.",
+    ]
+
+
+def test_csv_chunks_repeat_the_header_and_respect_size():
+    rows = "\n".join(f"SUP-{i:03d},US-CENTRAL,{i} days" for i in range(40))
+    chunks = _chunks("supplier,region,grace\n" + rows, "csv", size=200, overlap=0)
+
+    assert len(chunks) > 1
+    assert all(c.startswith("supplier,region,grace\n") and len(c) <= 200 for c in chunks)
+    assert sum(c.count("SUP-") for c in chunks) == 40
+
+
+def test_overlap_never_pushes_chunks_past_size():
+    for sizes in ([500, 90, 560], [500, 100, 580, 50], [400, 100, 300]):
+        text = "\n\n".join(chr(ord("a") + i) * n for i, n in enumerate(sizes))
+        chunks = _chunks(text, "text", size=600, overlap=150)
+
+        assert all(len(c) <= 600 for c in chunks), [len(c) for c in chunks]
+
+    # the carry is kept where it fits: the 100-char paragraph opens the second chunk too
+    assert _chunks("a" * 400 + "\n\n" + "b" * 100 + "\n\n" + "c" * 300, "text", size=600, overlap=150) == [
+        "a" * 400 + "\n\n" + "b" * 100,
+        "b" * 100 + "\n\n" + "c" * 300,
+    ]
+
+
+def test_oversized_paragraph_is_split_with_overlap():
+    chunks = _chunks("x" * 450, "text", size=200, overlap=50)
+
+    assert [len(c) for c in chunks] == [200, 200, 150]
+
+
+def _upload(source: str, body: str):
+    return client.post(
+        "/knowledge/documents",
+        data={"source": source, "doc_type": "SLA", "supplier_id": "SUP-DOC"},
+        files={"file": ("sla.md", body.encode("utf-8"), "text/markdown")},
+    )
+
+
+def test_reingest_only_embeds_changed_chunks(monkeypatch):
+    embedded: list[str] = []
+
+    def fake_embeddings(texts):
+        embedded.extend(texts)
+        return [[0.01] * 1536 for _ in texts]
+
+    monkeypatch.setattr(ingestion, "embed_documents", fake_embeddings)
+    source = f"SLA_DOC-{uuid.uuid4().hex[:8]}"
+
+    first = _upload(source, SLA)
+    assert first.status_code == 200, first.text
+    assert first.json()["embedded"] == 2
+
+    embedded.clear()
+    revised = SLA.replace("4 hours", "2 hours")
+    second = _upload(source, revised)
+    assert second.status_code == 200, second.text
+    assert second.json() | {"status": None} == {
+        "status": None,
+        "source": source,
+        "format": "markdown",
+        "chunks": 2,
+        "embedded": 1,
+        "unchanged": 1,
+        "deleted": 1,
+    }
+    assert len(embedded) == 1 and "2 hours" in embedded[0]
+
+    with SessionLocal() as db:
+        stored = db.scalars(select(KnowledgeChunk.chunk_text).where(KnowledgeChunk.source == source)).all()
+    assert sorted(stored) == sorted(_chunks(revised, "markdown"))
+
+
+def test_document_embeddings_bypass_the_request_guard(monkeypatch):
+    calls = []
+
+    class BulkEmbeddings:
+        def create(self, model, input):
+            calls.append(input)
+            return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.02] * 4) for i in range(len(input))])
+
+    def guarded(*args, **kwargs):
+        raise AssertionError("bulk embeddings must not go through llm_guard")
+
+    monkeypatch.setattr(embeddings, "get_bulk_openai_client", lambda: SimpleNamespace(embeddings=BulkEmbeddings()))
+    monkeypatch.setattr(embeddings.llm_guard, "call", guarded)
+    texts = [f"chunk {uuid.uuid4()}" for _ in range(3)]
+
+    assert embeddings.embed_documents(texts) == [[0.02] * 4] * 3
+    assert calls == [texts]
+
+
+def test_empty_document_is_rejected_without_touching_stored_chunks():
+    r = _upload(f"SLA_DOC-{uuid.uuid4().hex[:8]}", "\n\n")
+    assert r.status_code == 422
@@ -0,0 +1,55 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from tests.helpers import make_event
+
+client = TestClient(app)
+
+
+def _post(event: dict, **headers):
+    r = client.post("/work-items", json={"event": event}, headers=headers)
+    assert r.status_code == 200, r.text
+    return r
+
+
+def test_resent_notice_returns_the_same_item():
+    event = make_event()
+    first = _post(event)
+    again = _post(event)
+
+    assert again.json()["id"] == first.json()["id"]
+    assert "Idempotent-Replayed" not in first.headers
+    assert again.headers["Idempotent-Replayed"] == "true"
+
+
+def test_idempotency_key_header_wins_over_payload():
+    key = uuid.uuid4().hex
+    first = _post(make_event(), **{"Idempotency-Key": key})
+    # different shipment, same key: a client retry of the first request
+    again = _post(make_event(), **{"Idempotency-Key": key})
+
+    assert again.json()["id"] == first.json()["id"]
+
+
+def test_newer_notice_coalesces_into_new_item():
+    event = make_event()
+    first = _post(event)
+    newer = _post({**event, "updated_eta": "2026-03-05", "delay_days": 4})
+    stale = _post({**event, "updated_eta": "2026-03-03", "delay_days": 2})
+
+    assert newer.json()["id"] == first.json()["id"] == stale.json()["id"]
+    # the newest notice is kept even when an older one arrives late
+    assert stale.json()["payload"]["updated_eta"] == "2026-03-05"
+
+
+def test_processed_item_is_not_coalesced_into():
+    event = make_event()
+    first = _post(event)
+    client.post(f"/work-items/{first.json()['id']}/run")
+
+    newer = _post({**event, "updated_eta": "2026-03-05", "delay_days": 4})
+
+    assert newer.json()["id"] != first.json()["id"]
+    assert newer.json()["status"] == "NEW"
@@ -0,0 +1,54 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+import app.api.routes.knowledge as knowledge_routes
+from app.db.models import KnowledgeChunk
+from app.db.session import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+
+def _axis(i: int) -> list[float]:
+    v = [0.001] * 1536
+    v[i] = 1.0
+    return v
+
+
+def test_query_batch_embeds_once_and_searches_in_one_round_trip(monkeypatch, assert_num_queries):
+    scope = f"SUP-{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        for i, chunk_text in enumerate(["Detention fees for containers.", "Customs hold escalation path."], 1):
+            db.add(KnowledgeChunk(source="SOP_BATCH", supplier_id=scope, region=scope, doc_type=scope,
+                                  chunk_text=chunk_text, embedding=_axis(i)))
+        db.commit()
+
+    calls: list[list[str]] = []
+
+    def fake_embeddings(texts):
+        calls.append(texts)
+        return [_axis(1) if "detention" in t else _axis(2) for t in texts]
+
+    monkeypatch.setattr(knowledge_routes, "get_embeddings", fake_embeddings)
+    scope_filters = {"supplier_id": scope, "region": scope, "doc_type": scope}
+    queries = ["detention charges", "customs hold", "unrelated words"]
+
+    with assert_num_queries(1):
+        r = client.post(
+            "/knowledge/query-batch",
+            json={"queries": queries, "top_k": 1, "mode": "vector", **scope_filters},
+        )
+    assert r.status_code == 200, r.text
+    assert len(calls) == 1 and calls[0] == queries
+
+    results = r.json()["results"]
+    assert [g["query"] for g in results] == queries
+    assert results[0]["items"][0]["text"] == "Detention fees for containers."
+    assert results[1]["items"][0]["text"] == "Customs hold escalation path."
+
+    # lexical mode needs no embeddings; a query without matches gets an empty group
+    r = client.post("/knowledge/query-batch", json={"queries": queries, "mode": "lexical", **scope_filters})
+    groups = [[i["text"] for i in g["items"]] for g in r.json()["results"]]
+    assert groups == [["Detention fees for containers."], ["Customs hold escalation path."], []]
+    assert len(calls) == 1
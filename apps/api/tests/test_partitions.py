@@ -0,0 +1,82 @@
+import gzip
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db.partitions import (
+    PARTITION_PREMAKE_MONTHS,
+    PARTITIONED_TABLES,
+    add_months,
+    detach_expired,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+from app.db.session import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_tables_are_partitioned_with_months_premade():
+    horizon = add_months(month_start(datetime.utcnow()), PARTITION_PREMAKE_MONTHS + 1)
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            assert is_partitioned(conn, table)
+            partitions = list_partitions(conn, table)
+            assert partitions[0][0] == f"{table}_history" and partitions[0][1] is None
+            assert partitions[-1][2] >= horizon
+
+
+def test_created_at_bound_prunes_history_partition():
+    with engine.connect() as conn:
+        plan = "\n".join(
+            conn.execute(
+                text("EXPLAIN SELECT id FROM work_items WHERE created_at >= :since"),
+                {"since": add_months(month_start(datetime.utcnow()), 1)},
+            ).scalars()
+        )
+    assert "work_items_history" not in plan
+
+
+def test_ensure_then_detach_and_archive(tmp_path):
+    now = datetime(2030, 6, 15)
+    # Scratch table in a rolled-back transaction: the shared tables stay untouched
+    with engine.connect() as conn, conn.begin() as tx:
+        conn.execute(
+            text("CREATE TABLE partition_test_events (id int, created_at timestamp) PARTITION BY RANGE (created_at)")
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE partition_test_events_history PARTITION OF partition_test_events "
+                "FOR VALUES FROM (MINVALUE) TO ('2030-01-01')"
+            )
+        )
+
+        created = ensure_partitions(conn, "partition_test_events", months_ahead=1, now=now)
+        assert created[0] == "partition_test_events_p2030_01" and created[-1] == "partition_test_events_p2030_07"
+        assert ensure_partitions(conn, "partition_test_events", months_ahead=1, now=now) == []
+
+        conn.execute(
+            text("INSERT INTO partition_test_events VALUES (1, '2029-12-31'), (2, '2030-01-20'), (3, '2030-06-01')")
+        )
+        handled = detach_expired(conn, "partition_test_events", datetime(2030, 2, 1), tmp_path)
+        tx.rollback()
+
+    assert [h["partition"] for h in handled] == ["partition_test_events_history", "partition_test_events_p2030_01"]
+    with gzip.open(tmp_path / "partition_test_events_p2030_01.csv.gz", "rt") as f:
+        assert f.read().splitlines() == ["id,created_at", "2,2030-01-20 00:00:00"]
+
+
+def test_simulations_report_and_reset():
+    r = client.post("/work-items/simulate")
+    assert r.status_code == 200, r.text
+
+    report = client.get("/work-items/simulations/report", params={"days": 1}).json()
+    assert report["total"] >= r.json()["total"]
+
+    reset = client.delete("/work-items/simulations/reset").json()
+    assert reset["deleted_work_items"] >= r.json()["total"]
+    assert client.get("/work-items/simulations/report").json()["total"] == 0
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.agents import CostAgent, ReasonCode, RiskAgent, SlaAgent
+from app.core.orchestrator import Orchestrator, plan_llm
+from app.core.scenarios import SCENARIOS
+from tests.helpers import make_event
+
+BASE = make_event(shipment_id="T-PLAN")
+
+
+def _plan(**overrides):
+    event = {**BASE, **overrides}
+    results = [a.evaluate(event) for a in (RiskAgent(), CostAgent(), SlaAgent())]
+    return plan_llm(event, results, llm_enabled=True)
+
+
+@pytest.mark.parametrize(
+    "overrides, expected_override, llm_called",
+    [
+        # no deterministic escalate votes: an LLM ESCALATE (1.5) can't reach the threshold
+        ({}, None, False),
+        # one escalate vote (medium-high order value): the LLM decides
+        ({"order_value": 60000}, None, True),
+        # Risk + SLA already escalate: decided without the LLM
+        ({"delay_days": 4, "inventory_days_of_supply": 4}, None, False),
+        # hard overrides short-circuit before any LLM work
+        ({"priority_flag": True}, "PRIORITY_FLAG", False),
+        ({"order_value": 150000}, "HIGH_ORDER_VALUE", False),
+    ],
+)
+def test_llm_only_called_when_it_can_flip_the_vote(overrides, expected_override, llm_called):
+    override, skip_code, skip_reason = _plan(**overrides)
+    assert override == expected_override
+    assert (skip_code is None) == llm_called == (skip_reason is None)
+    if not llm_called:
+        assert skip_code == ReasonCode.LLM_SKIPPED
+
+
+def test_disabled_llm_is_never_called():
+    event = {**BASE, "order_value": 60000}
+    results = [a.evaluate(event) for a in (RiskAgent(), CostAgent(), SlaAgent())]
+    _, skip_code, skip_reason = plan_llm(event, results, llm_enabled=False)
+    assert skip_code == ReasonCode.LLM_DISABLED and skip_reason is not None
+
+
+def test_reused_orchestrator_matches_batch_and_keeps_trace():
+    orchestrator = Orchestrator(llm_enabled=False)
+    agents = orchestrator.deterministic_agents
+
+    single = [orchestrator.evaluate(event, None) for event in SCENARIOS]
+    batch = orchestrator.evaluate_batch(SCENARIOS, None)
+
+    assert orchestrator.deterministic_agents is agents
+    assert [o["decision"] for o in single] == [o["decision"] for o in batch]
+    assert [o["context"] for o in single] == [o["context"] for o in batch]
+    for out in single:
+        names = [a["name"] for a in out["context"]["agent_trace"]]
+        assert names == ["RiskAgent", "CostAgent", "SlaAgent", "LlmDecisionAgent"]
+        assert out["context"]["final"]["llm_called"] is False
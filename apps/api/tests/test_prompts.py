@@ -0,0 +1,53 @@
+from app.ai import llm_agent
+from app.ai.prompts import PROMPT_VERSION, SYSTEM_PROMPT, build_prompt, compact_event, estimate_tokens
+
+EVENT = {
+    "shipment_id": "T-PROMPT",
+    "supplier_id": "SUP-001",
+    "delay_days": 3,
+    "order_value": 60000,
+    "region": "US-CENTRAL",
+    "carrier": None,
+}
+
+
+def test_prompt_stays_within_budget_and_drops_least_relevant_chunks():
+    chunks = [f"Rule {i}: " + "Escalate when the delay exceeds the SLA buffer. " * 40 for i in range(5)]
+
+    prompt = build_prompt(compact_event(EVENT), chunks, token_budget=800)
+
+    assert prompt.input_tokens <= 800
+    assert prompt.chunks_used >= 1
+    assert prompt.chunks_dropped == len(chunks) - prompt.chunks_used
+    user = prompt.messages[1]["content"]
+    # most relevant first; the tail of the list is what gets dropped
+    assert "Rule 0:" in user
+    assert "Rule 4:" not in user
+    assert prompt.version == PROMPT_VERSION
+
+
+def test_prefix_is_identical_across_events_and_event_is_compact():
+    a = build_prompt(compact_event(EVENT), ["short rule"])
+    b = build_prompt(compact_event({**EVENT, "shipment_id": "T-OTHER"}), ["another rule"])
+
+    assert a.messages[0] == b.messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    user = a.messages[1]["content"]
+    assert '"carrier"' not in user
+    assert "\n  " not in user  # no pretty-printing
+    assert a.input_tokens == estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user)
+
+
+def test_event_is_serialized_once_for_the_context_cache_key_and_the_prompt(monkeypatch):
+    keys = []
+
+    def cache_key(event_json, *scope):
+        keys.append(event_json)
+        return "key"
+
+    monkeypatch.setattr(llm_agent, "context_cache_key", cache_key)
+    monkeypatch.setattr(llm_agent, "cached_contexts", lambda key: ["short rule"])
+
+    messages = llm_agent.LlmDecisionAgent().build_messages(EVENT, db=None)
+
+    assert keys == [compact_event(EVENT)]
+    assert messages[1]["content"].endswith(f"Shipment:\n{keys[0]}")
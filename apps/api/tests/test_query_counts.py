@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from tests.helpers import ESCALATING, create_work_item
+
+client = TestClient(app)
+
+
+def test_get_work_item_query_counts(assert_num_queries):
+    work_item_id = create_work_item(**ESCALATING)
+
+    # cold: version probe + row load
+    with assert_num_queries(2):
+        r = client.get(f"/work-items/{work_item_id}")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    # warm: version probe only, body served from the response cache
+    with assert_num_queries(1):
+        r2 = client.get(f"/work-items/{work_item_id}")
+    assert r2.content == r.content
+
+    # conditional: version probe only, no body
+    with assert_num_queries(1):
+        r3 = client.get(f"/work-items/{work_item_id}", headers={"If-None-Match": etag})
+    assert r3.status_code == 304
+    assert r3.headers["ETag"] == etag
+
+
+def test_run_does_not_load_decisions(assert_num_queries):
+    work_item_id = create_work_item(**ESCALATING)
+
+    # select+lock work item (with latest decision), update work item, insert decision, insert agent_results (one statement),
+    # upsert decision rollup
+    with assert_num_queries(5):
+        r = client.post(f"/work-items/{work_item_id}/run")
+    assert r.status_code == 200
+
+
+def test_trace_loads_history_in_one_round_trip(assert_num_queries):
+    work_item_id = create_work_item(**ESCALATING)
+    client.post(f"/work-items/{work_item_id}/run")
+    client.post(
+        f"/work-items/{work_item_id}/review",
+        json={"action": "APPROVE", "reviewer": "qc", "comment": "ok"},
+    )
+
+    # version probe + work item with full history in one round trip
+    with assert_num_queries(2):
+        r = client.get(f"/work-items/{work_item_id}/trace")
+    assert r.status_code == 200
+    decisions = r.json()["decisions"]
+    assert [d["decision"] for d in decisions] == ["ESCALATE", "APPROVE"]
+
+
+def test_etag_changes_when_status_changes():
+    work_item_id = create_work_item(**ESCALATING)
+    etag_new = client.get(f"/work-items/{work_item_id}").headers["ETag"]
+
+    client.post(f"/work-items/{work_item_id}/run")
+
+    r = client.get(f"/work-items/{work_item_id}", headers={"If-None-Match": etag_new})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag_new
+    assert r.json()["status"] == "ESCALATED"
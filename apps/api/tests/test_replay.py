@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.replay import replay, resolve_config
+from app.db.session import SessionLocal
+from app.main import app
+from tests.helpers import create_and_run
+
+client = TestClient(app)
+
+
+def _run(**overrides) -> str:
+    return create_and_run(supplier_id="SUP-RP", region="EU-WEST", **overrides)
+
+
+def test_replay_reports_flips_and_human_agreement():
+    since = datetime.utcnow()  # created_at is stamped with the same clock
+    _run()  # no escalate votes
+    _run(order_value=60000)  # one escalate vote (Cost): AUTO_RESOLVE live
+    escalated = _run(delay_days=4, inventory_days_of_supply=4)  # Risk + SLA: ESCALATE
+    client.post(
+        f"/work-items/{escalated}/review",
+        json={"action": "APPROVE", "reviewer": "qa", "comment": "needed attention"},
+    )
+
+    with SessionLocal() as db:
+        report = replay(db, {"VOTE_WEIGHTS": {"ESCALATE_THRESHOLD": 1.0}}, since=since, chunk_size=2)
+
+    assert report["scanned"] == 3
+    assert report["live_decisions"] == {"AUTO_RESOLVE": 2, "ESCALATE": 1}
+    assert report["flips"] == {"total": 1, "AUTO_RESOLVE->ESCALATE": 1}
+    assert report["flips_by_supplier"] == {"SUP-RP": {"AUTO_RESOLVE->ESCALATE": 1}}
+    assert report["flips_by_region"] == {"EU-WEST": {"AUTO_RESOLVE->ESCALATE": 1}}
+    assert report["human_agreement"]["reviewed"] == 1
+    assert report["human_agreement"]["live_rate"] == 1.0
+    assert report["live_vs_stored_mismatch"] == 0
+
+
+def test_unknown_candidate_keys_are_rejected():
+    with pytest.raises(ValueError):
+        resolve_config({"VOTE_WEIGHTS": {"LLM_WEIGHT": 1.0}})
+    with pytest.raises(ValueError):
+        resolve_config({"WEIGHTS": {}})
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from app.ai import resilience
+from app.ai.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    LlmGuard,
+    llm_deadline,
+)
+from app.core import orchestrator
+from app.core.agents import CostAgent, ReasonCode, RiskAgent, SlaAgent
+
+
+def _failing(timeout):
+    raise ConnectionError("upstream down")
+
+
+def test_breaker_opens_then_recovers_through_half_open():
+    guard = LlmGuard(breaker=CircuitBreaker("test", failure_threshold=2, reset_seconds=0.05))
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            guard.call("test", _failing)
+    assert guard.breaker.snapshot()["state"] == CircuitBreaker.OPEN
+
+    # open: rejected without calling upstream
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        guard.call("test", lambda timeout: calls.append(timeout))
+    assert calls == []
+
+    # after the reset window one trial goes through and closes it
+    time.sleep(0.06)
+    assert guard.call("test", lambda timeout: "ok") == "ok"
+    assert guard.breaker.snapshot()["state"] == CircuitBreaker.CLOSED
+
+
+def test_call_is_abandoned_at_the_run_deadline():
+    guard = LlmGuard(breaker=CircuitBreaker("test", failure_threshold=5, reset_seconds=30))
+    release = threading.Event()
+
+    t0 = time.monotonic()
+    with llm_deadline(0.05), pytest.raises(DeadlineExceeded):
+        guard.call("test", lambda timeout: release.wait(5))
+    assert time.monotonic() - t0 < 1
+    release.set()
+
+    with llm_deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            guard.call("test", lambda timeout: "never called")
+
+
+def test_hedged_request_wins_when_primary_stalls():
+    guard = LlmGuard(hedging=True, hedge_min_delay=0.01, breaker=CircuitBreaker("test", 5, 30))
+    for _ in range(20):
+        guard.latency.observe("test", 0.01)
+
+    release = threading.Event()
+    attempts = []
+
+    def call(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            release.wait(5)  # primary stalls
+            return "slow"
+        return "fast"
+
+    assert guard.call("test", call) == "fast"
+    assert len(attempts) == 2
+    release.set()
+
+
+def test_planner_votes_deterministic_only_while_circuit_open(monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    monkeypatch.setattr(resilience.llm_guard, "breaker", breaker)
+    monkeypatch.setattr(orchestrator, "_is_llm_enabled", lambda: True)
+
+    # one deterministic escalate vote: normally the LLM would be called
+    event = {
+        "shipment_id": "T-CIRCUIT",
+        "supplier_id": "SUP-001",
+        "delay_days": 1,
+        "inventory_days_of_supply": 14,
+        "order_value": 60000,
+        "region": "US-CENTRAL",
+        "priority_flag": False,
+    }
+    results = [a.evaluate(event) for a in (RiskAgent(), CostAgent(), SlaAgent())]
+    override, skip_code, _ = orchestrator.plan_llm(event, results, llm_enabled=True)
+    assert override is None and skip_code == ReasonCode.LLM_CIRCUIT_OPEN
+
+    out = orchestrator.orchestrate(event, db=None)
+    assert out["decision"] == "AUTO_RESOLVE"
+    assert out["context"]["final"]["llm_called"] is False
+    assert out["agent_results"][-1].reason_code == ReasonCode.LLM_CIRCUIT_OPEN
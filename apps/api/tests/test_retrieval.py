@@ -0,0 +1,78 @@
+import uuid
+
+from app.ai.retrieval import RetrievalOptions, search_knowledge
+from app.db.models import KnowledgeChunk
+from app.db.session import SessionLocal
+
+
+def _axis(i: int, tilt: float = 0.0) -> list[float]:
+    # unit-ish vector along axis i, tilted towards axis 0 (the query direction)
+    v = [0.001] * 1536
+    v[i] = 1.0
+    v[0] += tilt
+    return v
+
+
+def _seed(db, supplier_id: str) -> None:
+    texts = [
+        ("Late deliveries are reviewed weekly by the carrier desk.", _axis(1, 0.9)),
+        ("Penalty schedule for delays beyond the grace period.", _axis(2, 0.6)),
+        ("Clause CL-7731: ocean freight to EU ports escalates after 48 hours.", _axis(3, 0.1)),
+    ]
+    for chunk_text, embedding in texts:
+        db.add(KnowledgeChunk(source="SLA_RETRIEVAL", supplier_id=supplier_id, region="EU-RET",
+                              doc_type=supplier_id, chunk_text=chunk_text, embedding=embedding))
+    db.flush()
+
+
+def _search(db, supplier_id: str, **options) -> list[str]:
+    hits = search_knowledge(
+        db,
+        _axis(0),
+        "CL-7731 delays",
+        supplier_id=supplier_id,
+        region="EU-RET",
+        doc_type=supplier_id,
+        top_k=3,
+        options=RetrievalOptions(**options),
+    )
+    return [h.chunk_text for h in hits]
+
+
+def test_hybrid_surfaces_exact_clause_ids_vector_search_ranks_last():
+    supplier_id = f"SUP-{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        _seed(db, supplier_id)
+
+        vector = _search(db, supplier_id, mode="vector")
+        lexical = _search(db, supplier_id, mode="lexical")
+        hybrid = _search(db, supplier_id, mode="hybrid", vector_weight=0.5, lexical_weight=2.0)
+        db.rollback()
+
+    assert vector[-1].startswith("Clause CL-7731")
+    assert lexical and all("CL-7731" in t or "delay" in t for t in lexical)
+    assert hybrid[0].startswith("Clause CL-7731")
+
+
+def test_prefilter_restricts_vector_arm_to_lexical_matches():
+    supplier_id = f"SUP-{uuid.uuid4().hex[:8]}"
+    with SessionLocal() as db:
+        _seed(db, supplier_id)
+
+        prefiltered = _search(db, supplier_id, mode="hybrid", prefilter=True)
+        no_lexical_hit = search_knowledge(
+            db,
+            _axis(0),
+            "zzzunmatched",
+            supplier_id=supplier_id,
+            region="EU-RET",
+            doc_type=supplier_id,
+            top_k=3,
+            options=RetrievalOptions(mode="hybrid", prefilter=True),
+        )
+        db.rollback()
+
+    # "Late deliveries ..." is the nearest vector but matches no query term
+    assert len(prefiltered) == 2 and not any(t.startswith("Late deliveries") for t in prefiltered)
+    # falls back to plain vector search
+    assert [h.chunk_text for h in no_lexical_hit][0].startswith("Late deliveries")
@@ -0,0 +1,131 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.exc import StaleDataError
+
+import app.api.routes.work_items as work_items_routes
+from app.core.recording import record_review
+from app.db.loading import claim_next_escalated, lock_work_item
+from app.db.session import SessionLocal
+from app.main import app
+from tests.helpers import create_and_run
+
+client = TestClient(app)
+
+
+def _escalated(region: str, **overrides) -> str:
+    # priority_flag is a hard override: always ESCALATED. Mid urgency unless overridden.
+    fields = {"updated_eta": "2026-03-08", "delay_days": 7, "inventory_days_of_supply": 15, "order_value": 100000}
+    return create_and_run(supplier_id="SUP-RQ", region=region, priority_flag=True, **(fields | overrides))
+
+
+@pytest.fixture
+def region() -> str:
+    # Queue tests claim within their own region: the shared DB holds other ESCALATED items
+    return f"RQ-{uuid.uuid4().hex[:8]}"
+
+
+def _next(reviewer: str, region: str):
+    return client.get("/review-queue/next", params={"reviewer": reviewer, "region": region})
+
+
+def test_claims_follow_urgency_and_are_not_handed_out_twice(region):
+    low = _escalated(region, delay_days=1, inventory_days_of_supply=30, order_value=0)
+    high = _escalated(region, delay_days=14, inventory_days_of_supply=0, order_value=200000)
+    mid = _escalated(region)
+
+    first = _next("alice", region).json()
+    assert first["work_item"]["id"] == high
+    assert first["urgency"] == pytest.approx(1.0)
+    assert first["claim"]["reviewer"] == "alice"
+
+    # alice keeps her item, bob gets the next one
+    assert _next("alice", region).json()["work_item"]["id"] == high
+    assert _next("bob", region).json()["work_item"]["id"] == mid
+    assert _next("carol", region).json()["work_item"]["id"] == low
+    assert _next("dave", region).status_code == 204
+
+
+def test_live_claim_comes_back_before_a_more_urgent_arrival(region):
+    claimed = _escalated(region)
+    assert _next("alice", region).json()["work_item"]["id"] == claimed
+
+    urgent = _escalated(region, delay_days=14, inventory_days_of_supply=0, order_value=200000)
+    again = _next("alice", region).json()
+    assert again["work_item"]["id"] == claimed
+    assert again["claim"]["reviewer"] == "alice"
+    assert _next("bob", region).json()["work_item"]["id"] == urgent
+
+
+def test_review_respects_claims_and_clears_them(region):
+    work_item_id = _escalated(region)
+    assert _next("alice", region).json()["work_item"]["id"] == work_item_id
+
+    review = {"action": "APPROVE", "comment": "ok"}
+    r = client.post(f"/work-items/{work_item_id}/review", json={**review, "reviewer": "bob"})
+    assert r.status_code == 409
+
+    r = client.post(f"/work-items/{work_item_id}/review", json={**review, "reviewer": "alice"})
+    assert r.status_code == 200, r.text
+    assert client.get(f"/work-items/{work_item_id}").json()["status"] == "HUMAN_APPROVED"
+    assert _next("alice", region).status_code == 204
+
+
+def test_released_and_expired_claims_return_to_the_queue(region):
+    work_item_id = _escalated(region)
+    _next("alice", region)
+
+    assert client.delete(f"/review-queue/{work_item_id}/claim", params={"reviewer": "bob"}).status_code == 409
+    assert client.delete(f"/review-queue/{work_item_id}/claim", params={"reviewer": "alice"}).status_code == 200
+    assert _next("bob", region).json()["work_item"]["id"] == work_item_id
+
+    with SessionLocal() as db:
+        assert claim_next_escalated(db, "carol", 60, datetime.utcnow(), region=region) is None
+        later = datetime.utcnow() + timedelta(hours=1)
+        wi = claim_next_escalated(db, "carol", 60, later, region=region)
+        db.commit()
+    assert str(wi.id) == work_item_id and wi.claimed_by == "carol"
+
+
+def test_concurrent_claims_skip_locked_rows(region):
+    first = _escalated(region, delay_days=10)
+    second = _escalated(region)
+
+    now = datetime.utcnow()
+    with SessionLocal() as a, SessionLocal() as b:
+        # a's claim is uncommitted, so its row is still locked: b must skip it, not wait
+        claimed_a = claim_next_escalated(a, "alice", 60, now, region=region)
+        claimed_b = claim_next_escalated(b, "bob", 60, now, region=region)
+        a.commit()
+        b.commit()
+
+    assert (str(claimed_a.id), str(claimed_b.id)) == (first, second)
+
+
+def test_review_holds_its_row_against_a_concurrent_claim(region):
+    work_item_id = _escalated(region)
+
+    with SessionLocal() as a, SessionLocal() as b:
+        # a is mid-review (row locked): b's claim skips the row instead of re-leasing it
+        wi = lock_work_item(a, uuid.UUID(work_item_id))
+        assert claim_next_escalated(b, "bob", 60, datetime.utcnow(), region=region) is None
+        b.commit()
+        record_review(a, wi, "APPROVE", "alice", "ok")
+        a.commit()
+
+    assert client.get(f"/work-items/{work_item_id}").json()["status"] == "HUMAN_APPROVED"
+
+
+def test_concurrent_modification_is_a_conflict(region, monkeypatch):
+    work_item_id = _escalated(region)
+
+    def stale(*args, **kwargs):
+        raise StaleDataError("expected to update 1 row(s); 0 were matched")
+
+    monkeypatch.setattr(work_items_routes, "record_review", stale)
+    r = client.post(
+        f"/work-items/{work_item_id}/review", json={"action": "APPROVE", "reviewer": "alice", "comment": "ok"}
+    )
+    assert r.status_code == 409
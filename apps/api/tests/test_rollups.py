@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core.rollups import COUNTERS, RollupDeltas, rebuild_rollups
+from app.core.scenarios import SCENARIOS
+from app.db.models import DecisionRollup
+from app.db.session import SessionLocal
+from app.main import app
+from tests.helpers import ESCALATING, create_and_run
+
+client = TestClient(app)
+
+
+def _supplier() -> str:
+    return f"SUP-RU-{uuid.uuid4().hex[:6]}"
+
+
+def _rollups(db, supplier_ids) -> dict:
+    rows = db.execute(
+        select(DecisionRollup).where(
+            DecisionRollup.supplier_id.in_(supplier_ids), DecisionRollup.day == datetime.utcnow().date()
+        )
+    ).scalars()
+    out = {}
+    for r in rows:
+        counts = {c: getattr(r, c) for c in COUNTERS}
+        if any(counts.values()):  # a row emptied by negative deltas is the same as no row
+            out[(r.supplier_id, r.region)] = counts
+    return out
+
+
+def _assert_rebuild_matches(supplier_ids):
+    with SessionLocal() as db:
+        incremental = _rollups(db, supplier_ids)
+        rebuild_rollups(db, since=datetime.utcnow().date())
+        rebuilt = _rollups(db, supplier_ids)
+        db.rollback()
+
+    assert incremental.keys() == rebuilt.keys()
+    for key, counts in incremental.items():
+        assert counts == {**rebuilt[key], "confidence_sum": pytest.approx(rebuilt[key]["confidence_sum"])}, key
+
+
+def _review(work_item_id: str, action: str):
+    r = client.post(f"/work-items/{work_item_id}/review", json={"action": action, "reviewer": "qa", "comment": "ok"})
+    assert r.status_code == 200, r.text
+
+
+def _confidence(work_item_id: str) -> float:
+    return client.get(f"/work-items/{work_item_id}/trace").json()["decisions"][0]["confidence"]
+
+
+def test_stats_count_runs_reviews_and_overrides():
+    supplier_id = _supplier()
+    resolved = create_and_run(supplier_id=supplier_id)
+    voted = create_and_run(supplier_id=supplier_id, **ESCALATING)
+    overridden = create_and_run(supplier_id=supplier_id, priority_flag=True)
+    _review(voted, "APPROVE")
+    _review(overridden, "REJECT")
+
+    stats = client.get("/work-items/stats", params={"supplier_id": supplier_id}).json()
+
+    confidences = [_confidence(i) for i in (resolved, voted, overridden)]
+    assert stats["orchestrated"] == 3
+    assert (stats["auto_resolved"], stats["escalated"], stats["overrides"]) == (1, 2, 1)
+    assert stats["avg_confidence"] == round(sum(confidences) / 3, 3)
+    assert (stats["human_approved"], stats["human_rejected"]) == (1, 1)
+    assert stats["human_approval_rate"] == 0.5
+
+
+def test_rebuild_reproduces_rollups_kept_by_run_and_reviews():
+    supplier_id = _supplier()
+    for region in ("RU-EAST", "RU-WEST"):
+        create_and_run(supplier_id=supplier_id, region=region)
+        create_and_run(supplier_id=supplier_id, region=region, order_value=60000)
+        _review(create_and_run(supplier_id=supplier_id, region=region, **ESCALATING), "APPROVE")
+        _review(create_and_run(supplier_id=supplier_id, region=region, priority_flag=True), "REJECT")
+
+    bulk = [create_and_run(supplier_id=supplier_id, region="RU-EAST", priority_flag=True) for _ in range(2)]
+    r = client.post(
+        "/work-items/review-batch",
+        json={"work_item_ids": bulk, "action": "APPROVE", "reviewer": "ops", "comment": "bulk"},
+    )
+    assert r.json()["reviewed"] == 2
+
+    _assert_rebuild_matches([supplier_id])
+
+
+def test_rebuild_reproduces_rollups_kept_by_simulate():
+    assert client.post("/work-items/simulate").status_code == 200
+
+    _assert_rebuild_matches({ev["supplier_id"] for ev in SCENARIOS})
+
+
+def test_rollup_deltas_accumulate_and_upsert_into_existing_rows():
+    supplier_id = _supplier()
+    payload = {"supplier_id": supplier_id, "region": "RU-NORTH"}
+    escalated = {"decision": "ESCALATE", "confidence": 1.0, "context": {"final": {"override": "PRIORITY_FLAG"}}}
+
+    deltas = RollupDeltas()
+    deltas.add_orchestration(payload, {"decision": "AUTO_RESOLVE", "confidence": 0.6, "context": {"final": {}}})
+    deltas.add_orchestration(payload, escalated)
+    deltas.add_review(payload, "APPROVE")
+    with SessionLocal() as db:
+        deltas.flush(db)
+        deltas.add_review(payload, "REJECT")
+        deltas.flush(db)  # second upsert adds to the row the first one inserted
+        deltas.flush(db)  # flushed deltas are cleared: no-op
+        rollups = _rollups(db, [supplier_id])
+        db.rollback()
+
+    assert rollups == {
+        (supplier_id, "RU-NORTH"): {
+            "orchestrated": 2,
+            "auto_resolved": 1,
+            "escalated": 1,
+            "overrides": 1,
+            "confidence_sum": pytest.approx(1.6),
+            "human_approved": 1,
+            "human_rejected": 1,
+        }
+    }
+
+
+def test_simulation_reset_takes_its_decisions_out_of_the_rollups():
+    suppliers = {ev["supplier_id"] for ev in SCENARIOS}
+    client.delete("/work-items/simulations/reset")
+    with SessionLocal() as db:
+        before = _rollups(db, suppliers)
+
+    items = client.post("/work-items/simulate").json()["items"]
+    _review(next(i["work_item_id"] for i in items if i["status"] == "ESCALATED"), "APPROVE")
+    assert client.delete("/work-items/simulations/reset").json()["deleted_decisions"] == len(SCENARIOS) + 1
+
+    with SessionLocal() as db:
+        assert _rollups(db, suppliers) == before
+    _assert_rebuild_matches(suppliers)
@@ -0,0 +1,118 @@
+import threading
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text
+
+from app.api.routes import work_items
+from app.core.orchestrator import orchestrate
+from app.core.recording import record_orchestration
+from app.core.single_flight import SingleFlight
+from app.db.loading import claim_work_item_for_run
+from app.db.models import Decision, WorkItem
+from app.db.session import SessionLocal
+from app.main import app
+from tests.helpers import ESCALATING, create_work_item
+
+client = TestClient(app)
+
+
+def _decision_count(work_item_id: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).select_from(Decision).where(Decision.work_item_id == uuid.UUID(work_item_id))
+        )
+
+
+def test_rerun_serves_stored_decision():
+    work_item_id = create_work_item(**ESCALATING)
+
+    first = client.post(f"/work-items/{work_item_id}/run").json()
+    second = client.post(f"/work-items/{work_item_id}/run").json()
+
+    assert first["idempotent"] is False
+    assert second["idempotent"] is True
+    assert second["decision"] == first["decision"]
+    assert _decision_count(work_item_id) == 1
+
+
+def test_run_waits_for_other_workers_run_then_serves_its_decision():
+    work_item_id = create_work_item(**ESCALATING)
+    responses = []
+
+    # another worker: holds the row lock while it orchestrates
+    holder = SessionLocal()
+    wi = holder.execute(
+        select(WorkItem).where(WorkItem.id == uuid.UUID(work_item_id)).with_for_update()
+    ).scalar_one()
+
+    t = threading.Thread(target=lambda: responses.append(client.post(f"/work-items/{work_item_id}/run")))
+    t.start()
+    time.sleep(0.2)
+    assert t.is_alive()  # blocked on the row lock
+
+    record_orchestration(holder, wi, orchestrate(wi.payload, holder))
+    holder.commit()
+    holder.close()
+    t.join(5)
+
+    assert responses[0].status_code == 200
+    assert responses[0].json()["idempotent"] is True
+    assert _decision_count(work_item_id) == 1
+
+
+def test_run_conflicts_when_lock_wait_times_out(monkeypatch):
+    monkeypatch.setattr(work_items, "RUN_LOCK_WAIT_SECONDS", 0.1)
+    work_item_id = create_work_item(**ESCALATING)
+
+    with SessionLocal() as holder:
+        holder.execute(select(WorkItem).where(WorkItem.id == uuid.UUID(work_item_id)).with_for_update())
+        r = client.post(f"/work-items/{work_item_id}/run")
+        holder.rollback()
+
+    assert r.status_code == 409
+    assert "Retry-After" in r.headers
+    assert _decision_count(work_item_id) == 0
+
+
+def test_lock_timeout_only_bounds_the_wait_for_the_row():
+    work_item_id = create_work_item(**ESCALATING)
+
+    holder = SessionLocal()
+    holder.execute(select(WorkItem).where(WorkItem.id == uuid.UUID(work_item_id)).with_for_update())
+    threading.Timer(0.2, holder.rollback).start()
+
+    with SessionLocal() as db:
+        wi, _ = claim_work_item_for_run(db, uuid.UUID(work_item_id), 5)  # waits for the holder
+        assert str(wi.id) == work_item_id
+        assert db.scalar(text("SHOW lock_timeout")) == "0"
+        db.rollback()
+    holder.close()
+
+
+def test_single_flight_shares_one_execution():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "decision"
+
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [("decision", False), ("decision", True)]
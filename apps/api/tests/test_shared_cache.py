@@ -0,0 +1,89 @@
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.api.routes.knowledge as knowledge_routes
+import app.core.shared_cache as shared_cache_module
+from app.ai import embeddings
+from app.ai.retrieval import cache_contexts, cached_contexts, context_cache_key
+from app.core.shared_cache import SharedCache
+from app.main import app
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+client = TestClient(app)
+
+
+def test_put_get_overwrite_and_oversize(tmp_path):
+    cache = SharedCache("unit", tmp_path, slots=16, slot_bytes=128)
+    cache.put(b"a", b"first")
+    cache.put(b"a", b"second")
+    cache.put(b"big", b"x" * 200)
+
+    assert cache.get(b"a") == b"second"
+    assert cache.get(b"big") is None
+    assert cache.get(b"missing") is None
+
+
+def test_evicts_least_recently_used_of_the_set(tmp_path):
+    cache = SharedCache("lru", tmp_path, slots=2, slot_bytes=128, ways=2)
+    cache.put(b"a", b"1")
+    cache.put(b"b", b"2")
+    cache.get(b"a")
+    cache.put(b"c", b"3")
+
+    assert cache.get(b"a") == b"1"
+    assert cache.get(b"b") is None
+    assert cache.get(b"c") == b"3"
+
+
+def test_entries_and_invalidation_are_visible_across_processes(tmp_path):
+    cache = SharedCache("xproc", tmp_path, slots=64, slot_bytes=128)
+    cache.put(b"mine", b"parent")
+
+    child = f"""
+from app.core.shared_cache import SharedCache
+cache = SharedCache("xproc", {str(tmp_path)!r}, slots=64, slot_bytes=128)
+assert cache.get(b"mine") == b"parent"
+cache.put(b"theirs", b"child")
+"""
+    subprocess.run([sys.executable, "-c", child], cwd=API_DIR, check=True)
+    assert cache.get(b"theirs") == b"child"
+
+    subprocess.run(
+        [sys.executable, "-c", child.split("assert")[0] + "cache.invalidate()"], cwd=API_DIR, check=True
+    )
+    assert cache.get(b"mine") is None and cache.get(b"theirs") is None
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache_module, "SHARED_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(shared_cache_module, "_caches", {})
+    return tmp_path
+
+
+def test_embeddings_use_the_shared_cache(shared_dir):
+    vector = [0.1] * embeddings.EMBED_DIMS
+    embeddings._cache_put("shared text", vector)
+
+    assert embeddings._cache_get("shared text") == pytest.approx(vector)
+    assert (shared_dir / "embedding.cache").exists()
+
+
+def test_ingest_invalidates_cached_contexts(shared_dir, monkeypatch):
+    monkeypatch.setattr(knowledge_routes, "get_embedding", lambda text: [0.001] * 1536)
+    key = context_cache_key("event", "SUP-CACHE", "EU", None, 5)
+    cache_contexts(key, ["old rule"])
+    assert cached_contexts(key) == ["old rule"]
+
+    r = client.post(
+        "/knowledge/ingest",
+        json={"source": "CACHE_TEST", "supplier_id": "SUP-CACHE", "chunk_text": f"New rule {uuid.uuid4()}"},
+    )
+    assert r.status_code == 200, r.text
+    assert cached_contexts(key) is None